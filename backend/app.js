@@ -0,0 +1,98 @@
+const express = require('express');
+const cors = require('cors');
+const { compress } = require('./middleware/compress');
+const { metrics, metricsHandler, cacheStatsHandler, compressionStatsHandler } = require('./middleware/metrics');
+
+const app = express();
+
+// Route modules mounted under /api below; request metrics label only these
+const API_MODULES = [
+    'batches', 'schedules', 'inventory', 'machines', 'inspections', 'alerts',
+    'changes', 'live', 'dashboard', 'telemetry', 'cache', 'compression'
+];
+
+// Middleware
+app.use(metrics({ modules: API_MODULES }));
+app.use(cors({ exposedHeaders: ['X-Next-Cursor'] }));
+app.use(compress());
+app.use(express.json({ limit: process.env.JSON_BODY_LIMIT || '5mb' }));
+app.use(express.urlencoded({ extended: true }));
+
+// Import Routes
+const batchRoutes = require('./routes/batches');
+const scheduleRoutes = require('./routes/schedules');
+const inventoryRoutes = require('./routes/inventory');
+const machineRoutes = require('./routes/machines');
+const inspectionRoutes = require('./routes/inspections');
+const alertRoutes = require('./routes/alerts');
+const changeRoutes = require('./routes/changes');
+const liveRoutes = require('./routes/live');
+const dashboardRoutes = require('./routes/dashboard');
+const telemetryRoutes = require('./routes/telemetry');
+
+// Mount Routes
+app.use('/api/batches', batchRoutes);
+app.use('/api/schedules', scheduleRoutes);
+app.use('/api/inventory', inventoryRoutes);
+app.use('/api/machines', machineRoutes);
+app.use('/api/inspections', inspectionRoutes);
+app.use('/api/alerts', alertRoutes);
+app.use('/api/changes', changeRoutes);
+app.use('/api/live', liveRoutes);
+app.use('/api/dashboard', dashboardRoutes);
+app.use('/api/telemetry', telemetryRoutes);
+
+// Response cache counters, for sizing RESPONSE_CACHE_MAX_ENTRIES / _TTL_MS.
+// These and /metrics are summed over all workers in cluster mode.
+app.get('/api/cache/stats', cacheStatsHandler);
+
+// Compression counters: bytes saved and time spent compressing
+app.get('/api/compression/stats', compressionStatsHandler);
+
+// Prometheus scrape endpoint: route latency, in-flight requests and query
+// timings per route, plus the cache and compression counters above
+app.get('/metrics', metricsHandler);
+
+// Root Route
+app.get('/', (req, res) => {
+    res.json({
+        message: 'Premier Textile Dyers API',
+        version: '1.0.0',
+        endpoints: {
+            batches: '/api/batches',
+            schedules: '/api/schedules',
+            inventory: '/api/inventory',
+            machines: '/api/machines',
+            inspections: '/api/inspections',
+            alerts: '/api/alerts',
+            changes: '/api/changes',
+            live: '/api/live',
+            dashboard: '/api/dashboard/summary',
+            telemetry: '/api/telemetry',
+            metrics: '/metrics'
+        }
+    });
+});
+
+// Error Handling Middleware
+app.use((err, req, res, next) => {
+    console.error(err.stack);
+    res.status(err.status || 500).json({
+        error: {
+            message: err.message || 'Internal Server Error',
+            status: err.status || 500
+        }
+    });
+});
+
+// 404 Handler
+app.use((req, res) => {
+    res.status(404).json({
+        error: {
+            message: 'Route not found',
+            status: 404
+        }
+    });
+});
+
+module.exports = app;
@@ -0,0 +1,120 @@
+// Alert rule engine over 100k inventory items, 100k machines and 100k
+// inspections: a cold full pass that creates every alert, a full pass with
+// nothing to change, and an incremental run after 1% of inventory changed.
+//
+// Budget: the cold full pass must finish within FULL_PASS_BUDGET_MS
+// (default 30 s, ALERT_BENCH_BUDGET_MS to override); the process exits
+// non-zero when it does not.
+//
+//   npm run bench:alerts
+const Alert = require('../models/Alert');
+const AlertRuleState = require('../models/AlertRuleState');
+const Inspection = require('../models/Inspection');
+const Inventory = require('../models/Inventory');
+const Machine = require('../models/Machine');
+const Tombstone = require('../models/Tombstone');
+const { generateAlerts } = require('../utils/alertRules');
+const { connect, fill } = require('./common');
+
+const SIZE = 100000;
+const TOUCHED = SIZE / 100;
+const FULL_PASS_BUDGET_MS = parseInt(process.env.ALERT_BENCH_BUDGET_MS, 10) || 30000;
+
+const STOCK_STATUSES = ['ok', 'ok', 'ok', 'low', 'critical'];
+const MACHINE_STATUSES = ['running', 'running', 'running', 'idle', 'maintenance'];
+const HOUR = 60 * 60 * 1000;
+
+// Written well before the first run, so incremental runs skip them
+function stamps() {
+    const written = new Date(Date.now() - HOUR);
+    return { createdAt: written, updatedAt: written };
+}
+
+function makeItem(i) {
+    const status = STOCK_STATUSES[i % STOCK_STATUSES.length];
+    const stockLevel = status === 'critical' ? 10 : status === 'low' ? 40 : 80;
+    return {
+        name: `Reactive Dye ${i}`,
+        category: i % 2 ? 'Dye' : 'Chemical',
+        stock: stockLevel * 5,
+        minThreshold: 100,
+        maxCapacity: 500,
+        weeklyUsage: { sun: 0, mon: 0, tue: 0, wed: 0, thu: 0, fri: 0 },
+        status,
+        stockLevel,
+        ...stamps()
+    };
+}
+
+function makeMachine(i) {
+    const status = MACHINE_STATUSES[i % MACHINE_STATUSES.length];
+    const running = status === 'running';
+    return {
+        machineId: `SF-${String(i + 1).padStart(6, '0')}`,
+        name: `Softflow ${i + 1}`,
+        status,
+        lotNo: running ? String(13000 + i) : '',
+        efficiency: running ? 75 + (i % 25) : 0,
+        startTime: running ? new Date(Date.now() - (i % 16) * HOUR) : null,
+        ...stamps()
+    };
+}
+
+function makeInspection(i) {
+    return {
+        date: '2025-12-01',
+        color: 'Olive Green',
+        client: 'Modenik',
+        lotNo: String(13000 + i),
+        deltaE: 0.3 + (i % 25) / 10,
+        status: i % 4 === 0 ? 'rejected' : 'approved',
+        notes: '',
+        ...stamps()
+    };
+}
+
+async function timed(label, fn) {
+    const start = process.hrtime.bigint();
+    const result = await fn();
+    const ms = Number(process.hrtime.bigint() - start) / 1e6;
+    console.log(
+        `${label.padEnd(40)} ${ms.toFixed(0).padStart(7)} ms` +
+        `  scanned ${result.scanned}  created ${result.created}  updated ${result.updated}  resolved ${result.resolved}`
+    );
+    return ms;
+}
+
+async function main() {
+    const teardown = await connect();
+    try {
+        await fill(Inventory, SIZE, makeItem);
+        await fill(Machine, SIZE, makeMachine);
+        await fill(Inspection, SIZE, makeInspection);
+        await Promise.all([Alert.deleteMany({}), AlertRuleState.deleteMany({}), Tombstone.deleteMany({})]);
+        await Promise.all([Alert.init(), Machine.init()]);
+
+        console.log(`\n${SIZE} inventory items, machines and inspections`);
+        const cold = await timed('full pass (creates alerts)', () => generateAlerts({ full: true }));
+        await timed('full pass (nothing to change)', () => generateAlerts({ full: true }));
+
+        // Restock 1% of the low/critical items
+        const restock = await Inventory.find({ status: { $ne: 'ok' } }).limit(TOUCHED).select('_id').lean();
+        await Inventory.collection.updateMany(
+            { _id: { $in: restock.map((item) => item._id) } },
+            { $set: { status: 'ok', stockLevel: 90, stock: 450, updatedAt: new Date() } }
+        );
+        await timed(`incremental (${TOUCHED} items restocked)`, () => generateAlerts());
+        await timed('incremental (no changes)', () => generateAlerts());
+
+        console.log(`\nbudget ${FULL_PASS_BUDGET_MS} ms for the cold full pass: ${cold <= FULL_PASS_BUDGET_MS ? 'OK' : 'EXCEEDED'}`);
+        if (cold > FULL_PASS_BUDGET_MS) process.exitCode = 1;
+    } finally {
+        await Promise.all([Inventory, Machine, Inspection, Alert, AlertRuleState, Tombstone].map((Model) => Model.deleteMany({})));
+        await teardown();
+    }
+}
+
+main().catch((err) => {
+    console.error(err);
+    process.exit(1);
+});
@@ -0,0 +1,170 @@
+// Throughput of cluster mode (cluster.js) against the single-process server
+// (server.js) on the same data: 20k batches and inspections, uncached list
+// endpoints, CONCURRENCY keep-alive connections for DURATION_MS each.
+// Also reports how long each takes to drain on SIGTERM.
+//
+// The load generator shares the machine, so the cluster is run with one
+// core fewer than available unless WEB_CONCURRENCY is set.
+//
+//   npm run bench:cluster
+const http = require('http');
+const os = require('os');
+const path = require('path');
+const { spawn } = require('child_process');
+const mongoose = require('mongoose');
+const Batch = require('../models/Batch');
+const Inspection = require('../models/Inspection');
+const { connect, fill } = require('./common');
+
+const SIZE = 20000;
+const CONCURRENCY = 64;
+const DURATION_MS = parseInt(process.env.CLUSTER_BENCH_MS, 10) || 10000;
+const PORT = 5077;
+const WORKERS = parseInt(process.env.WEB_CONCURRENCY, 10) || Math.max(2, os.availableParallelism() - 1);
+const START_TIMEOUT_MS = 60000;
+
+const PATHS = ['/api/batches?limit=50', '/api/inspections?limit=50&status=approved'];
+
+function makeBatch(i) {
+    return {
+        batchId: `BTH-${String(i + 1).padStart(6, '0')}`,
+        date: '2025-12-10',
+        machine: `SF-${String((i % 8) + 1).padStart(2, '0')}`,
+        party: ['LUX', 'Modenik', 'JG'][i % 3],
+        color: 'Olive',
+        lotNo: String(13000 + i),
+        quantity: '420 kg',
+        duration: '6h 45m',
+        quantityKg: 420,
+        durationMinutes: 405,
+        status: i % 10 === 0 ? 'in-progress' : 'completed',
+        efficiency: 85 + (i % 15),
+        deltaE: 0.4 + (i % 10) / 10,
+        operator: 'Amir Khan',
+        createdAt: new Date(Date.now() - i * 60000),
+        updatedAt: new Date(Date.now() - i * 60000)
+    };
+}
+
+function makeInspection(i) {
+    return {
+        date: '2025-12-01',
+        color: 'Navy',
+        client: 'Modenik',
+        lotNo: String(13000 + i),
+        deltaE: 0.3 + (i % 25) / 10,
+        status: i % 4 === 0 ? 'rejected' : 'approved',
+        notes: '',
+        createdAt: new Date(Date.now() - i * 60000),
+        updatedAt: new Date(Date.now() - i * 60000)
+    };
+}
+
+// Start a server script and resolve once a line of its output matches ready
+function startServer(script, env, ready) {
+    const child = spawn(process.execPath, [path.join(__dirname, '..', script)], {
+        env: { ...process.env, ...env, PORT: String(PORT) },
+        stdio: ['ignore', 'pipe', 'inherit']
+    });
+
+    return new Promise((resolve, reject) => {
+        const timer = setTimeout(() => reject(new Error(`${script} not ready after ${START_TIMEOUT_MS} ms`)), START_TIMEOUT_MS);
+        let buffered = '';
+        child.stdout.on('data', (chunk) => {
+            buffered += chunk;
+            if (ready.test(buffered)) {
+                clearTimeout(timer);
+                buffered = '';
+                child.stdout.removeAllListeners('data');
+                child.stdout.resume();
+                resolve(child);
+            }
+        });
+        child.once('exit', (code) => reject(new Error(`${script} exited with code ${code}`)));
+    });
+}
+
+function get(agent, urlPath) {
+    return new Promise((resolve, reject) => {
+        const req = http.get({ host: '127.0.0.1', port: PORT, path: urlPath, agent }, (res) => {
+            res.resume();
+            res.on('end', () => resolve(res.statusCode));
+        });
+        req.on('error', reject);
+    });
+}
+
+async function load() {
+    const agent = new http.Agent({ keepAlive: true, maxSockets: CONCURRENCY });
+    const latencies = [];
+    let errors = 0;
+    const deadline = Date.now() + DURATION_MS;
+
+    await Promise.all(Array.from({ length: CONCURRENCY }, async (_, i) => {
+        for (let n = i; Date.now() < deadline; n++) {
+            const start = process.hrtime.bigint();
+            try {
+                if ((await get(agent, PATHS[n % PATHS.length])) !== 200) errors++;
+            } catch (err) {
+                errors++;
+            }
+            latencies.push(Number(process.hrtime.bigint() - start) / 1e6);
+        }
+    }));
+    agent.destroy();
+
+    latencies.sort((a, b) => a - b);
+    const at = (p) => latencies[Math.min(latencies.length - 1, Math.floor(p * latencies.length))];
+    return { rps: latencies.length / (DURATION_MS / 1000), p50: at(0.5), p95: at(0.95), errors };
+}
+
+async function stop(child) {
+    const start = Date.now();
+    const exited = new Promise((resolve) => child.once('exit', resolve));
+    child.kill('SIGTERM');
+    await exited;
+    return Date.now() - start;
+}
+
+async function run(label, script, env, ready) {
+    const child = await startServer(script, env, ready);
+    let result;
+    try {
+        result = await load();
+    } catch (err) {
+        await stop(child);
+        throw err;
+    }
+    result.drainMs = await stop(child);
+    console.log(
+        `${label.padEnd(28)} ${result.rps.toFixed(0).padStart(7)} req/s` +
+        `  p50 ${result.p50.toFixed(2).padStart(8)} ms  p95 ${result.p95.toFixed(2).padStart(8)} ms` +
+        `  errors ${result.errors}  drain ${result.drainMs} ms`
+    );
+    return result;
+}
+
+async function main() {
+    const teardown = await connect();
+    try {
+        await fill(Batch, SIZE, makeBatch);
+        await fill(Inspection, SIZE, makeInspection);
+        await Promise.all([Batch.init(), Inspection.init()]);
+
+        const { host, port, name } = mongoose.connection;
+        const env = { MONGODB_URI: process.env.BENCH_MONGODB_URI || `mongodb://${host}:${port}/${name}` };
+
+        console.log(`\n${SIZE} batches and inspections, ${CONCURRENCY} connections, ${DURATION_MS / 1000}s per run`);
+        const single = await run('single process', 'server.js', env, /Server running/);
+        const clustered = await run(`cluster (${WORKERS} workers)`, 'cluster.js', { ...env, WEB_CONCURRENCY: String(WORKERS) }, /workers ready/);
+        console.log(`\ncluster speedup ${(clustered.rps / single.rps).toFixed(2)}x`);
+    } finally {
+        await Promise.all([Batch.deleteMany({}), Inspection.deleteMany({})]);
+        await teardown();
+    }
+}
+
+main().catch((err) => {
+    console.error(err);
+    process.exit(1);
+});
@@ -0,0 +1,78 @@
+const mongoose = require('mongoose');
+require('dotenv').config();
+
+// Connect to BENCH_MONGODB_URI, or to a throwaway in-memory MongoDB when unset
+// (a single-node replica set with replSet: true, for change streams).
+// The in-memory server is not a project dependency; install it for a bench
+// run with `npm install --no-save mongodb-memory-server`.
+// Resolves to a teardown function.
+async function connect({ replSet = false } = {}) {
+    if (process.env.BENCH_MONGODB_URI) {
+        await mongoose.connect(process.env.BENCH_MONGODB_URI);
+        return () => mongoose.disconnect();
+    }
+
+    let memoryServer;
+    try {
+        memoryServer = require('mongodb-memory-server');
+    } catch (err) {
+        if (err.code !== 'MODULE_NOT_FOUND') throw err;
+        throw new Error('Set BENCH_MONGODB_URI, or run `npm install --no-save mongodb-memory-server` for an in-memory MongoDB');
+    }
+    const { MongoMemoryServer, MongoMemoryReplSet } = memoryServer;
+    const server = replSet
+        ? await MongoMemoryReplSet.create({ replSet: { count: 1 } })
+        : await MongoMemoryServer.create();
+    await mongoose.connect(server.getUri());
+
+    return async () => {
+        await mongoose.disconnect();
+        await server.stop();
+    };
+}
+
+// Insert generated documents with raw unordered inserts, bypassing validation
+async function fill(Model, count, makeDoc, chunkSize = 10000) {
+    await Model.deleteMany({});
+    for (let start = 0; start < count; start += chunkSize) {
+        const docs = [];
+        for (let i = start; i < Math.min(start + chunkSize, count); i++) {
+            docs.push(makeDoc(i));
+        }
+        await Model.collection.insertMany(docs, { ordered: false });
+    }
+}
+
+// Time an async function and return latency percentiles in milliseconds
+async function measure(fn, { iterations = 20, warmup = 3 } = {}) {
+    for (let i = 0; i < warmup; i++) {
+        await fn();
+    }
+
+    const samples = [];
+    for (let i = 0; i < iterations; i++) {
+        const start = process.hrtime.bigint();
+        await fn();
+        samples.push(Number(process.hrtime.bigint() - start) / 1e6);
+    }
+
+    samples.sort((a, b) => a - b);
+    const at = (q) => samples[Math.min(samples.length - 1, Math.floor(q * samples.length))];
+
+    return {
+        mean: samples.reduce((sum, s) => sum + s, 0) / samples.length,
+        p50: at(0.5),
+        p95: at(0.95),
+        min: samples[0]
+    };
+}
+
+function report(label, stats) {
+    console.log(
+        `${label.padEnd(40)} mean ${stats.mean.toFixed(2).padStart(9)} ms` +
+        `  p50 ${stats.p50.toFixed(2).padStart(9)} ms` +
+        `  p95 ${stats.p95.toFixed(2).padStart(9)} ms`
+    );
+}
+
+module.exports = { connect, fill, measure, report };
@@ -0,0 +1,110 @@
+// Fan-out latency of the live alert stream: N floor displays subscribe to
+// /api/live/alerts (some filtered by category), alerts are inserted, and the
+// time from insert to receipt is recorded at every subscriber.
+//
+// Runs against an in-memory single-node replica set, since change streams
+// are not available on a standalone server.
+//
+//   npm run bench:live
+const http = require('http');
+const Alert = require('../models/Alert');
+const app = require('../app');
+const { connect } = require('./common');
+
+const SUBSCRIBER_COUNTS = [100, 300, 600];
+const EVENTS = 50;
+const CATEGORIES = ['inventory', 'machine', 'quality'];
+
+function subscribe(port, query, onEvent) {
+    return new Promise((resolve, reject) => {
+        const req = http.get({ port, path: `/api/live/alerts${query}`, agent: false }, (res) => {
+            let buffer = '';
+            res.setEncoding('utf8');
+            res.on('data', (chunk) => {
+                buffer += chunk;
+                let end;
+                while ((end = buffer.indexOf('\n\n')) !== -1) {
+                    const frame = buffer.slice(0, end);
+                    buffer = buffer.slice(end + 2);
+                    const data = frame.split('\n').find((line) => line.startsWith('data: '));
+                    if (data) onEvent(JSON.parse(data.slice(6)));
+                }
+            });
+            resolve(req);
+        });
+        req.on('error', reject);
+    });
+}
+
+function percentile(sorted, q) {
+    return sorted[Math.min(sorted.length - 1, Math.floor(q * sorted.length))];
+}
+
+async function run(port, count) {
+    const latencies = [];
+    const sentAt = new Map();
+    let expected = 0;
+    let received = 0;
+    let done;
+    const finished = new Promise((resolve) => { done = resolve; });
+
+    // A third of the displays watch everything, the rest one category each
+    const filters = Array.from({ length: count }, (_, i) => (i % 3 === 0 ? null : CATEGORIES[i % CATEGORIES.length]));
+    const events = Array.from({ length: EVENTS }, (_, i) => CATEGORIES[i % CATEGORIES.length]);
+    for (const filter of filters) {
+        expected += events.filter((category) => !filter || filter === category).length;
+    }
+
+    const requests = await Promise.all(filters.map((filter) =>
+        subscribe(port, filter ? `?category=${filter}` : '', (event) => {
+            if (event.operation !== 'insert') return;
+            latencies.push(Date.now() - sentAt.get(event.doc.title));
+            if (++received === expected) done();
+        })
+    ));
+
+    // Give the change stream time to open before producing
+    await new Promise((resolve) => setTimeout(resolve, 500));
+
+    const started = Date.now();
+    for (const [i, category] of events.entries()) {
+        const title = `bench-${count}-${i}`;
+        sentAt.set(title, Date.now());
+        await Alert.create({ type: 'warning', category, title, message: 'benchmark' });
+    }
+
+    await Promise.race([finished, new Promise((resolve) => setTimeout(resolve, 30000))]);
+    const elapsed = Date.now() - started;
+    requests.forEach((req) => req.destroy());
+
+    latencies.sort((a, b) => a - b);
+    console.log(
+        `${String(count).padStart(4)} subscribers  delivered ${received}/${expected}` +
+        `  p50 ${percentile(latencies, 0.5)} ms  p95 ${percentile(latencies, 0.95)} ms` +
+        `  p99 ${percentile(latencies, 0.99)} ms  ${Math.round(received / (elapsed / 1000))} events/s`
+    );
+    await new Promise((resolve) => setTimeout(resolve, 500));
+}
+
+async function main() {
+    const teardown = await connect({ replSet: true });
+    const server = http.createServer(app);
+    await new Promise((resolve) => server.listen(0, resolve));
+    const { port } = server.address();
+
+    try {
+        await Alert.deleteMany({});
+        for (const count of SUBSCRIBER_COUNTS) {
+            await run(port, count);
+        }
+    } finally {
+        server.close();
+        await Alert.deleteMany({});
+        await teardown();
+    }
+}
+
+main().catch((err) => {
+    console.error(err);
+    process.exit(1);
+});
@@ -0,0 +1,101 @@
+// Concurrent job assignment: the old findById + save() handler against the
+// conditional Machine.assignJob() update and the multi-machine assignJobs().
+//
+// Several supervisors assign the same idle machine at once. Every "success"
+// beyond the first is a lost update: a job someone was told was assigned and
+// that was silently overwritten.
+//
+//   npm run bench:assign
+const Machine = require('../models/Machine');
+const { connect, fill, measure, report } = require('./common');
+
+const MACHINES = 50;
+const CONTENDERS = 10;
+
+function makeMachine(i) {
+    return {
+        machineId: `SF-${String(i + 1).padStart(3, '0')}`,
+        name: `Softflow ${i + 1}`,
+        status: 'idle',
+        party: '',
+        color: '',
+        lotNo: '',
+        quantity: '',
+        stage: '',
+        efficiency: 0,
+        runtime: '',
+        createdAt: new Date(),
+        updatedAt: new Date()
+    };
+}
+
+function job(n) {
+    return { party: 'Modenik', color: 'Olive', lotNo: `LOT-${n}`, quantity: '500 kg', stage: 'TD Load', efficiency: 0, runtime: 'Just started' };
+}
+
+// The handler recreate_routes.py used to emit
+async function legacyAssign(id, fields) {
+    const machine = await Machine.findById(id);
+    if (!machine) return null;
+    Object.assign(machine, fields, { status: 'running', startTime: new Date() });
+    await machine.save();
+    return machine;
+}
+
+async function legacyComplete(id) {
+    const machine = await Machine.findById(id);
+    if (!machine) return null;
+    Object.assign(machine, { status: 'idle', party: '', color: '', lotNo: '', quantity: '', stage: '', efficiency: 0, runtime: '', startTime: null });
+    await machine.save();
+    return machine;
+}
+
+async function contend(assign) {
+    await fill(Machine, MACHINES, makeMachine);
+    const machines = await Machine.find().select('_id');
+
+    let reported = 0;
+    await Promise.all(machines.flatMap((machine) =>
+        Array.from({ length: CONTENDERS }, async (_, n) => {
+            if (await assign(machine._id, job(n))) reported++;
+        })
+    ));
+    return { reported, lost: reported - machines.length };
+}
+
+async function main() {
+    const teardown = await connect();
+    try {
+        console.log(`${MACHINES} idle machines, ${CONTENDERS} concurrent assignments each\n`);
+        const contenders = [
+            ['legacy findById + save', legacyAssign],
+            ['atomic Machine.assignJob', (id, f) => Machine.assignJob(id, f)],
+            ['atomic Machine.assignJobs', async (id, f) => (await Machine.assignJobs([{ id, job: f }])).updated.length > 0]
+        ];
+        for (const [label, assign] of contenders) {
+            const { reported, lost } = await contend(assign);
+            console.log(`${label.padEnd(40)} reported assigned ${String(reported).padStart(4)}  lost updates ${lost}`);
+        }
+
+        await fill(Machine, 1, makeMachine);
+        const [{ _id: id }] = await Machine.find().select('_id');
+
+        console.log('\nassign + complete cycle on one machine');
+        report('legacy findById + save', await measure(async () => {
+            await legacyAssign(id, job(0));
+            await legacyComplete(id);
+        }, { iterations: 200 }));
+        report('atomic assignJob / completeJob', await measure(async () => {
+            await Machine.assignJob(id, job(0));
+            await Machine.completeJob(id);
+        }, { iterations: 200 }));
+    } finally {
+        await Machine.deleteMany({});
+        await teardown();
+    }
+}
+
+main().catch((err) => {
+    console.error(err);
+    process.exit(1);
+});
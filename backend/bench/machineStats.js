@@ -0,0 +1,66 @@
+// Benchmark GET /api/machines/stats: the old five-query handler against the
+// single-pass Machine.getStats() aggregation.
+//
+//   npm run bench:machines
+const Machine = require('../models/Machine');
+const { connect, fill, measure, report } = require('./common');
+
+const SIZES = [10000, 100000];
+const STATUSES = ['running', 'running', 'running', 'idle', 'maintenance'];
+const STAGES = ['TD Load', 'Dyeing', 'Soap Run', 'Soap Steam', 'Unload'];
+
+function makeMachine(i) {
+    const status = STATUSES[i % STATUSES.length];
+    const running = status === 'running';
+    return {
+        machineId: `SF-${String(i + 1).padStart(6, '0')}`,
+        name: `Softflow ${i + 1}`,
+        status,
+        party: running ? 'Modenik' : '',
+        color: running ? 'Olive' : '',
+        lotNo: running ? String(13000 + i) : '',
+        quantity: running ? `${100 + (i % 450)} kg` : '',
+        stage: running ? STAGES[i % STAGES.length] : '',
+        efficiency: running ? 80 + (i % 20) : 0,
+        runtime: running ? `${i % 9}h ${i % 60}m` : '',
+        createdAt: new Date(),
+        updatedAt: new Date()
+    };
+}
+
+// The handler recreate_routes.py used to emit
+async function legacyStats() {
+    const total = await Machine.countDocuments();
+    const running = await Machine.countDocuments({ status: 'running' });
+    const idle = await Machine.countDocuments({ status: 'idle' });
+    const maintenance = await Machine.countDocuments({ status: 'maintenance' });
+
+    const machines = await Machine.find({ efficiency: { $exists: true, $gt: 0 } });
+    const avgEfficiency = machines.length > 0
+        ? Math.round(machines.reduce((sum, m) => sum + m.efficiency, 0) / machines.length)
+        : 0;
+
+    return { total, running, idle, maintenance, avgEfficiency };
+}
+
+async function main() {
+    const teardown = await connect();
+    try {
+        for (const size of SIZES) {
+            await fill(Machine, size, makeMachine);
+            const iterations = size >= 100000 ? 10 : 30;
+
+            console.log(`\n${size} machines`);
+            report('legacy (4x countDocuments + find)', await measure(legacyStats, { iterations }));
+            report('Machine.getStats() aggregation', await measure(() => Machine.getStats(), { iterations }));
+        }
+    } finally {
+        await Machine.deleteMany({});
+        await teardown();
+    }
+}
+
+main().catch((err) => {
+    console.error(err);
+    process.exit(1);
+});
@@ -0,0 +1,115 @@
+// Cost of the double-booking check (Schedule.findConflicts) as the schedule
+// grows from 1k to 100k slots over 40 machines, next to a full guarded save
+// (booking lease + check + insert) and a plain insert. Then 50 concurrent
+// saves of overlapping slots on one machine, of which exactly one may win.
+//
+//   npm run bench:conflicts
+const Schedule = require('../models/Schedule');
+const BookingLock = require('../models/BookingLock');
+const { plantWallClock } = require('../utils/plantTime');
+const { connect, fill, measure, report } = require('./common');
+
+const SIZES = [1000, 10000, 100000];
+const MACHINES = 40;
+const SLOTS_PER_DAY = 8;
+const SLOT_HOURS = 3;
+const CONCURRENT = 50;
+const HOUR = 60 * 60 * 1000;
+const DAY = 24 * HOUR;
+const FROM = Date.UTC(2025, 0, 6);
+
+const machineOf = (i) => `SF-${String(i + 1).padStart(2, '0')}`;
+
+// Back-to-back 3-hour slots, SLOTS_PER_DAY a day on each machine
+function makeSlot(i) {
+    const machine = i % MACHINES;
+    const n = Math.floor(i / MACHINES);
+    const startAt = new Date(FROM + Math.floor(n / SLOTS_PER_DAY) * DAY + (n % SLOTS_PER_DAY) * SLOT_HOURS * HOUR);
+    return {
+        ...plantWallClock(startAt.getTime()),
+        machine: machineOf(machine),
+        party: 'Modenik',
+        color: 'Olive',
+        lotNo: `L${i}`,
+        quantity: '400 kg',
+        duration: `${SLOT_HOURS}h`,
+        priority: 'medium',
+        status: 'scheduled',
+        startAt,
+        endAt: new Date(startAt.getTime() + SLOT_HOURS * HOUR)
+    };
+}
+
+// A probe in the middle of the filled range: 01:00-02:00 on a day whose
+// slots start at 00:00, so it overlaps exactly one of them
+function middleProbe(size) {
+    const days = Math.ceil(size / MACHINES / SLOTS_PER_DAY);
+    const startAt = new Date(FROM + Math.floor(days / 2) * DAY + HOUR);
+    return { machine: machineOf(0), startAt, endAt: new Date(startAt.getTime() + HOUR) };
+}
+
+let seq = 0;
+function freshSlot(machine, date, time) {
+    seq++;
+    return new Schedule({
+        date, time, machine, party: 'Modenik', color: 'Olive', lotNo: `N${seq}`, quantity: '400 kg', duration: '1h'
+    });
+}
+
+async function concurrentSaves() {
+    // Each slot starts 10 minutes after the previous one, so every pair overlaps
+    const saves = Array.from({ length: CONCURRENT }, (_, i) => {
+        const minutes = i * 10;
+        const time = `${String(Math.floor(minutes / 60) + 12).padStart(2, '0')}:${String(minutes % 60).padStart(2, '0')}`;
+        return freshSlot('SF-99', '2030-01-01', time).save();
+    });
+    const results = await Promise.allSettled(saves);
+
+    const status = (r) => (r.status === 'fulfilled' ? 'saved' : r.reason.status || r.reason.message);
+    const counts = {};
+    for (const r of results) counts[status(r)] = (counts[status(r)] || 0) + 1;
+    const stored = await Schedule.countDocuments({ machine: 'SF-99' });
+
+    console.log(`\n${CONCURRENT} concurrent overlapping saves on one machine: ${JSON.stringify(counts)}, ${stored} stored`);
+    if (stored !== 1) throw new Error(`Expected exactly one stored slot, found ${stored}`);
+}
+
+async function main() {
+    const teardown = await connect();
+    try {
+        await Schedule.init();
+        await BookingLock.init();
+
+        for (const size of SIZES) {
+            await fill(Schedule, size, makeSlot);
+            const probe = middleProbe(size);
+            const free = { ...probe, machine: 'SF-99' };
+            const found = await Schedule.findConflicts(probe);
+
+            console.log(`\n${size} slots over ${MACHINES} machines (${found.length} conflict for the probe)`);
+            report('findConflicts, overlapping slot', await measure(() => Schedule.findConflicts(probe), { iterations: 200 }));
+            report('findConflicts, free machine', await measure(() => Schedule.findConflicts(free), { iterations: 200 }));
+
+            let day = 0;
+            report('guarded save (lease + check + insert)', await measure(() => {
+                const date = new Date(Date.UTC(2031, 0, 1) + day++ * DAY).toISOString().split('T')[0];
+                return freshSlot('SF-98', date, '08:00').save();
+            }, { iterations: 200 }));
+            report('plain insert, no check', await measure(() => {
+                const date = new Date(Date.UTC(2031, 0, 1) + day++ * DAY).toISOString().split('T')[0];
+                return Schedule.collection.insertOne(freshSlot('SF-97', date, '08:00').toObject());
+            }, { iterations: 200 }));
+        }
+
+        await concurrentSaves();
+    } finally {
+        await Schedule.deleteMany({});
+        await BookingLock.deleteMany({});
+        await teardown();
+    }
+}
+
+main().catch((err) => {
+    console.error(err);
+    process.exit(1);
+});
@@ -0,0 +1,69 @@
+// Solve time and packing quality of the schedule optimizer (utils/scheduler.js)
+// for 1k lots over fleets of 8 to 50 machines, with and without maintenance
+// windows. Quality is reported against the trivial makespan lower bound
+// max(total work / machines, longest lot).
+//
+// CPU only - no database is needed.
+//
+//   npm run bench:scheduler
+const { packLots } = require('../utils/scheduler');
+const { measure, report } = require('./common');
+
+const LOTS = 1000;
+const FLEETS = [8, 16, 32, 50];
+const PRIORITIES = ['high', 'medium', 'medium', 'low'];
+const HOUR = 60 * 60 * 1000;
+const FROM = Date.UTC(2025, 11, 15, 6);
+
+function makeLot(i) {
+    // Deterministic spread of 100-550 kg and 3-9 hour lots
+    const kg = 100 + ((i * 37) % 450);
+    const lot = { lotNo: String(13000 + i), party: 'Modenik', color: 'Olive', quantity: `${kg} kg`, priority: PRIORITIES[i % PRIORITIES.length] };
+    if (i % 3 !== 0) lot.duration = `${3 + (i % 7)}h ${(i * 13) % 60}m`;
+    return lot;
+}
+
+function makeFleet(size) {
+    return Array.from({ length: size }, (_, i) => ({
+        machineId: `SF-${String(i + 1).padStart(2, '0')}`,
+        // Some machines are still finishing earlier bookings
+        ready: FROM + (i % 4) * HOUR
+    }));
+}
+
+// One 8-hour window on every fourth machine, a day in
+function makeMaintenance(fleet) {
+    const windows = {};
+    fleet.forEach((machine, i) => {
+        if (i % 4 === 0) windows[machine.machineId] = [{ from: FROM + 24 * HOUR, to: FROM + 32 * HOUR }];
+    });
+    return windows;
+}
+
+async function main() {
+    const lots = Array.from({ length: LOTS }, (_, i) => makeLot(i));
+
+    for (const size of FLEETS) {
+        const fleet = makeFleet(size);
+        console.log(`\n${LOTS} lots over ${size} machines`);
+
+        for (const [label, options] of [['no maintenance', {}], ['with maintenance windows', { maintenance: makeMaintenance(fleet) }]]) {
+            const plan = packLots(lots, fleet, options);
+            const work = plan.assignments.reduce((sum, a) => sum + (a.end - a.start), 0);
+            const longest = Math.max(...plan.assignments.map((a) => a.end - a.start));
+            const bound = FROM + Math.max(work / size, longest);
+
+            report(label, await measure(() => packLots(lots, fleet, options), { iterations: 50, warmup: 5 }));
+            console.log(
+                `${''.padEnd(40)} makespan ${((plan.makespan - FROM) / HOUR).toFixed(1)}h` +
+                `  lower bound ${((bound - FROM) / HOUR).toFixed(1)}h` +
+                `  unassigned ${plan.unassigned.length}`
+            );
+        }
+    }
+}
+
+main().catch((err) => {
+    console.error(err);
+    process.exit(1);
+});
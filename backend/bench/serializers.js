@@ -0,0 +1,137 @@
+// Benchmark the list read path per collection: hydrated documents through
+// res.json(), lean objects through JSON.stringify, and lean objects through
+// the precompiled serializers in utils/serializers.js.
+//
+// CPU only - documents are generated in memory in the shape the driver
+// returns, so no database is needed.
+//
+//   npm run bench:serializers
+const assert = require('assert');
+const mongoose = require('mongoose');
+const Alert = require('../models/Alert');
+const Batch = require('../models/Batch');
+const Inspection = require('../models/Inspection');
+const Inventory = require('../models/Inventory');
+const Machine = require('../models/Machine');
+const Schedule = require('../models/Schedule');
+const { serializer } = require('../utils/serializers');
+const { measure, report } = require('./common');
+
+const PAGE = 500;
+
+function stamps(i) {
+    const createdAt = new Date(Date.UTC(2025, 11, 1) + i * 60000);
+    return { _id: new mongoose.Types.ObjectId(), createdAt, updatedAt: createdAt, __v: 0 };
+}
+
+// Array subdocuments are stored with their own _id
+const sub = (fields) => ({ _id: new mongoose.Types.ObjectId(), ...fields });
+
+const COLLECTIONS = [
+    [Batch, (i) => ({
+        ...stamps(i),
+        batchId: `B-${13000 + i}`,
+        date: '2025-12-01',
+        machine: `SF-${(i % 12) + 1}`,
+        party: 'Modenik',
+        color: 'Olive Green',
+        lotNo: String(13000 + i),
+        quantity: `${100 + (i % 450)} kg`,
+        duration: `${i % 9}h ${i % 60}m`,
+        quantityKg: 100 + (i % 450),
+        durationMinutes: (i % 9) * 60 + (i % 60),
+        status: 'completed',
+        efficiency: 80 + (i % 20),
+        deltaE: 0.4 + (i % 10) / 10,
+        operator: 'Ravi',
+        recipe: {
+            dyes: [sub({ name: 'Reactive Yellow', qty: '1.2%' }), sub({ name: 'Reactive Blue', qty: '0.4%' })],
+            chemicals: [sub({ name: 'Soda Ash', qty: '10 g/l' })]
+        },
+        stages: [sub({ name: 'Dyeing', duration: '2h', temp: '60°C' }), sub({ name: 'Soap Run', duration: '40m', temp: '90°C' })]
+    })],
+    [Schedule, (i) => ({
+        ...stamps(i),
+        date: '2025-12-01',
+        time: `${String(i % 24).padStart(2, '0')}:00`,
+        machine: `SF-${(i % 12) + 1}`,
+        party: 'Modenik',
+        color: 'Olive Green',
+        lotNo: String(13000 + i),
+        quantity: `${100 + (i % 450)} kg`,
+        duration: '6h',
+        priority: 'medium',
+        status: 'scheduled'
+    })],
+    [Inventory, (i) => ({
+        ...stamps(i),
+        name: `Reactive Dye ${i}`,
+        category: i % 2 ? 'Dye' : 'Chemical',
+        stock: i % 500,
+        minThreshold: 100,
+        maxCapacity: 500,
+        weeklyUsage: { sun: 4, mon: 12, tue: 9, wed: 11, thu: 8, fri: 10 },
+        status: 'ok',
+        stockLevel: Math.round(((i % 500) / 500) * 100)
+    })],
+    [Machine, (i) => ({
+        ...stamps(i),
+        machineId: `SF-${String(i + 1).padStart(6, '0')}`,
+        name: `Softflow ${i + 1}`,
+        status: 'running',
+        party: 'Modenik',
+        color: 'Olive',
+        lotNo: String(13000 + i),
+        quantity: `${100 + (i % 450)} kg`,
+        stage: 'Dyeing',
+        efficiency: 80 + (i % 20),
+        runtime: `${i % 9}h ${i % 60}m`,
+        startTime: new Date(Date.UTC(2025, 11, 1))
+    })],
+    [Inspection, (i) => ({
+        ...stamps(i),
+        date: '2025-12-01',
+        color: 'Olive Green',
+        client: 'Modenik',
+        lotNo: String(13000 + i),
+        deltaE: 0.4 + (i % 10) / 10,
+        status: 'approved',
+        notes: ''
+    })],
+    [Alert, (i) => ({
+        ...stamps(i),
+        type: 'warning',
+        category: 'inventory',
+        title: 'Low stock',
+        message: `Reactive Dye ${i} is below its minimum threshold`,
+        read: false,
+        actionable: true,
+        relatedId: String(i)
+    })]
+];
+
+async function main() {
+    for (const [Model, makeDoc] of COLLECTIONS) {
+        const docs = Array.from({ length: PAGE }, (_, i) => makeDoc(i));
+        const { many } = serializer(Model);
+
+        // find() hydrates every document, res.json() calls toJSON() on each
+        const hydrated = () => JSON.stringify(docs.map((doc) => Model.hydrate(doc)));
+        const lean = () => JSON.stringify(docs);
+        const precompiled = () => many(docs);
+
+        assert.deepStrictEqual(JSON.parse(precompiled()), JSON.parse(hydrated()));
+
+        console.log(`\n${Model.collection.collectionName} (${PAGE} documents per page)`);
+        for (const [label, fn] of [['hydrated + res.json', hydrated], ['lean + JSON.stringify', lean], ['lean + precompiled', precompiled]]) {
+            const stats = await measure(fn, { iterations: 200, warmup: 20 });
+            report(label, stats);
+            console.log(`${''.padEnd(40)} ${Math.round((PAGE / stats.mean) * 1000).toLocaleString()} docs/s`);
+        }
+    }
+}
+
+main().catch((err) => {
+    console.error(err);
+    process.exit(1);
+});
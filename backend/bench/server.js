@@ -0,0 +1,39 @@
+// The backend on a throwaway in-memory MongoDB (or BENCH_MONGODB_URI), for the
+// load-test harness (load_test.py at the repo root). Indexes are built before
+// it reports ready, with one JSON line on stdout:
+//
+//   {"ready":true,"port":5055,"mongodbUri":"mongodb://127.0.0.1:39117/test"}
+//
+// SIGINT / SIGTERM close the server and stop the database.
+//
+//   npm run bench:server
+const mongoose = require('mongoose');
+const app = require('../app');
+const { connect } = require('./common');
+
+const PORT = parseInt(process.env.BENCH_PORT, 10) || 5055;
+
+async function main() {
+    const teardown = await connect();
+    await Promise.all(mongoose.modelNames().map((name) => mongoose.model(name).init()));
+
+    const { host, port, name } = mongoose.connection;
+    const mongodbUri = process.env.BENCH_MONGODB_URI || `mongodb://${host}:${port}/${name}`;
+
+    const server = app.listen(PORT, () => {
+        console.log(JSON.stringify({ ready: true, port: server.address().port, mongodbUri }));
+    });
+
+    const shutdown = () => {
+        server.close();
+        server.closeAllConnections();
+        teardown().then(() => process.exit(0), () => process.exit(1));
+    };
+    process.once('SIGINT', shutdown);
+    process.once('SIGTERM', shutdown);
+}
+
+main().catch((err) => {
+    console.error(err);
+    process.exit(1);
+});
@@ -0,0 +1,81 @@
+// Telemetry ingest throughput and downsampled chart reads: a 12-hour dye
+// cycle for eight machines at one sample per second (345,600 samples in the
+// time-series collection), ingested in request-sized batches through
+// Telemetry.ingest, then read back as one chart screen at several resolutions.
+//
+//   npm run bench:telemetry
+const Telemetry = require('../models/Telemetry');
+const { connect, measure, report } = require('./common');
+
+const MACHINES = Array.from({ length: 8 }, (_, i) => `SF-${String(i + 1).padStart(2, '0')}`);
+const HOURS = 12;
+const SAMPLE_MS = 1000;
+const BATCH = 5000;
+const STAGES = ['TD Load', 'Scouring', 'Dyeing', 'Washing', 'Soaping', 'Unload'];
+
+const end = new Date();
+const start = new Date(end.getTime() - HOURS * 60 * 60 * 1000);
+
+function makeSample(machine, i) {
+    const t = i * SAMPLE_MS;
+    const progress = t / (end - start);
+    return {
+        machineId: MACHINES[machine],
+        at: new Date(start.getTime() + t),
+        temperature: 30 + 100 * Math.sin(Math.PI * progress) + machine + (i % 7) / 10,
+        stage: STAGES[Math.min(STAGES.length - 1, Math.floor(progress * STAGES.length))],
+        flow: 180 + (i % 40) - machine * 5
+    };
+}
+
+async function ingest() {
+    const perMachine = (end - start) / SAMPLE_MS;
+    const total = perMachine * MACHINES.length;
+    const started = process.hrtime.bigint();
+
+    // Interleaved across machines, as controllers report concurrently
+    let batch = [];
+    for (let i = 0; i < perMachine; i++) {
+        for (let machine = 0; machine < MACHINES.length; machine++) {
+            batch.push(makeSample(machine, i));
+        }
+        if (batch.length >= BATCH) {
+            await Telemetry.ingest(batch);
+            batch = [];
+        }
+    }
+    if (batch.length > 0) await Telemetry.ingest(batch);
+
+    const seconds = Number(process.hrtime.bigint() - started) / 1e9;
+    console.log(`ingest ${total} samples in batches of ${BATCH}: ${seconds.toFixed(1)} s, ${(total / seconds).toFixed(0)} samples/s`);
+}
+
+async function main() {
+    const teardown = await connect();
+    try {
+        await Telemetry.init();
+        await Telemetry.deleteMany({});
+        await ingest();
+
+        const range = { machines: MACHINES.join(','), from: start.toISOString(), to: end.toISOString() };
+        console.log(`\n${MACHINES.length} machines, ${HOURS}h window`);
+        for (const points of [100, 300, 1000]) {
+            const series = await Telemetry.series({ ...range, points });
+            const returned = series.machines.reduce((sum, m) => sum + m.points.length, 0);
+            report(`series points=${points} (${returned} points)`, await measure(() => Telemetry.series({ ...range, points }), { iterations: 10 }));
+        }
+        report('series one machine, last hour', await measure(() => Telemetry.series({
+            machines: MACHINES[0],
+            from: new Date(end.getTime() - 60 * 60 * 1000).toISOString(),
+            to: end.toISOString()
+        })));
+    } finally {
+        await Telemetry.deleteMany({});
+        await teardown();
+    }
+}
+
+main().catch((err) => {
+    console.error(err);
+    process.exit(1);
+});
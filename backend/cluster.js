@@ -0,0 +1,122 @@
+// Cluster mode: one server.js worker per core sharing the port.
+//
+//   WEB_CONCURRENCY       workers (default: available cores)
+//   MONGODB_POOL_SIZE     MongoDB connections per worker (see server.js)
+//
+// Each worker only starts listening once its pool is warm. The primary relays
+// response-cache invalidations between workers (middleware/cache.js), gathers
+// every worker's counters for /metrics and the stats endpoints
+// (middleware/clusterStats.js), and restarts workers that die. SIGHUP replaces the workers one at a time, each
+// old worker draining only once its successor is ready; SIGTERM / SIGINT
+// drain them all and exit.
+//
+//   npm run start:cluster
+const cluster = require('cluster');
+const os = require('os');
+const path = require('path');
+require('dotenv').config();
+
+const { INVALIDATE_MESSAGE } = require('./middleware/cache');
+const { gatherSnapshots } = require('./middleware/clusterStats');
+
+const WORKERS = parseInt(process.env.WEB_CONCURRENCY, 10) || os.availableParallelism();
+
+// Pause before replacing a worker that died, so a crash loop does not spin
+const RESTART_DELAY_MS = 1000;
+
+cluster.setupPrimary({ exec: path.join(__dirname, 'server.js') });
+
+// Workers asked to drain, whose exit is expected
+const retiring = new Set();
+let shuttingDown = false;
+let restarting = false;
+
+// Cache invalidations from one worker reach every other worker
+function relay(from, message) {
+    if (!message || message.type !== INVALIDATE_MESSAGE) return;
+    for (const worker of Object.values(cluster.workers)) {
+        // A worker that is going away may have closed its channel already
+        if (worker !== from && worker.isConnected()) worker.send(message, () => {});
+    }
+}
+
+function fork() {
+    const worker = cluster.fork();
+    worker.on('message', (message) => relay(worker, message));
+    worker.on('message', (message) => gatherSnapshots(Object.values(cluster.workers), worker, message));
+    return worker;
+}
+
+function whenReady(worker) {
+    return new Promise((resolve, reject) => {
+        const onMessage = (message) => {
+            if (!message || message.type !== 'ready') return;
+            worker.off('message', onMessage);
+            worker.off('exit', onExit);
+            resolve(worker);
+        };
+        const onExit = (code) => reject(new Error(`worker ${worker.process.pid} exited with code ${code} before it was ready`));
+        worker.on('message', onMessage);
+        worker.once('exit', onExit);
+    });
+}
+
+function retire(worker) {
+    retiring.add(worker.id);
+    const exited = new Promise((resolve) => worker.once('exit', resolve));
+    const terminate = () => worker.process.kill('SIGTERM');
+    if (worker.isConnected()) {
+        worker.send({ type: 'shutdown' }, (err) => err && terminate());
+    } else {
+        terminate();
+    }
+    return exited;
+}
+
+// Replace the workers one at a time, so the port is never left unserved
+async function rollingRestart() {
+    if (restarting || shuttingDown) return;
+    restarting = true;
+    console.log('🔄 Rolling restart');
+    try {
+        for (const worker of Object.values(cluster.workers)) {
+            if (retiring.has(worker.id)) continue;
+            await whenReady(fork());
+            await retire(worker);
+        }
+        console.log(`✅ ${Object.keys(cluster.workers).length} workers replaced`);
+    } catch (err) {
+        console.error('❌ Rolling restart stopped:', err.message);
+    } finally {
+        restarting = false;
+    }
+}
+
+async function shutdown() {
+    if (shuttingDown) return;
+    shuttingDown = true;
+    console.log('⏳ Draining workers');
+    await Promise.all(Object.values(cluster.workers).map(retire));
+    process.exit(0);
+}
+
+cluster.on('exit', (worker, code, signal) => {
+    if (retiring.delete(worker.id) || shuttingDown) return;
+    console.error(`❌ Worker ${worker.process.pid} died (${signal || code}), restarting`);
+    setTimeout(() => {
+        if (!shuttingDown) fork();
+    }, RESTART_DELAY_MS);
+});
+
+process.on('SIGHUP', rollingRestart);
+process.on('SIGTERM', shutdown);
+process.on('SIGINT', shutdown);
+
+console.log(`🧵 Starting ${WORKERS} workers (primary pid ${process.pid})`);
+Promise.all(Array.from({ length: WORKERS }, () => whenReady(fork()))).then(
+    () => console.log(`✅ ${WORKERS} workers ready`),
+    (err) => {
+        console.error('❌ Cluster start failed:', err.message);
+        shutdown();
+    }
+);
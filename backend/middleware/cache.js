@@ -0,0 +1,161 @@
+// In-process response cache for hot read endpoints.
+//
+// Entries are tagged with the collections they were computed from. Every
+// successful POST/PUT/PATCH/DELETE on a router wrapped with invalidateOnWrite()
+// drops the entries carrying that collection's tag. Entries hold the
+// serialized body along with its compressed variants (middleware/compress.js).
+//
+// In cluster mode (cluster.js) every worker has its own cache, so each
+// invalidation is also sent to the primary, which relays it to the others.
+const cluster = require('cluster');
+const { createPayload, sendPayload } = require('./compress');
+
+class ResponseCache {
+    constructor({ maxEntries, ttlMs }) {
+        this.maxEntries = maxEntries;
+        this.ttlMs = ttlMs;
+        this.entries = new Map();
+        this.generations = new Map();
+        this.hits = 0;
+        this.misses = 0;
+        this.evictions = 0;
+        this.invalidations = 0;
+    }
+
+    get(key) {
+        const entry = this.entries.get(key);
+        if (!entry || entry.expires <= Date.now()) {
+            if (entry) this.entries.delete(key);
+            this.misses++;
+            return undefined;
+        }
+
+        // Map preserves insertion order; re-inserting marks the entry most recently used
+        this.entries.delete(key);
+        this.entries.set(key, entry);
+        this.hits++;
+        return entry.value;
+    }
+
+    set(key, value, tags) {
+        this.entries.delete(key);
+        this.entries.set(key, { value, tags, expires: Date.now() + this.ttlMs });
+
+        while (this.entries.size > this.maxEntries) {
+            this.entries.delete(this.entries.keys().next().value);
+            this.evictions++;
+        }
+    }
+
+    // Write counter per tag, used to refuse results computed before a write
+    generation(tags) {
+        return tags.map((tag) => this.generations.get(tag) || 0).join(':');
+    }
+
+    invalidate(tag) {
+        this.generations.set(tag, (this.generations.get(tag) || 0) + 1);
+        for (const [key, entry] of this.entries) {
+            if (entry.tags.includes(tag)) {
+                this.entries.delete(key);
+                this.invalidations++;
+            }
+        }
+    }
+
+    clear() {
+        this.entries.clear();
+    }
+
+    stats() {
+        const lookups = this.hits + this.misses;
+        return {
+            size: this.entries.size,
+            maxEntries: this.maxEntries,
+            ttlMs: this.ttlMs,
+            hits: this.hits,
+            misses: this.misses,
+            hitRate: lookups > 0 ? Math.round((this.hits / lookups) * 100) : 0,
+            evictions: this.evictions,
+            invalidations: this.invalidations
+        };
+    }
+}
+
+const cache = new ResponseCache({
+    maxEntries: parseInt(process.env.RESPONSE_CACHE_MAX_ENTRIES, 10) || 500,
+    ttlMs: parseInt(process.env.RESPONSE_CACHE_TTL_MS, 10) || 30000
+});
+
+// Cluster-wide totals from each worker's cache.stats()
+function totalStats(all) {
+    const sum = (field) => all.reduce((total, stats) => total + stats[field], 0);
+    const hits = sum('hits');
+    const lookups = hits + sum('misses');
+    return {
+        workers: all.length,
+        size: sum('size'),
+        maxEntries: cache.maxEntries,
+        ttlMs: cache.ttlMs,
+        hits,
+        misses: sum('misses'),
+        hitRate: lookups > 0 ? Math.round((hits / lookups) * 100) : 0,
+        evictions: sum('evictions'),
+        invalidations: sum('invalidations')
+    };
+}
+
+const INVALIDATE_MESSAGE = 'cache:invalidate';
+
+// Drop a tag's entries here and in every other worker
+function invalidate(tag) {
+    cache.invalidate(tag);
+    if (cluster.isWorker && process.connected) process.send({ type: INVALIDATE_MESSAGE, tag });
+}
+
+if (cluster.isWorker) {
+    process.on('message', (message) => {
+        if (message && message.type === INVALIDATE_MESSAGE) cache.invalidate(message.tag);
+    });
+}
+
+// Serve GET responses from the cache, keyed by URL and tagged with the
+// collections they depend on
+function cached(...tags) {
+    return (req, res, next) => {
+        const key = req.originalUrl;
+        const hit = cache.get(key);
+        if (hit !== undefined) {
+            res.set('X-Cache', 'HIT');
+            return sendPayload(req, res, hit);
+        }
+
+        const generation = cache.generation(tags);
+        res.json = (body) => {
+            const payload = createPayload(body);
+            // Skip storing if a write to any tag landed while this was computed
+            if (res.statusCode < 300 && cache.generation(tags) === generation) {
+                cache.set(key, payload, tags);
+            }
+            sendPayload(req, res, payload);
+            return res;
+        };
+
+        res.set('X-Cache', 'MISS');
+        next();
+    };
+}
+
+// Router-level middleware: invalidate the collection's cached responses
+// once a write handler has succeeded
+function invalidateOnWrite(tag) {
+    return (req, res, next) => {
+        if (req.method !== 'GET' && req.method !== 'HEAD') {
+            res.on('finish', () => {
+                if (res.statusCode < 400) invalidate(tag);
+            });
+        }
+        next();
+    };
+}
+
+module.exports = { cache, cached, invalidate, invalidateOnWrite, totalStats, INVALIDATE_MESSAGE };
@@ -0,0 +1,98 @@
+// Cluster-wide snapshots for /metrics, /api/cache/stats and
+// /api/compression/stats.
+//
+// In cluster mode (cluster.js) every worker keeps its own timings, cache and
+// compression counters, and a request reaches whichever worker accepts it.
+// collectSnapshots() asks the primary for every worker's snapshot, so those
+// endpoints report the whole cluster on any worker. Outside cluster mode it
+// returns this process's snapshot alone. A worker that does not answer within
+// CLUSTER_STATS_TIMEOUT_MS is left out of the totals rather than holding up
+// the scrape.
+const cluster = require('cluster');
+
+const TIMEOUT_MS = parseInt(process.env.CLUSTER_STATS_TIMEOUT_MS, 10) || 1000;
+
+// worker -> primary: gather every worker's snapshot for me
+const COLLECT_MESSAGE = 'stats:collect';
+// primary -> worker: send your snapshot; worker -> primary: here it is
+const REPORT_MESSAGE = 'stats:report';
+const SNAPSHOT_MESSAGE = 'stats:snapshot';
+// primary -> worker: the snapshots gathered for your collect
+const RESULT_MESSAGE = 'stats:result';
+
+let takeSnapshot = () => ({});
+const pending = new Map();
+let nextId = 0;
+
+// Register the function that produces this process's snapshot
+function provideSnapshot(fn) {
+    takeSnapshot = fn;
+}
+
+// Snapshots of every worker (or of this process outside cluster mode)
+function collectSnapshots() {
+    const local = takeSnapshot();
+    if (!cluster.isWorker || !process.connected) return Promise.resolve([local]);
+
+    const id = `${process.pid}:${++nextId}`;
+    return new Promise((resolve) => {
+        const settle = (snapshots) => {
+            if (!pending.has(id)) return;
+            pending.delete(id);
+            clearTimeout(timer);
+            resolve(snapshots);
+        };
+        // The primary answers within TIMEOUT_MS; this only covers a lost reply
+        const timer = setTimeout(() => settle([local]), TIMEOUT_MS * 2);
+        pending.set(id, settle);
+        process.send({ type: COLLECT_MESSAGE, id }, (err) => err && settle([local]));
+    });
+}
+
+if (cluster.isWorker) {
+    process.on('message', (message) => {
+        if (!message) return;
+        if (message.type === REPORT_MESSAGE && process.connected) {
+            process.send({ type: SNAPSHOT_MESSAGE, id: message.id, snapshot: takeSnapshot() }, () => {});
+        } else if (message.type === RESULT_MESSAGE && pending.has(message.id)) {
+            pending.get(message.id)(message.snapshots);
+        }
+    });
+}
+
+// Primary side: on a worker's collect, ask every connected worker for its
+// snapshot and answer with those that arrive within TIMEOUT_MS
+function gatherSnapshots(workers, from, message) {
+    if (!message || message.type !== COLLECT_MESSAGE) return;
+
+    const targets = workers.filter((worker) => worker.isConnected());
+    const snapshots = [];
+    const answered = new Set();
+    let done = false;
+
+    const finish = () => {
+        if (done) return;
+        done = true;
+        clearTimeout(timer);
+        for (const { worker, listener } of listeners) worker.off('message', listener);
+        if (from.isConnected()) from.send({ type: RESULT_MESSAGE, id: message.id, snapshots }, () => {});
+    };
+    const timer = setTimeout(finish, TIMEOUT_MS);
+
+    const listeners = targets.map((worker) => {
+        const listener = (reply) => {
+            if (!reply || reply.type !== SNAPSHOT_MESSAGE || reply.id !== message.id) return;
+            if (answered.has(worker.id)) return;
+            answered.add(worker.id);
+            snapshots.push(reply.snapshot);
+            if (answered.size === targets.length) finish();
+        };
+        worker.on('message', listener);
+        return { worker, listener };
+    });
+
+    if (targets.length === 0) return finish();
+    for (const worker of targets) worker.send({ type: REPORT_MESSAGE, id: message.id }, () => {});
+}
+
+module.exports = { provideSnapshot, collectSnapshots, gatherSnapshots };
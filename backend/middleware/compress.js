@@ -0,0 +1,160 @@
+// Negotiated gzip / brotli compression for JSON and text responses.
+//
+// compress() hooks res.send, so it covers res.json() and sendJson() but not
+// streamed responses written with res.write (SSE feeds, exports), which go
+// out unbuffered as before. Bodies under the size threshold are sent as-is.
+//
+// Cached responses (middleware/cache.js) are stored as payloads that keep
+// their compressed variants, so a hot endpoint is compressed once per
+// encoding rather than on every hit.
+const zlib = require('zlib');
+const { promisify } = require('util');
+
+const THRESHOLD_BYTES = parseInt(process.env.COMPRESSION_THRESHOLD_BYTES, 10) || 1024;
+
+// Brotli's default quality (11) is meant for static assets; 4 compresses
+// about as well as gzip -6 at a fraction of the CPU time
+const BROTLI_QUALITY = parseInt(process.env.COMPRESSION_BROTLI_QUALITY, 10) || 4;
+
+const COMPRESSIBLE = /json|text|javascript|xml/i;
+
+// res.send as it was before compress() wrapped it
+const rawSend = Symbol('rawSend');
+
+const encoders = {
+    br: promisify(zlib.brotliCompress),
+    gzip: promisify(zlib.gzip)
+};
+
+const encoderOptions = {
+    br: { params: { [zlib.constants.BROTLI_PARAM_QUALITY]: BROTLI_QUALITY } },
+    gzip: {}
+};
+
+const counters = {
+    compressed: 0,
+    precompressed: 0,
+    uncompressed: 0,
+    bytesIn: 0,
+    bytesOut: 0,
+    compressionMs: 0
+};
+
+// Encoding to use for a body of the given size, or null to send it as-is
+function negotiate(req, res, size) {
+    if (req.method === 'HEAD' || res.statusCode === 204 || res.statusCode === 304) return null;
+    if (res.get('Content-Encoding') || size < THRESHOLD_BYTES) return null;
+    if (!COMPRESSIBLE.test(res.get('Content-Type') || '')) return null;
+
+    res.vary('Accept-Encoding');
+    return req.acceptsEncodings('br', 'gzip') || null;
+}
+
+async function encode(body, encoding) {
+    const start = process.hrtime.bigint();
+    const compressed = await encoders[encoding](body, encoderOptions[encoding]);
+    counters.compressionMs += Number(process.hrtime.bigint() - start) / 1e6;
+    counters.compressed++;
+    return compressed;
+}
+
+function sendEncoded(res, send, body, compressed, encoding) {
+    counters.bytesIn += body.length;
+    counters.bytesOut += compressed.length;
+    res.set('Content-Encoding', encoding);
+    return send.call(res, compressed);
+}
+
+function compress() {
+    return (req, res, next) => {
+        const send = res.send;
+        res[rawSend] = send;
+
+        res.send = function (body) {
+            if (typeof body !== 'string' && !Buffer.isBuffer(body)) return send.call(this, body);
+
+            const buffer = Buffer.from(body);
+            const encoding = negotiate(req, this, buffer.length);
+            if (!encoding) {
+                counters.uncompressed++;
+                return send.call(this, body);
+            }
+
+            encode(buffer, encoding).then(
+                (compressed) => sendEncoded(this, send, buffer, compressed, encoding),
+                () => send.call(this, body)
+            );
+            return this;
+        };
+
+        next();
+    };
+}
+
+// A serialized JSON body that remembers its compressed variants
+function createPayload(body) {
+    return { body: Buffer.from(JSON.stringify(body)), variants: {} };
+}
+
+// Send a payload, compressing it at most once per encoding
+async function sendPayload(req, res, payload) {
+    const send = res[rawSend] || res.send;
+    res.type('json');
+
+    const encoding = negotiate(req, res, payload.body.length);
+    if (!encoding) {
+        counters.uncompressed++;
+        return send.call(res, payload.body);
+    }
+
+    const stored = payload.variants[encoding] !== undefined;
+    if (!stored) payload.variants[encoding] = encode(payload.body, encoding);
+
+    let compressed;
+    try {
+        compressed = await payload.variants[encoding];
+    } catch (error) {
+        delete payload.variants[encoding];
+        return send.call(res, payload.body);
+    }
+
+    if (stored) counters.precompressed++;
+    return sendEncoded(res, send, payload.body, compressed, encoding);
+}
+
+function compressionStats() {
+    return {
+        thresholdBytes: THRESHOLD_BYTES,
+        brotliQuality: BROTLI_QUALITY,
+        compressed: counters.compressed,
+        precompressed: counters.precompressed,
+        uncompressed: counters.uncompressed,
+        bytesIn: counters.bytesIn,
+        bytesOut: counters.bytesOut,
+        bytesSaved: counters.bytesIn - counters.bytesOut,
+        ratio: counters.bytesIn > 0 ? Number((counters.bytesOut / counters.bytesIn).toFixed(3)) : 0,
+        compressionMs: Math.round(counters.compressionMs)
+    };
+}
+
+// Cluster-wide totals from each worker's compressionStats()
+function totalCompressionStats(all) {
+    const sum = (field) => all.reduce((total, stats) => total + stats[field], 0);
+    const bytesIn = sum('bytesIn');
+    const bytesOut = sum('bytesOut');
+    return {
+        workers: all.length,
+        thresholdBytes: THRESHOLD_BYTES,
+        brotliQuality: BROTLI_QUALITY,
+        compressed: sum('compressed'),
+        precompressed: sum('precompressed'),
+        uncompressed: sum('uncompressed'),
+        bytesIn,
+        bytesOut,
+        bytesSaved: bytesIn - bytesOut,
+        ratio: bytesIn > 0 ? Number((bytesOut / bytesIn).toFixed(3)) : 0,
+        compressionMs: sum('compressionMs')
+    };
+}
+
+module.exports = { compress, createPayload, sendPayload, compressionStats, totalCompressionStats };
@@ -0,0 +1,301 @@
+// Request and database timing in the Prometheus text format (GET /metrics).
+//
+// metrics() times every request into a latency histogram labelled with the
+// route pattern that handled it ("/api/batches/:id", never the raw URL) and
+// keeps an in-flight gauge per route module. Modules come from the fixed list
+// passed to metrics() (the routers app.js mounts under /api); any other path,
+// including 404s, is counted as "unmatched" so clients cannot create new
+// series by requesting made-up URLs. The request is carried in an
+// AsyncLocalStorage context, so Mongoose queries, aggregations and writes can
+// be timed and attributed to the route that issued them; work done outside a
+// request (alert generation timers, change streams) is labelled "background".
+// Cursors are not covered: they stream outside Query#exec. Direct driver
+// calls (Model.collection.*) bypass Mongoose entirely and are only timed when
+// made through timeDriverCall. Slow queries are also handed to
+// utils/slowQueries.js.
+//
+// In cluster mode the scrape and the cache / compression stats endpoints sum
+// every worker's series (middleware/clusterStats.js), so one scrape through
+// the shared port covers the whole cluster.
+const { AsyncLocalStorage } = require('async_hooks');
+const mongoose = require('mongoose');
+const { cache, totalStats } = require('./cache');
+const { compressionStats, totalCompressionStats } = require('./compress');
+const { provideSnapshot, collectSnapshots } = require('./clusterStats');
+const { recordSlowQuery } = require('../utils/slowQueries');
+
+// Seconds; from cache hits well under a millisecond up to slow exports
+const BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10];
+
+const requestContext = new AsyncLocalStorage();
+
+const escape = (value) => String(value).replace(/\\/g, '\\\\').replace(/"/g, '\\"').replace(/\n/g, '\\n');
+
+function formatLabels(names, values, extra = '') {
+    const pairs = names.map((name, i) => `${name}="${escape(values[i])}"`);
+    if (extra) pairs.push(extra);
+    return pairs.length > 0 ? `{${pairs.join(',')}}` : '';
+}
+
+class Histogram {
+    constructor(name, help, labelNames, buckets = BUCKETS) {
+        this.name = name;
+        this.help = help;
+        this.labelNames = labelNames;
+        this.buckets = buckets;
+        this.series = new Map();
+    }
+
+    observe(labels, seconds) {
+        const key = labels.join('\u0000');
+        let series = this.series.get(key);
+        if (!series) {
+            series = { labels, counts: new Array(this.buckets.length).fill(0), sum: 0, count: 0 };
+            this.series.set(key, series);
+        }
+        // Counts per bucket are cumulated when rendered
+        const index = this.buckets.findIndex((bound) => seconds <= bound);
+        if (index !== -1) series.counts[index]++;
+        series.sum += seconds;
+        series.count++;
+    }
+
+    snapshot() {
+        return [...this.series.values()];
+    }
+
+    // Render the given snapshots (one per worker), summing matching series
+    render(snapshots = [this.snapshot()]) {
+        const merged = new Map();
+        for (const series of snapshots.flat()) {
+            const key = series.labels.join('\u0000');
+            const into = merged.get(key);
+            if (!into) {
+                merged.set(key, { ...series, counts: [...series.counts] });
+                continue;
+            }
+            series.counts.forEach((n, i) => { into.counts[i] += n; });
+            into.sum += series.sum;
+            into.count += series.count;
+        }
+
+        const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} histogram`];
+        for (const { labels, counts, sum, count } of merged.values()) {
+            let cumulative = 0;
+            this.buckets.forEach((bound, i) => {
+                cumulative += counts[i];
+                lines.push(`${this.name}_bucket${formatLabels(this.labelNames, labels, `le="${bound}"`)} ${cumulative}`);
+            });
+            lines.push(`${this.name}_bucket${formatLabels(this.labelNames, labels, 'le="+Inf"')} ${count}`);
+            lines.push(`${this.name}_sum${formatLabels(this.labelNames, labels)} ${sum}`);
+            lines.push(`${this.name}_count${formatLabels(this.labelNames, labels)} ${count}`);
+        }
+        return lines.join('\n');
+    }
+}
+
+class Gauge {
+    constructor(name, help, labelNames) {
+        this.name = name;
+        this.help = help;
+        this.labelNames = labelNames;
+        this.values = new Map();
+    }
+
+    inc(labels, by = 1) {
+        const key = labels.join('\u0000');
+        const current = this.values.get(key);
+        this.values.set(key, { labels, value: (current ? current.value : 0) + by });
+    }
+
+    dec(labels) {
+        this.inc(labels, -1);
+    }
+
+    snapshot() {
+        return [...this.values.values()];
+    }
+
+    // Render the given snapshots (one per worker), summing matching values
+    render(snapshots = [this.snapshot()]) {
+        const merged = new Map();
+        for (const { labels, value } of snapshots.flat()) {
+            const key = labels.join('\u0000');
+            const into = merged.get(key);
+            merged.set(key, { labels, value: (into ? into.value : 0) + value });
+        }
+
+        const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} gauge`];
+        for (const { labels, value } of merged.values()) {
+            lines.push(`${this.name}${formatLabels(this.labelNames, labels)} ${value}`);
+        }
+        return lines.join('\n');
+    }
+}
+
+const requestDuration = new Histogram(
+    'http_request_duration_seconds',
+    'Time from request start to response finish, by route pattern',
+    ['method', 'route', 'status']
+);
+const requestsInFlight = new Gauge(
+    'http_requests_in_flight',
+    'Requests currently being handled, by route module',
+    ['module']
+);
+const queryDuration = new Histogram(
+    'mongoose_query_duration_seconds',
+    'Time of each Mongoose query, aggregation or write, by the route that issued it',
+    ['module', 'route', 'model', 'op']
+);
+
+// "/api/batches/stats" -> "batches" when batches is a known module; "/" and
+// "/metrics" by name; anything else "unmatched"
+function moduleOf(path, modules) {
+    const [first, second] = path.split('/').filter(Boolean);
+    if (!first) return 'root';
+    if (first === 'metrics' && !second) return 'metrics';
+    if (first === 'api' && modules.has(second)) return second;
+    return 'unmatched';
+}
+
+// Route pattern that matched, known once the router has dispatched
+function routeOf(req) {
+    if (!req.route) return 'unmatched';
+    const path = req.route.path === '/' ? '' : req.route.path;
+    return `${req.baseUrl}${path}` || '/';
+}
+
+// modules: the route modules mounted at /api/<name>
+function metrics({ modules = [] } = {}) {
+    const known = new Set(modules);
+    return (req, res, next) => {
+        const start = process.hrtime.bigint();
+        const module = moduleOf(req.path, known);
+        requestsInFlight.inc([module]);
+
+        let done = false;
+        const finish = () => {
+            if (done) return;
+            done = true;
+            requestsInFlight.dec([module]);
+            requestDuration.observe(
+                [req.method, routeOf(req), res.statusCode],
+                Number(process.hrtime.bigint() - start) / 1e9
+            );
+        };
+        res.on('finish', finish);
+        res.on('close', finish);
+
+        requestContext.run({ req, module }, next);
+    };
+}
+
+function observeQuery(target, Model, op, start) {
+    const ms = Number(process.hrtime.bigint() - start) / 1e6;
+    const context = requestContext.getStore();
+    const module = context ? context.module : 'background';
+    const route = context ? routeOf(context.req) : 'background';
+    const model = Model ? Model.modelName : 'unknown';
+
+    queryDuration.observe([module, route, model, op], ms / 1000);
+    recordSlowQuery({ target, Model, model, op, ms, module, route });
+}
+
+// Wrap an async method so every call is timed; label(self) names [Model, op]
+function instrument(target, method, label) {
+    const original = target[method];
+    target[method] = async function (...args) {
+        const start = process.hrtime.bigint();
+        try {
+            return await original.apply(this, args);
+        } finally {
+            observeQuery(this, ...label(this), start);
+        }
+    };
+}
+
+// Query#then and Aggregate#then go through exec, so awaiting a query is covered
+instrument(mongoose.Query.prototype, 'exec', (query) => [query.model, query.op || 'unknown']);
+instrument(mongoose.Aggregate.prototype, 'exec', (aggregate) => [aggregate._model, 'aggregate']);
+instrument(mongoose.Model.prototype, 'save', (doc) => [doc.constructor, 'save']);
+instrument(mongoose.Model, 'insertMany', (Model) => [Model, 'insertMany']);
+instrument(mongoose.Model, 'bulkWrite', (Model) => [Model, 'bulkWrite']);
+
+// Time a direct driver call (Model.collection.*) like a Mongoose one. filter,
+// when the call has one, is logged and explained if the call is slow.
+async function timeDriverCall(Model, op, call, filter) {
+    const start = process.hrtime.bigint();
+    try {
+        return await call();
+    } finally {
+        observeQuery(filter ? { filter } : null, Model, op, start);
+    }
+}
+
+function counter(name, help, value) {
+    return `# HELP ${name} ${help}\n# TYPE ${name} counter\n${name} ${value}`;
+}
+
+function gauge(name, help, value) {
+    return `# HELP ${name} ${help}\n# TYPE ${name} gauge\n${name} ${value}`;
+}
+
+// This process's series and counters, as sent to the primary in cluster mode
+provideSnapshot(() => ({
+    requestDuration: requestDuration.snapshot(),
+    requestsInFlight: requestsInFlight.snapshot(),
+    queryDuration: queryDuration.snapshot(),
+    cache: cache.stats(),
+    compression: compressionStats()
+}));
+
+// Response cache and compression counters alongside the timings
+function countersText(cacheStats, compression) {
+    return [
+        counter('response_cache_hits_total', 'Cached responses served', cacheStats.hits),
+        counter('response_cache_misses_total', 'Cacheable requests computed', cacheStats.misses),
+        counter('response_cache_evictions_total', 'Entries evicted at RESPONSE_CACHE_MAX_ENTRIES', cacheStats.evictions),
+        counter('response_cache_invalidations_total', 'Entries dropped by writes', cacheStats.invalidations),
+        gauge('response_cache_entries', 'Entries currently cached', cacheStats.size),
+        counter('compression_responses_total', 'Responses compressed on the fly', compression.compressed),
+        counter('compression_precompressed_total', 'Responses served from a stored compressed variant', compression.precompressed),
+        counter('compression_bytes_in_total', 'Bytes before compression', compression.bytesIn),
+        counter('compression_bytes_out_total', 'Bytes after compression', compression.bytesOut),
+        counter('compression_seconds_total', 'Time spent compressing', compression.compressionMs / 1000),
+        gauge('metrics_workers_reporting', 'Workers whose series are included in this scrape', cacheStats.workers)
+    ].join('\n');
+}
+
+async function metricsHandler(req, res) {
+    const snapshots = await collectSnapshots();
+    const pick = (field) => snapshots.map((snapshot) => snapshot[field]);
+    res.type('text/plain; version=0.0.4; charset=utf-8');
+    res.send([
+        requestDuration.render(pick('requestDuration')),
+        requestsInFlight.render(pick('requestsInFlight')),
+        queryDuration.render(pick('queryDuration')),
+        countersText(totalStats(pick('cache')), totalCompressionStats(pick('compression')))
+    ].join('\n') + '\n');
+}
+
+// GET /api/cache/stats: response cache counters summed over the workers
+async function cacheStatsHandler(req, res) {
+    const snapshots = await collectSnapshots();
+    res.json(totalStats(snapshots.map((snapshot) => snapshot.cache)));
+}
+
+// GET /api/compression/stats: compression counters summed over the workers
+async function compressionStatsHandler(req, res) {
+    const snapshots = await collectSnapshots();
+    res.json(totalCompressionStats(snapshots.map((snapshot) => snapshot.compression)));
+}
+
+module.exports = {
+    metrics,
+    metricsHandler,
+    cacheStatsHandler,
+    compressionStatsHandler,
+    requestContext,
+    timeDriverCall
+};
@@ -34,4 +34,86 @@ const alertSchema = new mongoose.Schema({
     timestamps: true
 });
 
+const CATEGORIES = alertSchema.path('category').enumValues;
+const TYPES = alertSchema.path('type').enumValues;
+
+// Most ids a single mark-read request may list
+const MAX_IDS = 5000;
+
+function badRequest(message) {
+    const error = new Error(message);
+    error.status = 400;
+    return error;
+}
+
+// Mark many alerts read in one updateMany, selected either by ids or by a
+// filter of type, category and before (alerts created before that date).
+// Resolves to { matched, modified }.
+alertSchema.statics.markRead = async function ({ ids, type, category, before } = {}) {
+    const query = { read: false };
+
+    if (ids !== undefined) {
+        if (!Array.isArray(ids) || ids.length === 0) throw badRequest('ids must be a non-empty array');
+        if (ids.length > MAX_IDS) throw badRequest(`At most ${MAX_IDS} ids per request`);
+        const invalid = ids.find((id) => !mongoose.isObjectIdOrHexString(id));
+        if (invalid !== undefined) throw badRequest(`Invalid id: ${invalid}`);
+        query._id = { $in: ids };
+    } else {
+        if (!type && !category && !before) throw badRequest('Expected ids or at least one of type, category, before');
+        if (type) query.type = type;
+        if (category) query.category = category;
+        if (before) {
+            const date = new Date(before);
+            if (isNaN(date.getTime())) throw badRequest(`Invalid before date: ${before}`);
+            query.createdAt = { $lt: date };
+        }
+    }
+
+    const result = await this.updateMany(query, { $set: { read: true } });
+    return { matched: result.matchedCount, modified: result.modifiedCount };
+};
+
+// Unread alerts per category and per type, counted from the { read, category }
+// and { read, type } indexes without reading any documents
+alertSchema.statics.unreadCounts = async function () {
+    const countBy = (field) => this.aggregate([
+        { $match: { read: false } },
+        { $group: { _id: `$${field}`, count: { $sum: 1 } } }
+    ]);
+    const [categories, types] = await Promise.all([countBy('category'), countBy('type')]);
+
+    const byCategory = Object.fromEntries(CATEGORIES.map((category) => [category, 0]));
+    let total = 0;
+    for (const group of categories) {
+        byCategory[group._id] = group.count;
+        total += group.count;
+    }
+    const byType = Object.fromEntries(TYPES.map((type) => [type, 0]));
+    for (const group of types) byType[group._id] = group.count;
+    return { total, byCategory, byType };
+};
+
+// Unread counters (Alert.unreadCounts) and bulk mark-read
+alertSchema.index({ read: 1, category: 1 });
+alertSchema.index({ read: 1, type: 1 });
+
+// Upsert key of the alert rule engine (utils/alertRules.js); unique so
+// overlapping runs cannot create the same alert twice. Alerts without a
+// relatedId (entered by hand) are left out of it.
+alertSchema.index(
+    { category: 1, relatedId: 1 },
+    { unique: true, partialFilterExpression: { relatedId: { $exists: true } } }
+);
+
+// Delta sync keyset (GET /api/changes)
+alertSchema.index({ updatedAt: 1, _id: 1 });
+
+// BEGIN generated indexes (python recreate_routes.py --indexes)
+alertSchema.index({ createdAt: -1, _id: 1 });
+alertSchema.index({ type: 1, createdAt: -1, _id: 1 });
+alertSchema.index({ category: 1, createdAt: -1, _id: 1 });
+alertSchema.index({ read: 1, createdAt: -1, _id: 1 });
+alertSchema.index({ type: 1, category: 1, read: 1, createdAt: -1, _id: 1 });
+// END generated indexes
+
 module.exports = mongoose.model('Alert', alertSchema);
@@ -0,0 +1,25 @@
+const mongoose = require('mongoose');
+
+// Progress of the alert rule engine (utils/alertRules.js), one document per
+// source collection: the next run only examines documents changed since
+// checkpoint.
+const alertRuleStateSchema = new mongoose.Schema({
+    _id: {
+        type: String
+    },
+    checkpoint: {
+        type: Date,
+        required: true
+    },
+    lastRun: {
+        scanned: Number,
+        created: Number,
+        updated: Number,
+        resolved: Number,
+        durationMs: Number
+    }
+}, {
+    timestamps: true
+});
+
+module.exports = mongoose.model('AlertRuleState', alertRuleStateSchema);
@@ -1,4 +1,5 @@
 const mongoose = require('mongoose');
+const { parseQuantityKg, parseDurationMinutes, knownUnits } = require('../utils/units');
 
 const batchSchema = new mongoose.Schema({
     batchId: {
@@ -28,11 +29,22 @@ const batchSchema = new mongoose.Schema({
     },
     quantity: {
         type: String,
-        required: true
+        required: true,
+        validate: knownUnits(parseQuantityKg)
     },
     duration: {
         type: String,
-        required: true
+        required: true,
+        validate: knownUnits(parseDurationMinutes)
+    },
+    // Normalized from quantity / duration on every write (see hooks below)
+    quantityKg: {
+        type: Number,
+        min: 0
+    },
+    durationMinutes: {
+        type: Number,
+        min: 0
     },
     status: {
         type: String,
@@ -72,4 +84,68 @@ const batchSchema = new mongoose.Schema({
     timestamps: true
 });
 
+// Parsed value, or null when the unit is unknown; the path validators then
+// reject the document, so the null is never stored
+function parsedOrNull(parse, text) {
+    try {
+        return parse(text);
+    } catch (error) {
+        return null;
+    }
+}
+
+// Keep quantityKg / durationMinutes in step with the text fields
+batchSchema.pre('validate', async function () {
+    if (this.isModified('quantity')) this.quantityKg = parsedOrNull(parseQuantityKg, this.quantity);
+    if (this.isModified('duration')) this.durationMinutes = parsedOrNull(parseDurationMinutes, this.duration);
+});
+
+// An unknown unit throws a 400 here, so the update is rejected as a whole
+batchSchema.pre(['findOneAndUpdate', 'updateOne', 'updateMany'], async function () {
+    const update = this.getUpdate();
+    if (!update || Array.isArray(update)) return;
+
+    const fields = { ...update, ...(update.$set || {}) };
+    if (fields.quantity !== undefined) this.set('quantityKg', parseQuantityKg(fields.quantity));
+    if (fields.duration !== undefined) this.set('durationMinutes', parseDurationMinutes(fields.duration));
+});
+
+const hasStatus = (status) => ({ $eq: ['$status', status] });
+
+// Production statistics in a single aggregation pass
+batchSchema.statics.getStats = async function () {
+    const [stats] = await this.aggregate([
+        {
+            $group: {
+                _id: null,
+                total: { $sum: 1 },
+                completed: { $sum: { $cond: [hasStatus('completed'), 1, 0] } },
+                rejected: { $sum: { $cond: [hasStatus('rejected'), 1, 0] } },
+                inProgress: { $sum: { $cond: [hasStatus('in-progress'), 1, 0] } },
+                avgEfficiency: { $avg: { $cond: [hasStatus('completed'), '$efficiency', null] } },
+                totalQuantity: { $sum: '$quantityKg' }
+            }
+        }
+    ]);
+
+    return {
+        total: stats ? stats.total : 0,
+        completed: stats ? stats.completed : 0,
+        rejected: stats ? stats.rejected : 0,
+        inProgress: stats ? stats.inProgress : 0,
+        avgEfficiency: stats && stats.avgEfficiency !== null ? Math.round(stats.avgEfficiency) : 0,
+        totalQuantity: stats ? stats.totalQuantity : 0
+    };
+};
+
+// Delta sync keyset (GET /api/changes)
+batchSchema.index({ updatedAt: 1, _id: 1 });
+
+// BEGIN generated indexes (python recreate_routes.py --indexes)
+batchSchema.index({ status: 1, createdAt: -1 });
+batchSchema.index({ party: 1, createdAt: -1 });
+batchSchema.index({ createdAt: -1, date: 1 });
+batchSchema.index({ status: 1, party: 1, createdAt: -1, date: 1 });
+// END generated indexes
+
 module.exports = mongoose.model('Batch', batchSchema);
@@ -0,0 +1,84 @@
+const mongoose = require('mongoose');
+
+const DUPLICATE_KEY = 11000;
+
+// A lease outlives any single check-and-write it guards; a process that dies
+// while holding one only blocks its machine until the lease expires
+const LEASE_MS = 10000;
+
+// How long a save waits for another booking of the same machine to finish
+const WAIT_MS = parseInt(process.env.BOOKING_LOCK_WAIT_MS, 10) || 5000;
+
+// Per-machine lease serializing double-booking checks (models/Schedule.js):
+// the overlap query and the write it allows both run while the machine's
+// lease is held, so two concurrent saves cannot each see the slot free.
+const bookingLockSchema = new mongoose.Schema({
+    // Machine id
+    _id: {
+        type: String
+    },
+    token: {
+        type: mongoose.Schema.Types.ObjectId,
+        required: true
+    },
+    expiresAt: {
+        type: Date,
+        required: true
+    }
+}, {
+    versionKey: false
+});
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+// Take the lease on machine, waiting up to WAIT_MS for the current holder.
+// The upsert matches only a missing or expired lease; while another holder's
+// lease is live it tries to insert a second document with the same _id and
+// fails with a duplicate key, which is the "busy" signal. Resolves to the
+// token release() needs.
+bookingLockSchema.statics.acquire = async function (machine) {
+    const token = new mongoose.Types.ObjectId();
+    const deadline = Date.now() + WAIT_MS;
+
+    for (;;) {
+        const now = new Date();
+        try {
+            await this.updateOne(
+                { _id: machine, expiresAt: { $lte: now } },
+                { $set: { token, expiresAt: new Date(now.getTime() + LEASE_MS) } },
+                { upsert: true }
+            );
+            return token;
+        } catch (error) {
+            if (error.code !== DUPLICATE_KEY) throw error;
+        }
+
+        if (Date.now() >= deadline) {
+            const error = new Error(`Machine ${machine} is being booked by another request; try again`);
+            error.status = 503;
+            throw error;
+        }
+        await sleep(5 + Math.random() * 20);
+    }
+};
+
+// Give the lease back, unless it expired and someone else has taken it since
+bookingLockSchema.statics.release = function (machine, token) {
+    return this.deleteOne({ _id: machine, token });
+};
+
+// Run fn while holding the leases of all machines. They are taken in sorted
+// order, so two callers locking overlapping sets cannot deadlock.
+bookingLockSchema.statics.withMachines = async function (machines, fn) {
+    const held = [];
+    try {
+        for (const machine of [...new Set(machines)].sort()) {
+            held.push({ machine, token: await this.acquire(machine) });
+        }
+        return await fn();
+    } finally {
+        await Promise.all(held.map(({ machine, token }) => this.release(machine, token)));
+    }
+};
+
+module.exports = mongoose.model('BookingLock', bookingLockSchema);
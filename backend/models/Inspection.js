@@ -34,4 +34,166 @@ const inspectionSchema = new mongoose.Schema({
     timestamps: true
 });
 
+const BUCKET_UNITS = { day: 'day', daily: 'day', week: 'week', weekly: 'week' };
+
+function badRequest(message) {
+    const error = new Error(message);
+    error.status = 400;
+    return error;
+}
+
+function parseDay(value, name) {
+    const date = new Date(value);
+    if (isNaN(date.getTime())) throw badRequest(`Invalid ${name} date: ${value}`);
+    return date;
+}
+
+const countStatus = (status) => ({ $sum: { $cond: [{ $eq: ['$status', status] }, 1, 0] } });
+
+const qualityGroup = {
+    total: { $sum: 1 },
+    approved: countStatus('approved'),
+    pending: countStatus('pending'),
+    rejected: countStatus('rejected'),
+    avgDeltaE: { $avg: '$deltaE' }
+};
+
+const p95Group = {
+    p95DeltaE: { $percentile: { input: '$deltaE', p: [0.95], method: 'approximate' } }
+};
+
+// $percentile needs MongoDB 7.0. Older servers get the p95 from a histogram
+// of deltaE rounded to the 0.01 it is reported at (see p95FromHistogram).
+// The server version is looked up once per process.
+let percentileSupport = null;
+
+function supportsPercentile(connection) {
+    if (!percentileSupport) {
+        percentileSupport = connection.db.admin().serverInfo().then(
+            (info) => info.versionArray[0] >= 7,
+            () => {
+                percentileSupport = null;
+                return false;
+            }
+        );
+    }
+    return percentileSupport;
+}
+
+// Nearest-rank 95th percentile of [{ value, count }]
+function p95FromHistogram(bins) {
+    const sorted = [...bins].sort((a, b) => a.value - b.value);
+    const total = sorted.reduce((sum, bin) => sum + bin.count, 0);
+    const rank = Math.ceil(total * 0.95);
+    let seen = 0;
+    for (const bin of sorted) {
+        seen += bin.count;
+        if (seen >= rank) return bin.value;
+    }
+    return null;
+}
+
+function formatQuality(group) {
+    const avg = group ? group.avgDeltaE : null;
+    const p95 = group && group.p95DeltaE ? group.p95DeltaE[0] : null;
+    const total = group ? group.total : 0;
+    const approved = group ? group.approved : 0;
+
+    return {
+        total,
+        approved,
+        pending: group ? group.pending : 0,
+        rejected: group ? group.rejected : 0,
+        approvalRate: total > 0 ? Math.round((approved / total) * 100) : 0,
+        avgDeltaE: avg !== null && avg !== undefined ? avg.toFixed(2) : 0,
+        p95DeltaE: p95 !== null && p95 !== undefined ? p95.toFixed(2) : 0
+    };
+}
+
+// Quality statistics computed server-side. Options (all optional):
+//   from, to  - inclusive record-date window (createdAt), e.g. 2025-12-01
+//   client    - restrict to one client
+//   bucket    - 'day' or 'week' to add a per-period series for charting
+inspectionSchema.statics.getStats = async function ({ from, to, client, bucket } = {}) {
+    const match = {};
+    if (client) match.client = client;
+    if (from || to) {
+        match.createdAt = {};
+        if (from) match.createdAt.$gte = parseDay(from, 'from');
+        if (to) {
+            const end = parseDay(to, 'to');
+            end.setUTCDate(end.getUTCDate() + 1);
+            match.createdAt.$lt = end;
+        }
+    }
+
+    let period = null;
+    if (bucket) {
+        const unit = BUCKET_UNITS[bucket];
+        if (!unit) throw badRequest(`Invalid bucket: ${bucket} (expected day or week)`);
+
+        period = { date: '$createdAt', unit };
+        if (unit === 'week') period.startOfWeek = 'monday';
+    }
+
+    const percentile = await supportsPercentile(this.db);
+    const group = percentile ? { ...qualityGroup, ...p95Group } : qualityGroup;
+    const facets = {
+        summary: [{ $group: { _id: null, ...group } }]
+    };
+    if (period) {
+        facets.series = [
+            {
+                $group: {
+                    _id: { $dateTrunc: period },
+                    ...group
+                }
+            },
+            { $sort: { _id: 1 } }
+        ];
+    }
+    if (!percentile) {
+        facets.deltaE = [
+            { $match: { deltaE: { $type: 'number' } } },
+            {
+                $group: {
+                    _id: { period: period ? { $dateTrunc: period } : null, value: { $round: ['$deltaE', 2] } },
+                    count: { $sum: 1 }
+                }
+            }
+        ];
+    }
+
+    const [result] = await this.aggregate([{ $match: match }, { $facet: facets }]);
+
+    if (!percentile) {
+        const bins = result.deltaE.map(({ _id, count }) => ({ period: String(_id.period), value: _id.value, count }));
+        if (result.summary[0]) result.summary[0].p95DeltaE = [p95FromHistogram(bins)];
+        for (const group of result.series || []) {
+            group.p95DeltaE = [p95FromHistogram(bins.filter((bin) => bin.period === String(group._id)))];
+        }
+    }
+
+    const stats = formatQuality(result.summary[0]);
+    if (bucket) {
+        stats.series = result.series.map((group) => ({
+            period: group._id.toISOString().split('T')[0],
+            ...formatQuality(group)
+        }));
+    }
+    return stats;
+};
+
+// Natural key used by POST /bulk?upsert=true. Not unique: a lot may be
+// inspected twice on a day, or split across machines.
+inspectionSchema.index({ lotNo: 1, date: 1 });
+
+// Delta sync keyset (GET /api/changes)
+inspectionSchema.index({ updatedAt: 1, _id: 1 });
+
+// BEGIN generated indexes (python recreate_routes.py --indexes)
+inspectionSchema.index({ createdAt: -1, _id: 1 });
+inspectionSchema.index({ status: 1, createdAt: -1, _id: 1 });
+// END generated indexes
+
 module.exports = mongoose.model('Inspection', inspectionSchema);
@@ -1,4 +1,5 @@
 const mongoose = require('mongoose');
+const { timeDriverCall } = require('../middleware/metrics');
 
 const inventorySchema = new mongoose.Schema({
     name: {
@@ -45,17 +46,208 @@ const inventorySchema = new mongoose.Schema({
     timestamps: true
 });
 
-// Auto-calculate status and stockLevel before saving
-inventorySchema.pre('save', async function () {
+// stockLevel (percent of maxCapacity) at or below which an item is critical / low
+const CRITICAL_LEVEL = 20;
+const LOW_LEVEL = 50;
+
+inventorySchema.methods.updateStockStatus = function () {
     this.stockLevel = Math.round((this.stock / this.maxCapacity) * 100);
 
-    if (this.stockLevel <= 20) {
+    if (this.stockLevel <= CRITICAL_LEVEL) {
         this.status = 'critical';
-    } else if (this.stockLevel <= 50) {
+    } else if (this.stockLevel <= LOW_LEVEL) {
         this.status = 'low';
     } else {
         this.status = 'ok';
     }
+};
+
+// Auto-calculate status and stockLevel before saving
+inventorySchema.pre('save', async function () {
+    this.updateStockStatus();
 });
 
+// The same calculation as update-pipeline stages, for writes that bypass
+// the save hook (bulkWrite, findOneAndUpdate with a pipeline)
+inventorySchema.statics.stockStatusStages = function () {
+    return [
+        {
+            $set: {
+                stockLevel: { $floor: { $add: [{ $multiply: [{ $divide: ['$stock', '$maxCapacity'] }, 100] }, 0.5] } }
+            }
+        },
+        {
+            $set: {
+                status: {
+                    $switch: {
+                        branches: [
+                            { case: { $lte: ['$stockLevel', CRITICAL_LEVEL] }, then: 'critical' },
+                            { case: { $lte: ['$stockLevel', LOW_LEVEL] }, then: 'low' }
+                        ],
+                        default: 'ok'
+                    }
+                }
+            }
+        }
+    ];
+};
+
+// Fields computed from stock / maxCapacity, never taken from a request
+const DERIVED = ['_id', '__v', 'createdAt', 'updatedAt', 'stockLevel', 'status'];
+
+const USAGE_DAYS = Object.keys(inventorySchema.obj.weeklyUsage);
+
+// Most items a single batch-usage request may touch
+const MAX_USAGE_ITEMS = 500;
+
+function badRequest(message) {
+    const error = new Error(message);
+    error.status = 400;
+    return error;
+}
+
+function objectId(id) {
+    return mongoose.isValidObjectId(id) ? new mongoose.Types.ObjectId(String(id)) : null;
+}
+
+// Apply a partial update and recompute stockLevel/status in the same atomic
+// write, which findByIdAndUpdate would skip (it bypasses the save hook).
+// Resolves to the updated item, or null when it does not exist.
+inventorySchema.statics.updateWithStatus = async function (id, update) {
+    const _id = objectId(id);
+    if (!_id) return null;
+
+    const roots = Object.keys(update || {}).filter((field) => !DERIVED.includes(field));
+    const paths = Object.keys(this.schema.paths).filter((path) => roots.includes(path.split('.')[0]));
+
+    // Cast and validate only the supplied fields, as runValidators would
+    const doc = new this(update);
+    const invalid = doc.validateSync(paths);
+    if (invalid) throw invalid;
+
+    const values = doc.toObject({ depopulate: true });
+    const set = { updatedAt: '$$NOW' };
+    for (const field of new Set(paths.map((path) => path.split('.')[0]))) {
+        set[field] = { $literal: values[field] };
+    }
+
+    const filter = { _id };
+    const item = await timeDriverCall(this, 'findOneAndUpdate', () => this.collection.findOneAndUpdate(
+        filter,
+        [{ $set: set }, ...this.stockStatusStages()],
+        { returnDocument: 'after' }
+    ), filter);
+    return item && this.hydrate(item);
+};
+
+// Filter and pipeline recording one usage entry ({ id or name, amount, day }).
+// The filter only matches while stock covers the amount, so concurrent usage
+// can never take stock below zero.
+function usageUpdate(entry, stages) {
+    const amount = Number(entry.amount);
+    if (!Number.isFinite(amount) || amount <= 0) throw badRequest('amount must be a positive number');
+    if (!USAGE_DAYS.includes(entry.day)) throw badRequest(`Invalid day (expected one of ${USAGE_DAYS.join(', ')})`);
+
+    let key;
+    if (entry.id !== undefined) {
+        key = { _id: objectId(entry.id) };
+        if (!key._id) throw badRequest(`Invalid id: ${entry.id}`);
+    } else if (entry.name) {
+        key = { name: String(entry.name) };
+    } else {
+        throw badRequest('Each entry needs an id or a name');
+    }
+
+    const bucket = `weeklyUsage.${entry.day}`;
+    return {
+        key,
+        filter: { ...key, stock: { $gte: amount } },
+        pipeline: [
+            {
+                $set: {
+                    stock: { $subtract: ['$stock', amount] },
+                    [bucket]: { $add: [{ $ifNull: [`$${bucket}`, 0] }, amount] },
+                    updatedAt: '$$NOW'
+                }
+            },
+            ...stages
+        ]
+    };
+}
+
+// Record usage against one item: decrement stock, add to the day's
+// weeklyUsage bucket and recompute stockLevel/status in one atomic update.
+// Resolves to { item } or { reason: 'not found' | 'insufficient stock' }.
+inventorySchema.statics.recordUsage = async function (entry) {
+    const { key, filter, pipeline } = usageUpdate(entry, this.stockStatusStages());
+
+    const item = await timeDriverCall(this, 'findOneAndUpdate', () => this.collection.findOneAndUpdate(filter, pipeline, { returnDocument: 'after' }), filter);
+    if (item) return { item: this.hydrate(item) };
+    return { reason: (await this.exists(key)) ? 'insufficient stock' : 'not found' };
+};
+
+// Record the usage of a whole dyeing batch: entries are applied concurrently,
+// each in its own atomic update, so one short item does not block the rest.
+// defaultDay applies to entries without a day. Resolves to { updated, skipped }
+// where each skipped entry carries its index and reason.
+inventorySchema.statics.recordUsageMany = async function (entries, defaultDay) {
+    if (!Array.isArray(entries) || entries.length === 0) throw badRequest('Expected a non-empty array of usage entries');
+    if (entries.length > MAX_USAGE_ITEMS) throw badRequest(`At most ${MAX_USAGE_ITEMS} entries per request`);
+
+    const results = await Promise.all(entries.map(async (entry, index) => {
+        try {
+            return { index, ...(await this.recordUsage({ ...entry, day: (entry && entry.day) || defaultDay })) };
+        } catch (error) {
+            if (error.status !== 400) throw error;
+            return { index, reason: error.message };
+        }
+    }));
+
+    return {
+        updated: results.filter((result) => result.item).map((result) => result.item),
+        skipped: results.filter((result) => !result.item).map(({ index, reason }) => ({ index, reason }))
+    };
+};
+
+// Items at low or critical stock, lowest first
+inventorySchema.statics.lowStock = function () {
+    return this.find({
+        status: { $in: ['low', 'critical'] }
+    }).sort({ stockLevel: 1 });
+};
+
+// Item counts and weekly usage per category in one aggregation pass, for the
+// inventory page summary and chart (GET /inventory/stats)
+inventorySchema.statics.getStats = async function () {
+    const sumUsage = Object.fromEntries(USAGE_DAYS.map((day) => [day, { $sum: { $ifNull: [`$weeklyUsage.${day}`, 0] } }]));
+    const groups = await this.aggregate([
+        {
+            $group: {
+                _id: '$category',
+                count: { $sum: 1 },
+                lowStock: { $sum: { $cond: [{ $ne: ['$status', 'ok'] }, 1, 0] } },
+                ...sumUsage
+            }
+        }
+    ]);
+
+    const byCategory = Object.fromEntries(groups.map((group) => [group._id, group]));
+    const usage = (category, day) => (byCategory[category] ? byCategory[category][day] : 0);
+    return {
+        total: groups.reduce((sum, group) => sum + group.count, 0),
+        dyes: byCategory.Dye ? byCategory.Dye.count : 0,
+        chemicals: byCategory.Chemical ? byCategory.Chemical.count : 0,
+        lowStock: groups.reduce((sum, group) => sum + group.lowStock, 0),
+        weeklyUsage: USAGE_DAYS.map((day) => ({ day, dyes: usage('Dye', day), chemicals: usage('Chemical', day) }))
+    };
+};
+
+// Delta sync keyset (GET /api/changes)
+inventorySchema.index({ updatedAt: 1, _id: 1 });
+
+// BEGIN generated indexes (python recreate_routes.py --indexes)
+inventorySchema.index({ category: 1, name: 1, _id: 1 });
+inventorySchema.index({ stockLevel: 1, status: 1 });
+// END generated indexes
+
 module.exports = mongoose.model('Inventory', inventorySchema);
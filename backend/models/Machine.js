@@ -1,5 +1,8 @@
 const mongoose = require('mongoose');
 
+// Transitions transitionMany keeps in flight at once
+const TRANSITION_CONCURRENCY = 50;
+
 const machineSchema = new mongoose.Schema({
     machineId: {
         type: String,
@@ -52,4 +55,148 @@ const machineSchema = new mongoose.Schema({
     timestamps: true
 });
 
+// Leading integer of a free-text quantity such as "331 kg" (parseInt semantics)
+const quantityAsInt = {
+    $let: {
+        vars: { m: { $regexFind: { input: { $trim: { input: { $ifNull: ['$quantity', ''] } } }, regex: /^\d+/ } } },
+        in: { $convert: { input: '$$m.match', to: 'int', onError: 0, onNull: 0 } }
+    }
+};
+
+const isRunning = { $eq: ['$status', 'running'] };
+
+// Fleet statistics computed server-side in a single aggregation pass
+machineSchema.statics.getStats = async function () {
+    const [stats] = await this.aggregate([
+        {
+            $group: {
+                _id: null,
+                total: { $sum: 1 },
+                running: { $sum: { $cond: [isRunning, 1, 0] } },
+                idle: { $sum: { $cond: [{ $eq: ['$status', 'idle'] }, 1, 0] } },
+                maintenance: { $sum: { $cond: [{ $eq: ['$status', 'maintenance'] }, 1, 0] } },
+                avgEfficiency: { $avg: { $cond: [isRunning, '$efficiency', null] } },
+                totalProduction: { $sum: { $cond: [isRunning, quantityAsInt, 0] } }
+            }
+        }
+    ]);
+
+    return {
+        total: stats ? stats.total : 0,
+        running: stats ? stats.running : 0,
+        idle: stats ? stats.idle : 0,
+        maintenance: stats ? stats.maintenance : 0,
+        avgEfficiency: stats && stats.avgEfficiency !== null ? Math.round(stats.avgEfficiency) : 0,
+        totalProduction: stats ? stats.totalProduction : 0
+    };
+};
+
+// Job fields of a machine with nothing loaded
+const NO_JOB = {
+    party: '',
+    color: '',
+    lotNo: '',
+    quantity: '',
+    stage: '',
+    efficiency: 0,
+    runtime: '',
+    startTime: null
+};
+
+// Conditional status change in a single round trip. Resolves to the updated
+// machine, or null when it does not exist or is not currently in `from`.
+machineSchema.statics.transition = function (id, from, update) {
+    return this.findOneAndUpdate(
+        { _id: id, status: from },
+        { $set: update },
+        { new: true, runValidators: true }
+    );
+};
+
+machineSchema.statics.assignJob = function (id, job) {
+    return this.transition(id, 'idle', { ...job, status: 'running', startTime: new Date() });
+};
+
+machineSchema.statics.completeJob = function (id) {
+    return this.transition(id, 'running', { ...NO_JOB, status: 'idle' });
+};
+
+// Many conditional transitions, each its own atomic findOneAndUpdate, sent
+// TRANSITION_CONCURRENCY at a time so a large request cannot take over the
+// connection pool. Each call reports exactly what it changed, so overlapping
+// callers can never count each other's updates as their own.
+// updates is [{ id, update }]; resolves to { updated, skipped } where each
+// skipped entry carries the reason ('not found', 'invalid id', 'duplicate',
+// 'not <from>' or the validation error).
+machineSchema.statics.transitionMany = async function (from, updates) {
+    const skipped = [];
+    const pending = [];
+
+    const seen = new Set();
+    for (const { id, update } of updates) {
+        if (!mongoose.isValidObjectId(id)) {
+            skipped.push({ id, reason: 'invalid id' });
+            continue;
+        }
+        if (seen.has(String(id))) {
+            skipped.push({ id, reason: 'duplicate' });
+            continue;
+        }
+        seen.add(String(id));
+        pending.push({ id, update });
+    }
+
+    const results = [];
+    for (let i = 0; i < pending.length; i += TRANSITION_CONCURRENCY) {
+        results.push(...await Promise.all(pending.slice(i, i + TRANSITION_CONCURRENCY).map(async ({ id, update }) => {
+            try {
+                return { id, machine: await this.transition(id, from, update) };
+            } catch (error) {
+                if (!(error instanceof mongoose.Error.ValidationError || error instanceof mongoose.Error.CastError)) throw error;
+                return { id, reason: error.message };
+            }
+        })));
+    }
+
+    const updated = [];
+    const unmatched = [];
+    for (const { id, machine, reason } of results) {
+        if (reason) skipped.push({ id, reason });
+        else if (machine) updated.push(machine);
+        else unmatched.push(id);
+    }
+
+    // Tell missing machines from ones that were not in `from`
+    if (unmatched.length > 0) {
+        const existing = await this.find({ _id: { $in: unmatched } }).select('_id').lean();
+        const exists = new Set(existing.map((m) => m._id.toString()));
+        for (const id of unmatched) {
+            skipped.push({ id, reason: exists.has(String(id)) ? `not ${from}` : 'not found' });
+        }
+    }
+    return { updated, skipped };
+};
+
+machineSchema.statics.assignJobs = function (jobs) {
+    const startTime = new Date();
+    return this.transitionMany('idle', jobs.map(({ id, job }) => ({
+        id,
+        update: { ...job, status: 'running', startTime }
+    })));
+};
+
+machineSchema.statics.completeJobs = function (ids) {
+    return this.transitionMany('running', ids.map((id) => ({ id, update: { ...NO_JOB, status: 'idle' } })));
+};
+
+// Delta sync keyset (GET /api/changes)
+machineSchema.index({ updatedAt: 1, _id: 1 });
+
+// Running machines by start time, for the running-too-long alert rule
+machineSchema.index({ status: 1, startTime: 1 });
+
+// BEGIN generated indexes (python recreate_routes.py --indexes)
+machineSchema.index({ status: 1, machineId: 1, _id: 1 });
+// END generated indexes
+
 module.exports = mongoose.model('Machine', machineSchema);
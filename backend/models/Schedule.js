@@ -1,4 +1,10 @@
 const mongoose = require('mongoose');
+const { parseDurationMinutes, knownUnits } = require('../utils/units');
+const { plantInstant } = require('../utils/plantTime');
+const BookingLock = require('./BookingLock');
+
+// Longest slot a schedule may book; bounds the index range findConflicts scans
+const MAX_SLOT_MINUTES = 48 * 60;
 
 const scheduleSchema = new mongoose.Schema({
     date: {
@@ -31,7 +37,8 @@ const scheduleSchema = new mongoose.Schema({
     },
     duration: {
         type: String,
-        required: true
+        required: true,
+        validate: knownUnits(parseDurationMinutes)
     },
     priority: {
         type: String,
@@ -42,9 +49,171 @@ const scheduleSchema = new mongoose.Schema({
         type: String,
         enum: ['scheduled', 'in-progress', 'completed', 'cancelled'],
         default: 'scheduled'
+    },
+    // Machine slot derived from date, time and duration (see setSlot)
+    startAt: {
+        type: Date
+    },
+    endAt: {
+        type: Date,
+        validate: {
+            validator: function (endAt) {
+                return !endAt || !this.startAt || endAt - this.startAt <= MAX_SLOT_MINUTES * 60000;
+            },
+            message: `A schedule may book a machine for at most ${MAX_SLOT_MINUTES / 60} hours`
+        }
     }
 }, {
     timestamps: true
 });
 
+// Start and end of the slot booked by date ("2025-12-15"), time ("08:00") and
+// duration ("6h 45m"), read as plant wall-clock time (utils/plantTime.js), or
+// null when any of them does not parse (an unknown duration unit is reported
+// by the duration validator)
+function slotOf({ date, time, duration }) {
+    const clock = /^(\d{1,2}):(\d{2})/.exec(String(time || ''));
+    let minutes;
+    try {
+        minutes = parseDurationMinutes(duration);
+    } catch (error) {
+        return null;
+    }
+    if (!clock || !minutes) return null;
+
+    const startAt = plantInstant(date, Number(clock[1]) * 60 + Number(clock[2]));
+    if (!startAt) return null;
+    return { startAt, endAt: new Date(startAt.getTime() + minutes * 60000) };
+}
+
+scheduleSchema.methods.setSlot = function () {
+    const slot = slotOf(this);
+    this.startAt = slot ? slot.startAt : undefined;
+    this.endAt = slot ? slot.endAt : undefined;
+};
+
+scheduleSchema.pre('validate', async function () {
+    if (this.isNew || this.isModified('date') || this.isModified('time') || this.isModified('duration')) {
+        this.setSlot();
+    }
+});
+
+// Other active schedules on the same machine overlapping [startAt, endAt).
+// No slot is longer than MAX_SLOT_MINUTES, so only slots starting within that
+// window before endAt can overlap: one bounded range scan of the
+// { machine, startAt, endAt } index however many slots the week holds.
+scheduleSchema.statics.findConflicts = function ({ _id, machine, startAt, endAt }) {
+    const query = {
+        machine,
+        startAt: { $gt: new Date(startAt.getTime() - MAX_SLOT_MINUTES * 60000), $lt: endAt },
+        endAt: { $gt: startAt },
+        status: { $ne: 'cancelled' }
+    };
+    if (_id) query._id = { $ne: _id };
+
+    return this.find(query).select('date time machine lotNo duration').sort({ startAt: 1 }).limit(5).lean();
+};
+
+// Refuse to double-book a machine (status 409 for the route). The check and
+// the write run under the machine's booking lease (models/BookingLock.js),
+// taken here and given back by the post('save') hooks below, so concurrent
+// saves on one machine are checked one at a time.
+scheduleSchema.pre('save', async function () {
+    if (!this.startAt || this.status === 'cancelled') return;
+    if (!this.isNew && !['startAt', 'endAt', 'machine', 'status'].some((path) => this.isModified(path))) return;
+
+    const machine = this.machine;
+    this.$locals.bookingLease = { machine, token: await BookingLock.acquire(machine) };
+
+    let conflicts;
+    try {
+        conflicts = await this.constructor.findConflicts(this);
+    } catch (error) {
+        await releaseBooking(this);
+        throw error;
+    }
+    if (conflicts.length > 0) {
+        await releaseBooking(this);
+        const [first] = conflicts;
+        const error = new Error(`Machine ${machine} is already booked from ${first.date} ${first.time} for ${first.duration} (lot ${first.lotNo})`);
+        error.status = 409;
+        error.conflicts = conflicts;
+        throw error;
+    }
+});
+
+async function releaseBooking(doc) {
+    const lease = doc.$locals.bookingLease;
+    if (!lease) return;
+    doc.$locals.bookingLease = undefined;
+    await BookingLock.release(lease.machine, lease.token);
+}
+
+scheduleSchema.post('save', async function () {
+    await releaseBooking(this);
+});
+
+// A failed write (e.g. a duplicate lotNo + date) gives the lease back too
+scheduleSchema.post('save', function (error, doc, next) {
+    releaseBooking(doc).then(() => next(error), () => next(error));
+});
+
+// Schedules of a week (7 days from start, "YYYY-MM-DD") grouped by day and
+// machine, from one range query over the { date, time } index
+scheduleSchema.statics.getWeek = async function (start) {
+    const first = new Date(`${start}T00:00:00Z`);
+    if (!/^\d{4}-\d{2}-\d{2}$/.test(String(start)) || isNaN(first.getTime())) {
+        const error = new Error(`Invalid week start date: ${start} (expected YYYY-MM-DD)`);
+        error.status = 400;
+        throw error;
+    }
+
+    const dates = [];
+    for (let i = 0; i < 7; i++) {
+        dates.push(new Date(first.getTime() + i * 24 * 60 * 60 * 1000).toISOString().split('T')[0]);
+    }
+
+    const schedules = await this.find({
+        date: { $gte: dates[0], $lte: dates[6] }
+    }).sort({ date: 1, time: 1 }).lean();
+
+    const days = new Map(dates.map((date) => [date, { date, count: 0, machines: new Map() }]));
+    for (const schedule of schedules) {
+        const day = days.get(schedule.date);
+        if (!day) continue;
+        if (!day.machines.has(schedule.machine)) day.machines.set(schedule.machine, []);
+        day.machines.get(schedule.machine).push(schedule);
+        day.count++;
+    }
+
+    return {
+        from: dates[0],
+        to: dates[6],
+        total: schedules.length,
+        days: [...days.values()].map((day) => ({
+            date: day.date,
+            count: day.count,
+            machines: [...day.machines.keys()].sort().map((machine) => ({ machine, slots: day.machines.get(machine) }))
+        }))
+    };
+};
+
+// Double-booking checks (findConflicts)
+scheduleSchema.index({ machine: 1, startAt: 1, endAt: 1 });
+
+// Machine availability for POST /schedules/optimize (utils/scheduler.js)
+scheduleSchema.index({ endAt: 1 });
+
+// Natural key used by POST /bulk?upsert=true. Not unique: a lot may be
+// inspected twice on a day, or split across machines.
+scheduleSchema.index({ lotNo: 1, date: 1 });
+
+// Delta sync keyset (GET /api/changes)
+scheduleSchema.index({ updatedAt: 1, _id: 1 });
+
+// BEGIN generated indexes (python recreate_routes.py --indexes)
+scheduleSchema.index({ date: 1, time: 1, _id: 1 });
+scheduleSchema.index({ status: 1, date: 1, time: 1, _id: 1 });
+// END generated indexes
+
 module.exports = mongoose.model('Schedule', scheduleSchema);
@@ -0,0 +1,221 @@
+const mongoose = require('mongoose');
+const { timeDriverCall } = require('../middleware/metrics');
+
+// Days of raw samples kept before MongoDB expires them
+const RETENTION_DAYS = parseInt(process.env.TELEMETRY_RETENTION_DAYS, 10) || 30;
+
+// Most samples a single ingest request may carry
+const MAX_SAMPLES = 10000;
+
+// How far ahead of the server clock a sample's at may be (controller clock
+// drift); older than RETENTION_DAYS it would expire on arrival
+const MAX_FUTURE_MS = 5 * 60 * 1000;
+
+// Defaults for GET /api/telemetry: the last 12 hours at chart resolution
+const DEFAULT_RANGE_MS = 12 * 60 * 60 * 1000;
+const DEFAULT_POINTS = 300;
+const MAX_POINTS = 2000;
+const MAX_MACHINES = 50;
+
+// Smallest bucket a range is split into; finer than the sample rate is noise
+const MIN_BUCKET_MS = 1000;
+
+// One reading from a machine's controller. Stored in a time-series collection:
+// MongoDB groups samples per machineId into compressed buckets, so ingest is
+// append-only and range scans per machine read few documents.
+const telemetrySchema = new mongoose.Schema({
+    machineId: {
+        type: String,
+        required: true
+    },
+    at: {
+        type: Date,
+        required: true
+    },
+    // Liquor temperature, °C
+    temperature: {
+        type: Number
+    },
+    stage: {
+        type: String
+    },
+    // Circulation flow, L/min
+    flow: {
+        type: Number
+    }
+}, {
+    timeseries: {
+        timeField: 'at',
+        metaField: 'machineId',
+        granularity: 'seconds'
+    },
+    expireAfterSeconds: RETENTION_DAYS * 24 * 60 * 60,
+    versionKey: false
+});
+
+function badRequest(message) {
+    const error = new Error(message);
+    error.status = 400;
+    return error;
+}
+
+const NUMERIC = /^\s*[+-]?(\d+\.?\d*|\.\d+)(e[+-]?\d+)?\s*$/i;
+
+// A JSON number or a numeric string, as a finite number; otherwise NaN.
+// Number() alone would take '', true and [] as 0 or 1.
+function toNumber(value) {
+    if (typeof value === 'number') return value;
+    if (typeof value === 'string' && NUMERIC.test(value)) return Number(value);
+    return NaN;
+}
+
+// Plain document for a sample, or the reason it was rejected
+function toDocument(sample, defaults) {
+    if (!sample || typeof sample !== 'object') return { reason: 'Expected an object' };
+
+    const machineId = sample.machineId || defaults.machineId;
+    if (typeof machineId !== 'string' || machineId === '') return { reason: 'machineId is required' };
+
+    if (sample.at !== undefined && typeof sample.at !== 'string' && typeof sample.at !== 'number') {
+        return { reason: `Invalid at: ${sample.at}` };
+    }
+    const at = sample.at === undefined ? defaults.at : new Date(sample.at);
+    if (isNaN(at.getTime())) return { reason: `Invalid at: ${sample.at}` };
+    const now = defaults.at.getTime();
+    if (at.getTime() > now + MAX_FUTURE_MS || at.getTime() < now - RETENTION_DAYS * 24 * 60 * 60 * 1000) {
+        return { reason: `at must be within the last ${RETENTION_DAYS} days and at most ${MAX_FUTURE_MS / 60000} minutes ahead: ${sample.at}` };
+    }
+
+    const doc = { machineId, at };
+    for (const field of ['temperature', 'flow']) {
+        if (sample[field] === undefined || sample[field] === null) continue;
+        const value = toNumber(sample[field]);
+        if (!Number.isFinite(value)) return { reason: `Invalid ${field}: ${sample[field]}` };
+        doc[field] = value;
+    }
+    if (sample.stage !== undefined && sample.stage !== null) doc.stage = String(sample.stage);
+
+    if (doc.temperature === undefined && doc.flow === undefined && doc.stage === undefined) {
+        return { reason: 'Expected at least one of temperature, stage, flow' };
+    }
+    return { doc };
+}
+
+// Validate and append a batch of samples in one unordered insert. Samples may
+// omit machineId when one is given for the whole batch, and at (receive time).
+// Resolves to { received, inserted, rejected: [{ index, reason }] }.
+telemetrySchema.statics.ingest = async function (samples, { machineId } = {}) {
+    if (!Array.isArray(samples) || samples.length === 0) throw badRequest('Expected a non-empty array of samples');
+    if (samples.length > MAX_SAMPLES) throw badRequest(`At most ${MAX_SAMPLES} samples per request`);
+
+    const defaults = { machineId, at: new Date() };
+    const docs = [];
+    const positions = [];
+    const rejected = [];
+
+    samples.forEach((sample, index) => {
+        const { doc, reason } = toDocument(sample, defaults);
+        if (reason) {
+            rejected.push({ index, reason });
+        } else {
+            docs.push(doc);
+            positions.push(index);
+        }
+    });
+
+    let inserted = 0;
+    if (docs.length > 0) {
+        // Samples are already validated, so they go straight to the driver
+        try {
+            const result = await timeDriverCall(this, 'insertMany', () => this.collection.insertMany(docs, { ordered: false }));
+            inserted = result.insertedCount;
+        } catch (error) {
+            if (!error.writeErrors) throw error;
+            for (const writeError of [].concat(error.writeErrors)) {
+                rejected.push({ index: positions[writeError.index], reason: writeError.errmsg || writeError.message });
+            }
+            inserted = error.result ? error.result.insertedCount : 0;
+            rejected.sort((a, b) => a.index - b.index);
+        }
+    }
+
+    return { received: samples.length, inserted, rejected };
+};
+
+function parseDate(value, name) {
+    const date = new Date(value);
+    if (isNaN(date.getTime())) throw badRequest(`Invalid ${name}: ${value}`);
+    return date;
+}
+
+// Downsampled series for charting. The [from, to) window is cut into about
+// `points` equal buckets and each machine gets one point per bucket that has
+// samples: min / max / avg temperature and flow, the latest stage and the
+// sample count. The response size depends on points, not on the sample rate.
+//
+//   machines  - machineIds (array or comma-separated), required
+//   from, to  - window, default the 12 hours up to now
+//   points    - buckets per machine, default 300
+telemetrySchema.statics.series = async function ({ machines, from, to, points } = {}) {
+    const ids = [...new Set((Array.isArray(machines) ? machines : String(machines || '').split(','))
+        .map((id) => String(id).trim())
+        .filter(Boolean))];
+    if (ids.length === 0) throw badRequest('machines is required');
+    if (ids.length > MAX_MACHINES) throw badRequest(`At most ${MAX_MACHINES} machines per request`);
+
+    const end = to ? parseDate(to, 'to') : new Date();
+    const start = from ? parseDate(from, 'from') : new Date(end.getTime() - DEFAULT_RANGE_MS);
+    if (start >= end) throw badRequest('from must be before to');
+
+    const count = points === undefined ? DEFAULT_POINTS : parseInt(points, 10);
+    if (isNaN(count) || count < 1 || count > MAX_POINTS) throw badRequest(`points must be between 1 and ${MAX_POINTS}`);
+
+    const bucketMs = Math.max(MIN_BUCKET_MS, Math.ceil((end - start) / count));
+
+    const groups = await this.aggregate([
+        { $match: { machineId: { $in: ids }, at: { $gte: start, $lt: end } } },
+        {
+            $group: {
+                // Bucket start: at rounded down to a multiple of bucketMs after from
+                _id: {
+                    machineId: '$machineId',
+                    at: { $subtract: ['$at', { $mod: [{ $subtract: ['$at', start] }, bucketMs] }] }
+                },
+                n: { $sum: 1 },
+                temperatureMin: { $min: '$temperature' },
+                temperatureMax: { $max: '$temperature' },
+                temperatureAvg: { $avg: '$temperature' },
+                flowMin: { $min: '$flow' },
+                flowMax: { $max: '$flow' },
+                flowAvg: { $avg: '$flow' },
+                // Latest sample that reported a stage: documents compare by
+                // their first field, so $max picks the greatest at
+                stage: { $max: { $cond: [{ $ifNull: ['$stage', false] }, { at: '$at', stage: '$stage' }, null] } }
+            }
+        },
+        { $sort: { '_id.machineId': 1, '_id.at': 1 } }
+    ]);
+
+    const byMachine = new Map(ids.map((id) => [id, []]));
+    for (const group of groups) {
+        byMachine.get(group._id.machineId).push({
+            at: group._id.at,
+            n: group.n,
+            temperature: { min: group.temperatureMin, max: group.temperatureMax, avg: group.temperatureAvg },
+            flow: { min: group.flowMin, max: group.flowMax, avg: group.flowAvg },
+            stage: group.stage ? group.stage.stage : null
+        });
+    }
+
+    return {
+        from: start,
+        to: end,
+        bucketMs,
+        machines: ids.map((machineId) => ({ machineId, points: byMachine.get(machineId) }))
+    };
+};
+
+// Range scans per machine (GET /api/telemetry)
+telemetrySchema.index({ machineId: 1, at: 1 });
+
+module.exports = mongoose.model('Telemetry', telemetrySchema);
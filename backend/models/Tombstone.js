@@ -0,0 +1,34 @@
+const mongoose = require('mongoose');
+
+// Days a deletion stays visible to delta-sync clients (GET /api/changes)
+const RETENTION_DAYS = parseInt(process.env.TOMBSTONE_RETENTION_DAYS, 10) || 30;
+
+const tombstoneSchema = new mongoose.Schema({
+    collectionName: {
+        type: String,
+        required: true
+    },
+    docId: {
+        type: String,
+        required: true
+    },
+    deletedAt: {
+        type: Date,
+        default: Date.now
+    }
+});
+
+tombstoneSchema.index({ deletedAt: 1 }, { expireAfterSeconds: RETENTION_DAYS * 24 * 60 * 60 });
+tombstoneSchema.index({ deletedAt: 1, _id: 1 });
+
+// Record that a document was deleted through the API
+tombstoneSchema.statics.record = function (collectionName, docId) {
+    return this.create({ collectionName, docId: String(docId) });
+};
+
+// How far back a sync token may reach before deletions could have expired
+tombstoneSchema.statics.retentionMs = function () {
+    return RETENTION_DAYS * 24 * 60 * 60 * 1000;
+};
+
+module.exports = mongoose.model('Tombstone', tombstoneSchema);
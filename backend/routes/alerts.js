@@ -2,6 +2,14 @@ const express = require('express');
 const router = express.Router();
 
 const Alert = require('../models/Alert');
+const Tombstone = require('../models/Tombstone');
+const { paginate } = require('../utils/pagination');
+const { sendJson } = require('../utils/serializers');
+const { cached, invalidateOnWrite } = require('../middleware/cache');
+const { generateAlerts } = require('../utils/alertRules');
+
+router.use(invalidateOnWrite('alerts'));
+
 // GET all alerts with optional filters
 router.get('/', async (req, res) => {
   try {
@@ -12,8 +20,18 @@ router.get('/', async (req, res) => {
     if (category) query.category = category;
     if (read !== undefined) query.read = read === 'true';
 
-    const alerts = await Alert.find(query).sort({ createdAt: -1 });
-    res.json(alerts);
+    const alerts = await paginate(Alert, query, { createdAt: -1 }, req.query, res, { lean: true });
+    sendJson(res, Alert, alerts);
+  } catch (error) {
+    res.status(error.status || 500).json({ error: error.message });
+  }
+});
+
+// GET unread alert counts per category (for the notification badge)
+router.get('/unread-count', cached('alerts'), async (req, res) => {
+  try {
+    const counts = await Alert.unreadCounts();
+    res.json(counts);
   } catch (error) {
     res.status(500).json({ error: error.message });
   }
@@ -22,11 +40,11 @@ router.get('/', async (req, res) => {
 // GET single alert
 router.get('/:id', async (req, res) => {
   try {
-    const alert = await Alert.findById(req.params.id);
+    const alert = await Alert.findById(req.params.id).lean();
     if (!alert) {
       return res.status(404).json({ error: 'Alert not found' });
     }
-    res.json(alert);
+    sendJson(res, Alert, alert);
   } catch (error) {
     res.status(500).json({ error: error.message });
   }
@@ -43,8 +61,21 @@ router.post('/', async (req, res) => {
   }
 });
 
+// Mark many alerts as read in one update: { ids: [...] } or { type, category, before }
+const markManyRead = async (req, res) => {
+  try {
+    const result = await Alert.markRead(req.body || {});
+    res.json(result);
+  } catch (error) {
+    res.status(error.status || 500).json({ error: error.message });
+  }
+};
+
+router.patch('/read', markManyRead);
+router.put('/read', markManyRead);
+
 // Mark alert as read
-router.put('/:id/read', async (req, res) => {
+const markRead = async (req, res) => {
   try {
     const alert = await Alert.findByIdAndUpdate(
       req.params.id,
@@ -58,70 +89,19 @@ router.put('/:id/read', async (req, res) => {
   } catch (error) {
     res.status(400).json({ error: error.message });
   }
-});
+};
+
+router.patch('/:id/read', markRead);
+router.put('/:id/read', markRead);
 
-// Auto-generate system alerts
+// Generate alerts from the rules in utils/alertRules.js; only documents changed
+// since the last run are examined unless ?full=true
 router.post('/generate', async (req, res) => {
   try {
-    const Inventory = require('../models/Inventory');
-    const Machine = require('../models/Machine');
-
-    const generatedAlerts = [];
-
-    // Check inventory for low stock
-    const lowStockItems = await Inventory.find({
-      status: { $in: ['low', 'critical'] }
-    });
-
-    for (const item of lowStockItems) {
-      const existingAlert = await Alert.findOne({
-        category: 'inventory',
-        relatedId: item._id.toString(),
-        read: false
-      });
-
-      if (!existingAlert) {
-        const alert = new Alert({
-          type: item.status === 'critical' ? 'critical' : 'warning',
-          category: 'inventory',
-          title: `${item.status === 'critical' ? 'Critical' : 'Low'} Stock Level`,
-          message: `${item.name} is at ${item.stockLevel}% stock level (${item.stock} kg remaining)`,
-          actionable: true,
-          relatedId: item._id.toString()
-        });
-        await alert.save();
-        generatedAlerts.push(alert);
-      }
-    }
-
-    // Check machines for low efficiency
-    const machines = await Machine.find({ status: 'running' });
-    for (const machine of machines) {
-      if (machine.efficiency < 85 && machine.efficiency > 0) {
-        const existingAlert = await Alert.findOne({
-          category: 'machine',
-          relatedId: machine._id.toString(),
-          read: false
-        });
-
-        if (!existingAlert) {
-          const alert = new Alert({
-            type: 'warning',
-            category: 'machine',
-            title: 'Machine Efficiency Drop',
-            message: `${machine.name} efficiency dropped to ${machine.efficiency}% - below threshold`,
-            actionable: true,
-            relatedId: machine._id.toString()
-          });
-          await alert.save();
-          generatedAlerts.push(alert);
-        }
-      }
-    }
-
+    const result = await generateAlerts({ full: req.query.full === 'true' });
     res.json({
-      message: `Generated ${generatedAlerts.length} new alerts`,
-      alerts: generatedAlerts
+      message: `Generated ${result.created} new alerts`,
+      ...result
     });
   } catch (error) {
     res.status(500).json({ error: error.message });
@@ -135,6 +115,7 @@ router.delete('/:id', async (req, res) => {
     if (!alert) {
       return res.status(404).json({ error: 'Alert not found' });
     }
+    await Tombstone.record('alerts', alert._id);
     res.json({ message: 'Alert deleted successfully' });
   } catch (error) {
     res.status(500).json({ error: error.message });
@@ -1,59 +1,66 @@
 const express = require('express');
 const router = express.Router();
 const Batch = require('../models/Batch');
+const Tombstone = require('../models/Tombstone');
+const { streamExport } = require('../utils/exporter');
+const { sendJson } = require('../utils/serializers');
+const { cached, invalidateOnWrite } = require('../middleware/cache');
+
+router.use(invalidateOnWrite('batches'));
+
+// Build a batch filter from status, party, startDate and endDate
+function batchQuery({ status, party, startDate, endDate }) {
+    let query = {};
+
+    if (status) query.status = status;
+    if (party) query.party = party;
+    if (startDate || endDate) {
+        query.date = {};
+        if (startDate) query.date.$gte = startDate;
+        if (endDate) query.date.$lte = endDate;
+    }
+
+    return query;
+}
 
 // GET all batches with optional filters
 router.get('/', async (req, res) => {
     try {
-        const { status, party, startDate, endDate } = req.query;
-        let query = {};
-
-        if (status) query.status = status;
-        if (party) query.party = party;
-        if (startDate || endDate) {
-            query.date = {};
-            if (startDate) query.date.$gte = startDate;
-            if (endDate) query.date.$lte = endDate;
-        }
-
-        const batches = await Batch.find(query).sort({ createdAt: -1 });
-        res.json(batches);
+        const query = batchQuery(req.query);
+        const batches = await Batch.find(query).sort({ createdAt: -1 }).lean();
+        sendJson(res, Batch, batches);
     } catch (error) {
         res.status(500).json({ error: error.message });
     }
 });
 
 // GET batch statistics
-router.get('/stats', async (req, res) => {
+router.get('/stats', cached('batches'), async (req, res) => {
     try {
-        const batches = await Batch.find();
-        const completedBatches = batches.filter(b => b.status === 'completed');
-
-        const stats = {
-            total: batches.length,
-            completed: completedBatches.length,
-            rejected: batches.filter(b => b.status === 'rejected').length,
-            inProgress: batches.filter(b => b.status === 'in-progress').length,
-            avgEfficiency: completedBatches.length > 0
-                ? Math.round(completedBatches.reduce((sum, b) => sum + b.efficiency, 0) / completedBatches.length)
-                : 0,
-            totalQuantity: batches.reduce((sum, b) => sum + parseFloat(b.quantity), 0)
-        };
-
+        const stats = await Batch.getStats();
         res.json(stats);
     } catch (error) {
         res.status(500).json({ error: error.message });
     }
 });
 
+// GET streaming export of batch history (format=ndjson|csv, same filters as list)
+router.get('/export', async (req, res) => {
+    try {
+        await streamExport(Batch, batchQuery(req.query), { createdAt: -1 }, req, res);
+    } catch (error) {
+        res.status(error.status || 500).json({ error: error.message });
+    }
+});
+
 // GET single batch by ID
 router.get('/:id', async (req, res) => {
     try {
-        const batch = await Batch.findById(req.params.id);
+        const batch = await Batch.findById(req.params.id).lean();
         if (!batch) {
             return res.status(404).json({ error: 'Batch not found' });
         }
-        res.json(batch);
+        sendJson(res, Batch, batch);
     } catch (error) {
         res.status(500).json({ error: error.message });
     }
@@ -94,6 +101,7 @@ router.delete('/:id', async (req, res) => {
         if (!batch) {
             return res.status(404).json({ error: 'Batch not found' });
         }
+        await Tombstone.record('batches', batch._id);
         res.json({ message: 'Batch deleted successfully' });
     } catch (error) {
         res.status(500).json({ error: error.message });
@@ -0,0 +1,133 @@
+const express = require('express');
+const mongoose = require('mongoose');
+const router = express.Router();
+
+const Batch = require('../models/Batch');
+const Schedule = require('../models/Schedule');
+const Inventory = require('../models/Inventory');
+const Machine = require('../models/Machine');
+const Inspection = require('../models/Inspection');
+const Alert = require('../models/Alert');
+const Tombstone = require('../models/Tombstone');
+
+const { EJSON } = mongoose.mongo.BSON;
+
+const COLLECTIONS = {
+  batches: Batch,
+  schedules: Schedule,
+  inventory: Inventory,
+  machines: Machine,
+  inspections: Inspection,
+  alerts: Alert
+};
+
+// Documents per collection per response; clients keep polling while hasMore
+const PAGE_SIZE = 1000;
+
+// Writes stamp updatedAt before they commit, so a new token trails the clock
+// by this much to pick up writes that were still in flight during the read
+const SKEW_MS = 5000;
+
+function badRequest(message, status = 400) {
+  const error = new Error(message);
+  error.status = status;
+  return error;
+}
+
+// A token holds one (timestamp, _id) keyset position per collection plus one
+// for tombstones. A null _id means "strictly after timestamp".
+function encodeToken(positions) {
+  return Buffer.from(EJSON.stringify(positions)).toString('base64url');
+}
+
+function decodeToken(token) {
+  let positions;
+  try {
+    positions = EJSON.parse(Buffer.from(token, 'base64url').toString());
+  } catch (error) {
+    throw badRequest('Invalid sync token');
+  }
+
+  const valid = positions && typeof positions === 'object' && Object.values(positions).every((position) =>
+    position && typeof position === 'object' &&
+    position.ts instanceof Date && (position.id === null || mongoose.isObjectIdOrHexString(position.id))
+  );
+  if (!valid) throw badRequest('Invalid sync token');
+  return positions;
+}
+
+function afterPosition(field, position) {
+  if (!position) return {};
+  if (!position.id) return { [field]: { $gt: position.ts } };
+  return {
+    $or: [
+      { [field]: { $gt: position.ts } },
+      { [field]: position.ts, _id: { $gt: position.id } }
+    ]
+  };
+}
+
+// Next position: the last document read when the page was full, otherwise
+// the skew-adjusted read time (never moving backwards)
+function nextPosition(previous, docs, field, horizon) {
+  if (docs.length === PAGE_SIZE) {
+    const last = docs[docs.length - 1];
+    return { ts: last[field], id: last._id };
+  }
+  if (previous && previous.ts > horizon) return previous;
+  return { ts: horizon, id: null };
+}
+
+async function readPage(Model, field, position, filter = {}) {
+  return Model.find({ ...filter, ...afterPosition(field, position) })
+    .sort({ [field]: 1, _id: 1 })
+    .limit(PAGE_SIZE)
+    .lean();
+}
+
+// GET documents created, updated or deleted since a sync token.
+// Omit since for an initial full sync. collections=a,b restricts the sync;
+// keep passing the same list with the tokens it returns.
+router.get('/', async (req, res) => {
+  try {
+    const positions = req.query.since ? decodeToken(req.query.since) : {};
+    const names = req.query.collections
+      ? String(req.query.collections).split(',').filter((name) => COLLECTIONS[name])
+      : Object.keys(COLLECTIONS);
+
+    const now = Date.now();
+    if (positions.tombstones && positions.tombstones.ts < new Date(now - Tombstone.retentionMs())) {
+      throw badRequest('Sync token has expired; reload the full dataset', 410);
+    }
+    const horizon = new Date(now - SKEW_MS);
+
+    const [pages, tombstones] = await Promise.all([
+      Promise.all(names.map((name) => readPage(COLLECTIONS[name], 'updatedAt', positions[name]))),
+      readPage(Tombstone, 'deletedAt', positions.tombstones, { collectionName: { $in: names } })
+    ]);
+
+    const next = { ...positions };
+    const changes = {};
+    const deleted = {};
+    names.forEach((name, i) => {
+      changes[name] = pages[i];
+      deleted[name] = [];
+      next[name] = nextPosition(positions[name], pages[i], 'updatedAt', horizon);
+    });
+    for (const tombstone of tombstones) {
+      if (deleted[tombstone.collectionName]) deleted[tombstone.collectionName].push(tombstone.docId);
+    }
+    next.tombstones = nextPosition(positions.tombstones, tombstones, 'deletedAt', horizon);
+
+    res.json({
+      token: encodeToken(next),
+      hasMore: tombstones.length === PAGE_SIZE || pages.some((page) => page.length === PAGE_SIZE),
+      changes,
+      deleted
+    });
+  } catch (error) {
+    res.status(error.status || 500).json({ error: error.message });
+  }
+});
+
+module.exports = router;
@@ -0,0 +1,28 @@
+const express = require('express');
+const router = express.Router();
+
+const Batch = require('../models/Batch');
+const Machine = require('../models/Machine');
+const Inventory = require('../models/Inventory');
+const Inspection = require('../models/Inspection');
+const { cached } = require('../middleware/cache');
+
+// GET everything the Dashboard shows in one response, computed concurrently.
+// One cache entry is shared by every screen and dropped by writes to any of
+// the four collections.
+router.get('/summary', cached('batches', 'machines', 'inventory', 'inspections'), async (req, res) => {
+  try {
+    const [batchStats, machineStats, inventoryAlerts, inspectionStats] = await Promise.all([
+      Batch.getStats(),
+      Machine.getStats(),
+      Inventory.lowStock(),
+      Inspection.getStats()
+    ]);
+
+    res.json({ batchStats, machineStats, inventoryAlerts, inspectionStats });
+  } catch (error) {
+    res.status(500).json({ error: error.message });
+  }
+});
+
+module.exports = router;
@@ -2,6 +2,15 @@ const express = require('express');
 const router = express.Router();
 
 const Inspection = require('../models/Inspection');
+const Tombstone = require('../models/Tombstone');
+const { paginate } = require('../utils/pagination');
+const { sendJson } = require('../utils/serializers');
+const { streamExport } = require('../utils/exporter');
+const { cached, invalidateOnWrite } = require('../middleware/cache');
+const { bulkWrite, bulkStatus } = require('../utils/bulk');
+
+router.use(invalidateOnWrite('inspections'));
+
 // GET all inspections with optional status filter
 router.get('/', async (req, res) => {
   try {
@@ -10,46 +19,46 @@ router.get('/', async (req, res) => {
 
     if (status) query.status = status;
 
-    const inspections = await Inspection.find(query).sort({ createdAt: -1 });
-    res.json(inspections);
+    const inspections = await paginate(Inspection, query, { createdAt: -1 }, req.query, res, { lean: true });
+    sendJson(res, Inspection, inspections);
   } catch (error) {
-    res.status(500).json({ error: error.message });
+    res.status(error.status || 500).json({ error: error.message });
+  }
+});
+
+// GET inspection statistics (optional from, to, client, bucket=day|week)
+router.get('/stats', cached('inspections'), async (req, res) => {
+  try {
+    const { from, to, client, bucket } = req.query;
+    const stats = await Inspection.getStats({ from, to, client, bucket });
+    res.json(stats);
+  } catch (error) {
+    res.status(error.status || 500).json({ error: error.message });
   }
 });
 
-// GET inspection statistics
-router.get('/stats', async (req, res) => {
+// GET streaming export of inspections (format=ndjson|csv)
+router.get('/export', async (req, res) => {
   try {
-    const inspections = await Inspection.find();
-    const withDeltaE = inspections.filter(i => i.deltaE !== null && i.deltaE !== undefined);
+    const { status } = req.query;
+    let query = {};
 
-    const stats = {
-      total: inspections.length,
-      approved: inspections.filter(i => i.status === 'approved').length,
-      pending: inspections.filter(i => i.status === 'pending').length,
-      rejected: inspections.filter(i => i.status === 'rejected').length,
-      approvalRate: inspections.length > 0
-        ? Math.round((inspections.filter(i => i.status === 'approved').length / inspections.length) * 100)
-        : 0,
-      avgDeltaE: withDeltaE.length > 0
-        ? (withDeltaE.reduce((sum, i) => sum + i.deltaE, 0) / withDeltaE.length).toFixed(2)
-        : 0
-    };
+    if (status) query.status = status;
 
-    res.json(stats);
+    await streamExport(Inspection, query, { createdAt: -1 }, req, res);
   } catch (error) {
-    res.status(500).json({ error: error.message });
+    res.status(error.status || 500).json({ error: error.message });
   }
 });
 
 // GET single inspection
 router.get('/:id', async (req, res) => {
   try {
-    const inspection = await Inspection.findById(req.params.id);
+    const inspection = await Inspection.findById(req.params.id).lean();
     if (!inspection) {
       return res.status(404).json({ error: 'Inspection not found' });
     }
-    res.json(inspection);
+    sendJson(res, Inspection, inspection);
   } catch (error) {
     res.status(500).json({ error: error.message });
   }
@@ -66,6 +75,18 @@ router.post('/', async (req, res) => {
   }
 });
 
+// CREATE many inspections in one request (?upsert=true matches on lotNo + date)
+router.post('/bulk', async (req, res) => {
+  try {
+    const items = Array.isArray(req.body) ? req.body : req.body && req.body.items;
+    const upsert = req.query.upsert === 'true';
+    const result = await bulkWrite(Inspection, items, { upsertKeys: upsert ? ['lotNo', 'date'] : undefined });
+    res.status(bulkStatus(result, !upsert)).json(result);
+  } catch (error) {
+    res.status(error.status || 500).json({ error: error.message });
+  }
+});
+
 // UPDATE inspection (approve/reject, add deltaE)
 router.put('/:id', async (req, res) => {
   try {
@@ -90,6 +111,7 @@ router.delete('/:id', async (req, res) => {
     if (!inspection) {
       return res.status(404).json({ error: 'Inspection not found' });
     }
+    await Tombstone.record('inspections', inspection._id);
     res.json({ message: 'Inspection deleted successfully' });
   } catch (error) {
     res.status(500).json({ error: error.message });
@@ -2,6 +2,14 @@ const express = require('express');
 const router = express.Router();
 
 const Inventory = require('../models/Inventory');
+const Tombstone = require('../models/Tombstone');
+const { paginate } = require('../utils/pagination');
+const { sendJson } = require('../utils/serializers');
+const { cached, invalidateOnWrite } = require('../middleware/cache');
+const { bulkWrite, bulkStatus } = require('../utils/bulk');
+
+router.use(invalidateOnWrite('inventory'));
+
 // GET all inventory items with optional category filter
 router.get('/', async (req, res) => {
   try {
@@ -10,19 +18,17 @@ router.get('/', async (req, res) => {
 
     if (category) query.category = category;
 
-    const items = await Inventory.find(query).sort({ name: 1 });
-    res.json(items);
+    const items = await paginate(Inventory, query, { name: 1 }, req.query, res, { lean: true });
+    sendJson(res, Inventory, items);
   } catch (error) {
-    res.status(500).json({ error: error.message });
+    res.status(error.status || 500).json({ error: error.message });
   }
 });
 
 // GET low stock alerts
-router.get('/alerts', async (req, res) => {
+router.get('/alerts', cached('inventory'), async (req, res) => {
   try {
-    const lowStockItems = await Inventory.find({
-      status: { $in: ['low', 'critical'] }
-    }).sort({ stockLevel: 1 });
+    const lowStockItems = await Inventory.lowStock();
 
     res.json(lowStockItems);
   } catch (error) {
@@ -30,14 +36,24 @@ router.get('/alerts', async (req, res) => {
   }
 });
 
+// GET item counts and weekly usage per category
+router.get('/stats', cached('inventory'), async (req, res) => {
+  try {
+    const stats = await Inventory.getStats();
+    res.json(stats);
+  } catch (error) {
+    res.status(500).json({ error: error.message });
+  }
+});
+
 // GET single inventory item
 router.get('/:id', async (req, res) => {
   try {
-    const item = await Inventory.findById(req.params.id);
+    const item = await Inventory.findById(req.params.id).lean();
     if (!item) {
       return res.status(404).json({ error: 'Item not found' });
     }
-    res.json(item);
+    sendJson(res, Inventory, item);
   } catch (error) {
     res.status(500).json({ error: error.message });
   }
@@ -54,14 +70,26 @@ router.post('/', async (req, res) => {
   }
 });
 
+// CREATE many inventory items in one request (?upsert=true matches on name)
+router.post('/bulk', async (req, res) => {
+  try {
+    const items = Array.isArray(req.body) ? req.body : req.body && req.body.items;
+    const upsert = req.query.upsert === 'true';
+    const result = await bulkWrite(Inventory, items, {
+      upsertKeys: upsert ? ['name'] : undefined,
+      prepare: (item) => item.updateStockStatus(),
+      stages: Inventory.stockStatusStages()
+    });
+    res.status(bulkStatus(result, !upsert)).json(result);
+  } catch (error) {
+    res.status(error.status || 500).json({ error: error.message });
+  }
+});
+
 // UPDATE inventory item
 router.put('/:id', async (req, res) => {
   try {
-    const item = await Inventory.findByIdAndUpdate(
-      req.params.id,
-      req.body,
-      { new: true, runValidators: true }
-    );
+    const item = await Inventory.updateWithStatus(req.params.id, req.body);
     if (!item) {
       return res.status(404).json({ error: 'Item not found' });
     }
@@ -71,26 +99,31 @@ router.put('/:id', async (req, res) => {
   }
 });
 
-// Record daily usage
-router.post('/:id/usage', async (req, res) => {
+// RECORD usage of many items at once, e.g. every dye in a batch:
+// { day, items: [{ id or name, amount, day? }] }
+router.post('/usage', async (req, res) => {
   try {
-    const { day, amount } = req.body;
-    const item = await Inventory.findById(req.params.id);
+    const items = Array.isArray(req.body) ? req.body : req.body && req.body.items;
+    const result = await Inventory.recordUsageMany(items, req.body && req.body.day);
+    res.json(result);
+  } catch (error) {
+    res.status(error.status || 500).json({ error: error.message });
+  }
+});
 
-    if (!item) {
+// RECORD usage of one item: { day, amount }
+router.post('/:id/usage', async (req, res) => {
+  try {
+    const { item, reason } = await Inventory.recordUsage({ ...req.body, id: req.params.id });
+    if (reason === 'not found') {
       return res.status(404).json({ error: 'Item not found' });
     }
-
-    if (item.weeklyUsage[day] !== undefined) {
-      item.weeklyUsage[day] = amount;
-      item.stock -= amount;
-      await item.save();
-      res.json(item);
-    } else {
-      res.status(400).json({ error: 'Invalid day' });
+    if (!item) {
+      return res.status(409).json({ error: 'Insufficient stock' });
     }
+    res.json(item);
   } catch (error) {
-    res.status(400).json({ error: error.message });
+    res.status(error.status || 500).json({ error: error.message });
   }
 });
 
@@ -101,6 +134,7 @@ router.delete('/:id', async (req, res) => {
     if (!item) {
       return res.status(404).json({ error: 'Item not found' });
     }
+    await Tombstone.record('inventory', item._id);
     res.json({ message: 'Item deleted successfully' });
   } catch (error) {
     res.status(500).json({ error: error.message });
@@ -0,0 +1,31 @@
+const express = require('express');
+const router = express.Router();
+
+const Alert = require('../models/Alert');
+const Machine = require('../models/Machine');
+const { LiveFeed } = require('../utils/liveEvents');
+
+const feeds = {
+  alerts: new LiveFeed(Alert, 'alerts', ['type', 'category', 'read']),
+  machines: new LiveFeed(Machine, 'machines', ['machineId', 'status'])
+};
+
+// GET live alert events (SSE), optionally filtered by type, category, read
+router.get('/alerts', (req, res) => {
+  feeds.alerts.subscribe(req, res);
+});
+
+// GET live machine events (SSE), optionally filtered by machineId, status
+router.get('/machines', (req, res) => {
+  feeds.machines.subscribe(req, res);
+});
+
+// GET subscriber and delivery counters per feed
+router.get('/stats', (req, res) => {
+  res.json({
+    alerts: feeds.alerts.stats(),
+    machines: feeds.machines.stats()
+  });
+});
+
+module.exports = router;
@@ -2,33 +2,55 @@ const express = require('express');
 const router = express.Router();
 
 const Machine = require('../models/Machine');
-// GET all machines
+const Tombstone = require('../models/Tombstone');
+const { paginate } = require('../utils/pagination');
+const { sendJson } = require('../utils/serializers');
+const { cached, invalidateOnWrite } = require('../middleware/cache');
+const { MAX_ITEMS } = require('../utils/bulk');
+
+router.use(invalidateOnWrite('machines'));
+
+// Job fields for an assignment request
+function jobFields(body) {
+  return {
+    party: body.party,
+    color: body.color,
+    lotNo: body.lotNo,
+    quantity: body.quantity,
+    stage: body.stage || 'TD Load',
+    efficiency: 0,
+    runtime: 'Just started'
+  };
+}
+
+// Respond 404 or 409 for a single-machine transition that did not apply
+async function transitionFailure(res, id, expected) {
+  const exists = await Machine.exists({ _id: id });
+  if (!exists) {
+    return res.status(404).json({ error: 'Machine not found' });
+  }
+  res.status(409).json({ error: `Machine is not ${expected}` });
+}
+
+// GET all machines with optional status filter
 router.get('/', async (req, res) => {
   try {
-    const machines = await Machine.find().sort({ machineId: 1 });
-    res.json(machines);
+    const { status } = req.query;
+    let query = {};
+
+    if (status) query.status = status;
+
+    const machines = await paginate(Machine, query, { machineId: 1 }, req.query, res, { lean: true });
+    sendJson(res, Machine, machines);
   } catch (error) {
-    res.status(500).json({ error: error.message });
+    res.status(error.status || 500).json({ error: error.message });
   }
 });
 
 // GET machine statistics
-router.get('/stats', async (req, res) => {
+router.get('/stats', cached('machines'), async (req, res) => {
   try {
-    const machines = await Machine.find();
-    const runningMachines = machines.filter(m => m.status === 'running');
-
-    const stats = {
-      total: machines.length,
-      running: runningMachines.length,
-      idle: machines.filter(m => m.status === 'idle').length,
-      maintenance: machines.filter(m => m.status === 'maintenance').length,
-      avgEfficiency: runningMachines.length > 0
-        ? Math.round(runningMachines.reduce((sum, m) => sum + m.efficiency, 0) / runningMachines.length)
-        : 0,
-      totalProduction: runningMachines.reduce((sum, m) => sum + (parseInt(m.quantity) || 0), 0)
-    };
-
+    const stats = await Machine.getStats();
     res.json(stats);
   } catch (error) {
     res.status(500).json({ error: error.message });
@@ -38,11 +60,11 @@ router.get('/stats', async (req, res) => {
 // GET single machine
 router.get('/:id', async (req, res) => {
   try {
-    const machine = await Machine.findById(req.params.id);
+    const machine = await Machine.findById(req.params.id).lean();
     if (!machine) {
       return res.status(404).json({ error: 'Machine not found' });
     }
-    res.json(machine);
+    sendJson(res, Machine, machine);
   } catch (error) {
     res.status(500).json({ error: error.message });
   }
@@ -76,50 +98,62 @@ router.put('/:id', async (req, res) => {
   }
 });
 
-// Assign new job to machine
-router.post('/:id/job', async (req, res) => {
+// ASSIGN jobs to many idle machines: [{ id, party, color, lotNo, quantity, stage }]
+router.post('/jobs', async (req, res) => {
   try {
-    const machine = await Machine.findById(req.params.id);
-    if (!machine) {
-      return res.status(404).json({ error: 'Machine not found' });
+    const items = Array.isArray(req.body) ? req.body : req.body && req.body.jobs;
+    if (!Array.isArray(items) || items.length === 0) {
+      return res.status(400).json({ error: 'Expected a non-empty array of jobs' });
+    }
+    if (items.length > MAX_ITEMS) {
+      return res.status(400).json({ error: `At most ${MAX_ITEMS} jobs per request` });
+    }
+
+    const result = await Machine.assignJobs(items.map((item) => ({ id: item.id, job: jobFields(item) })));
+    res.json(result);
+  } catch (error) {
+    res.status(400).json({ error: error.message });
+  }
+});
+
+// COMPLETE jobs on many running machines: { ids: [...] }
+router.post('/jobs/complete', async (req, res) => {
+  try {
+    const ids = req.body && req.body.ids;
+    if (!Array.isArray(ids) || ids.length === 0) {
+      return res.status(400).json({ error: 'Expected a non-empty array of ids' });
+    }
+    if (ids.length > MAX_ITEMS) {
+      return res.status(400).json({ error: `At most ${MAX_ITEMS} ids per request` });
     }
 
-    machine.status = 'running';
-    machine.party = req.body.party;
-    machine.color = req.body.color;
-    machine.lotNo = req.body.lotNo;
-    machine.quantity = req.body.quantity;
-    machine.stage = req.body.stage || 'TD Load';
-    machine.efficiency = 0;
-    machine.runtime = 'Just started';
-    machine.startTime = new Date();
+    const result = await Machine.completeJobs(ids);
+    res.json(result);
+  } catch (error) {
+    res.status(400).json({ error: error.message });
+  }
+});
 
-    await machine.save();
+// ASSIGN job to machine (only while it is idle)
+router.post('/:id/job', async (req, res) => {
+  try {
+    const machine = await Machine.assignJob(req.params.id, jobFields(req.body));
+    if (!machine) {
+      return transitionFailure(res, req.params.id, 'idle');
+    }
     res.json(machine);
   } catch (error) {
     res.status(400).json({ error: error.message });
   }
 });
 
-// Complete job
+// COMPLETE job on machine (only while it is running)
 router.put('/:id/complete', async (req, res) => {
   try {
-    const machine = await Machine.findById(req.params.id);
+    const machine = await Machine.completeJob(req.params.id);
     if (!machine) {
-      return res.status(404).json({ error: 'Machine not found' });
+      return transitionFailure(res, req.params.id, 'running');
     }
-
-    machine.status = 'idle';
-    machine.party = '';
-    machine.color = '';
-    machine.lotNo = '';
-    machine.quantity = '';
-    machine.stage = '';
-    machine.efficiency = 0;
-    machine.runtime = '';
-    machine.startTime = null;
-
-    await machine.save();
     res.json(machine);
   } catch (error) {
     res.status(400).json({ error: error.message });
@@ -133,6 +167,7 @@ router.delete('/:id', async (req, res) => {
     if (!machine) {
       return res.status(404).json({ error: 'Machine not found' });
     }
+    await Tombstone.record('machines', machine._id);
     res.json({ message: 'Machine deleted successfully' });
   } catch (error) {
     res.status(500).json({ error: error.message });
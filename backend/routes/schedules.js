@@ -2,6 +2,16 @@ const express = require('express');
 const router = express.Router();
 
 const Schedule = require('../models/Schedule');
+const BookingLock = require('../models/BookingLock');
+const Tombstone = require('../models/Tombstone');
+const { paginate } = require('../utils/pagination');
+const { sendJson } = require('../utils/serializers');
+const { invalidateOnWrite } = require('../middleware/cache');
+const { bulkWrite, bulkStatus } = require('../utils/bulk');
+const { optimizeSchedule, bulkConflicts } = require('../utils/scheduler');
+
+router.use(invalidateOnWrite('schedules'));
+
 // GET all schedules with optional date filter
 router.get('/', async (req, res) => {
   try {
@@ -11,43 +21,31 @@ router.get('/', async (req, res) => {
     if (date) query.date = date;
     if (status) query.status = status;
 
-    const schedules = await Schedule.find(query).sort({ date: 1, time: 1 });
-    res.json(schedules);
+    const schedules = await paginate(Schedule, query, { date: 1, time: 1 }, req.query, res, { lean: true });
+    sendJson(res, Schedule, schedules);
   } catch (error) {
-    res.status(500).json({ error: error.message });
+    res.status(error.status || 500).json({ error: error.message });
   }
 });
 
-// GET week view for calendar
+// GET week view for calendar: 7 days from :date grouped by day and machine
 router.get('/week/:date', async (req, res) => {
   try {
-    const startDate = new Date(req.params.date);
-    const dates = [];
-
-    for (let i = 0; i < 7; i++) {
-      const date = new Date(startDate);
-      date.setDate(startDate.getDate() + i);
-      dates.push(date.toISOString().split('T')[0]);
-    }
-
-    const schedules = await Schedule.find({
-      date: { $in: dates }
-    }).sort({ date: 1, time: 1 });
-
-    res.json(schedules);
+    const week = await Schedule.getWeek(req.params.date);
+    res.json(week);
   } catch (error) {
-    res.status(500).json({ error: error.message });
+    res.status(error.status || 500).json({ error: error.message });
   }
 });
 
 // GET single schedule
 router.get('/:id', async (req, res) => {
   try {
-    const schedule = await Schedule.findById(req.params.id);
+    const schedule = await Schedule.findById(req.params.id).lean();
     if (!schedule) {
       return res.status(404).json({ error: 'Schedule not found' });
     }
-    res.json(schedule);
+    sendJson(res, Schedule, schedule);
   } catch (error) {
     res.status(500).json({ error: error.message });
   }
@@ -60,24 +58,54 @@ router.post('/', async (req, res) => {
     await schedule.save();
     res.status(201).json(schedule);
   } catch (error) {
-    res.status(400).json({ error: error.message });
+    res.status(error.status || 400).json({ error: error.message, conflicts: error.conflicts });
+  }
+});
+
+// CREATE many schedules in one request (?upsert=true matches on lotNo + date).
+// Items that would double-book a machine are reported as per-item errors;
+// the check and the write run under the machines' booking leases.
+router.post('/bulk', async (req, res) => {
+  try {
+    const items = Array.isArray(req.body) ? req.body : req.body && req.body.items;
+    const upsert = req.query.upsert === 'true';
+    const result = await bulkWrite(Schedule, items, {
+      upsertKeys: upsert ? ['lotNo', 'date'] : undefined,
+      prepare: (schedule) => schedule.setSlot(),
+      derived: ['startAt', 'endAt'],
+      check: (schedules) => bulkConflicts(schedules, { upsert }),
+      lock: (schedules, write) => BookingLock.withMachines(schedules.map((schedule) => schedule.machine), write)
+    });
+    res.status(bulkStatus(result, !upsert)).json(result);
+  } catch (error) {
+    res.status(error.status || 500).json({ error: error.message });
   }
 });
 
-// UPDATE schedule
+// OPTIMIZE: pack unscheduled lots onto available machines to minimize makespan
+// { lots: [{ lotNo, party, color, quantity, duration, priority }], from?, maintenance?, commit? }
+router.post('/optimize', async (req, res) => {
+  try {
+    const plan = await optimizeSchedule(req.body || {});
+    res.status(plan.committed ? 201 : 200).json(plan);
+  } catch (error) {
+    res.status(error.status || 500).json({ error: error.message, conflicts: error.conflicts });
+  }
+});
+
+// UPDATE schedule (saved through the model so the slot is recomputed and
+// checked for double-booking)
 router.put('/:id', async (req, res) => {
   try {
-    const schedule = await Schedule.findByIdAndUpdate(
-      req.params.id,
-      req.body,
-      { new: true, runValidators: true }
-    );
+    const schedule = await Schedule.findById(req.params.id);
     if (!schedule) {
       return res.status(404).json({ error: 'Schedule not found' });
     }
+    schedule.set(req.body);
+    await schedule.save();
     res.json(schedule);
   } catch (error) {
-    res.status(400).json({ error: error.message });
+    res.status(error.status || 400).json({ error: error.message, conflicts: error.conflicts });
   }
 });
 
@@ -88,6 +116,7 @@ router.delete('/:id', async (req, res) => {
     if (!schedule) {
       return res.status(404).json({ error: 'Schedule not found' });
     }
+    await Tombstone.record('schedules', schedule._id);
     res.json({ message: 'Schedule deleted successfully' });
   } catch (error) {
     res.status(500).json({ error: error.message });
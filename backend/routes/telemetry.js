@@ -0,0 +1,33 @@
+const express = require('express');
+const router = express.Router();
+
+const Telemetry = require('../models/Telemetry');
+
+// GET downsampled series: ?machines=SF-01,SF-02&from=&to=&points=
+// (default the last 12 hours, 300 points per machine)
+router.get('/', async (req, res) => {
+  try {
+    const series = await Telemetry.series(req.query);
+    res.json(series);
+  } catch (error) {
+    res.status(error.status || 500).json({ error: error.message });
+  }
+});
+
+// INGEST a batch of samples: either an array of
+// { machineId, at, temperature, stage, flow } or { machineId, samples: [...] }
+// for one machine. 201 when anything was stored; rejected samples are
+// reported by index.
+router.post('/', async (req, res) => {
+  try {
+    const body = req.body;
+    const result = Array.isArray(body)
+      ? await Telemetry.ingest(body)
+      : await Telemetry.ingest(body && body.samples, { machineId: body && body.machineId });
+    res.status(result.inserted > 0 ? 201 : 400).json(result);
+  } catch (error) {
+    res.status(error.status || 500).json({ error: error.message });
+  }
+});
+
+module.exports = router;
@@ -1,76 +1,80 @@
-const express = require('express');
+const cluster = require('cluster');
 const mongoose = require('mongoose');
-const cors = require('cors');
 require('dotenv').config();
 
-const app = express();
+const app = require('./app');
+const { closeFeeds } = require('./utils/liveEvents');
 
-// Middleware
-app.use(cors());
-app.use(express.json());
-app.use(express.urlencoded({ extended: true }));
+const PORT = process.env.PORT || 5000;
 
-// MongoDB Connection
-mongoose.connect(process.env.MONGODB_URI)
-    .then(() => console.log('✅ MongoDB Connected Successfully'))
-    .catch((err) => console.error('❌ MongoDB Connection Error:', err));
+// MongoDB connections per process; under cluster.js every worker has its own
+// pool, so the database sees workers x MONGODB_POOL_SIZE at most
+const POOL_SIZE = parseInt(process.env.MONGODB_POOL_SIZE, 10) || 10;
 
-// Import Routes
-const batchRoutes = require('./routes/batches');
-const scheduleRoutes = require('./routes/schedules');
-const inventoryRoutes = require('./routes/inventory');
-const machineRoutes = require('./routes/machines');
-const inspectionRoutes = require('./routes/inspections');
-const alertRoutes = require('./routes/alerts');
+// Connections opened (and kept open) before the server starts listening
+const MIN_POOL_SIZE = Math.min(POOL_SIZE, parseInt(process.env.MONGODB_MIN_POOL_SIZE, 10) || 2);
 
-// Mount Routes
-app.use('/api/batches', batchRoutes);
-app.use('/api/schedules', scheduleRoutes);
-app.use('/api/inventory', inventoryRoutes);
-app.use('/api/machines', machineRoutes);
-app.use('/api/inspections', inspectionRoutes);
-app.use('/api/alerts', alertRoutes);
+// How long in-flight requests get to finish on shutdown before their
+// connections are cut
+const DRAIN_TIMEOUT_MS = parseInt(process.env.DRAIN_TIMEOUT_MS, 10) || 10000;
 
-// Root Route
-app.get('/', (req, res) => {
-    res.json({
-        message: 'Premier Textile Dyers API',
-        version: '1.0.0',
-        endpoints: {
-            batches: '/api/batches',
-            schedules: '/api/schedules',
-            inventory: '/api/inventory',
-            machines: '/api/machines',
-            inspections: '/api/inspections',
-            alerts: '/api/alerts'
-        }
-    });
-});
+const workerLabel = cluster.isWorker ? ` (worker ${cluster.worker.id}, pid ${process.pid})` : '';
 
-// Error Handling Middleware
-app.use((err, req, res, next) => {
-    console.error(err.stack);
-    res.status(err.status || 500).json({
-        error: {
-            message: err.message || 'Internal Server Error',
-            status: err.status || 500
-        }
-    });
-});
+// Connect and warm the pool: concurrent pings each check out a connection,
+// so the first requests do not pay for the handshakes
+async function connectDatabase() {
+    await mongoose.connect(process.env.MONGODB_URI, { maxPoolSize: POOL_SIZE, minPoolSize: MIN_POOL_SIZE });
+    await Promise.all(Array.from({ length: MIN_POOL_SIZE }, () => mongoose.connection.db.admin().ping()));
+    console.log(`✅ MongoDB Connected Successfully (pool ${MIN_POOL_SIZE}-${POOL_SIZE})${workerLabel}`);
+}
+
+// Stop accepting connections, let in-flight requests finish, then close the
+// pool. Keep-alive connections are closed as soon as they go idle; live
+// event streams are ended so their clients reconnect to another process.
+function drain(server) {
+    let draining = false;
+    return () => {
+        if (draining) return;
+        draining = true;
+        console.log(`⏳ Draining${workerLabel}`);
+
+        const idle = setInterval(() => server.closeIdleConnections(), 250);
+        const forced = setTimeout(() => server.closeAllConnections(), DRAIN_TIMEOUT_MS);
 
-// 404 Handler
-app.use((req, res) => {
-    res.status(404).json({
-        error: {
-            message: 'Route not found',
-            status: 404
-        }
+        server.close(async () => {
+            clearInterval(idle);
+            clearTimeout(forced);
+            await mongoose.disconnect();
+            process.exit(0);
+        });
+        closeFeeds();
+        server.closeIdleConnections();
+    };
+}
+
+async function start() {
+    // Readiness gate: no listening socket until the database is usable
+    try {
+        await connectDatabase();
+    } catch (err) {
+        console.error('❌ MongoDB Connection Error:', err);
+        process.exit(1);
+    }
+
+    const server = app.listen(PORT, () => {
+        console.log(`🚀 Server running on port ${PORT}${workerLabel}`);
+        console.log(`📍 API available at http://localhost:${PORT}`);
+        if (cluster.isWorker) process.send({ type: 'ready' });
     });
-});
 
-// Start Server
-const PORT = process.env.PORT || 5000;
-app.listen(PORT, () => {
-    console.log(`🚀 Server running on port ${PORT}`);
-    console.log(`📍 API available at http://localhost:${PORT}`);
-});
+    const shutdown = drain(server);
+    process.once('SIGTERM', shutdown);
+    process.once('SIGINT', shutdown);
+    if (cluster.isWorker) {
+        process.on('message', (message) => {
+            if (message && message.type === 'shutdown') shutdown();
+        });
+    }
+}
+
+start();
@@ -0,0 +1,269 @@
+// Rule-based alert generation (POST /api/alerts/generate).
+//
+// Each rule maps a source document to the alert it should currently have in
+// one category, or to none. A run only examines documents changed since the
+// source's checkpoint (plus machines that crossed the running-time limit in
+// the meantime), compares the outcome with the alerts that already exist for
+// them, and writes only the difference: new alerts are upserted by
+// category + relatedId, changed ones updated in place and alerts whose
+// condition has cleared are removed. Rerunning never duplicates an alert.
+const Alert = require('../models/Alert');
+const AlertRuleState = require('../models/AlertRuleState');
+const Inspection = require('../models/Inspection');
+const Inventory = require('../models/Inventory');
+const Machine = require('../models/Machine');
+const Tombstone = require('../models/Tombstone');
+
+const MAX_RUN_HOURS = parseFloat(process.env.ALERT_MAX_RUN_HOURS) || 12;
+const DELTA_E_LIMIT = parseFloat(process.env.ALERT_DELTA_E_LIMIT) || 1.0;
+const MIN_EFFICIENCY = 85;
+
+const MAX_RUN_MS = MAX_RUN_HOURS * 60 * 60 * 1000;
+
+// Documents evaluated per existing-alert lookup and bulkWrite
+const CHUNK_SIZE = 1000;
+
+const DUPLICATE_KEY = 11000;
+
+// Writes stamp updatedAt before they commit, so each run reaches this far
+// behind the previous checkpoint to pick up writes that were in flight
+const SKEW_MS = 5000;
+
+const SOURCES = [
+    {
+        name: 'inventory',
+        Model: Inventory,
+        fields: 'name status stock stockLevel',
+        rules: [
+            {
+                category: 'inventory',
+                evaluate: (item) => {
+                    if (item.status !== 'low' && item.status !== 'critical') return null;
+                    const critical = item.status === 'critical';
+                    return {
+                        type: critical ? 'critical' : 'warning',
+                        title: `${critical ? 'Critical' : 'Low'} Stock Level`,
+                        message: `${item.name} is at ${item.stockLevel}% stock level (${item.stock} kg remaining)`,
+                        actionable: true
+                    };
+                }
+            }
+        ]
+    },
+    {
+        name: 'machines',
+        Model: Machine,
+        fields: 'name status lotNo efficiency startTime',
+        // Machines that crossed the running-time limit since the last run
+        // have not been written to, so they are selected by startTime
+        due: (since, now) => ({
+            status: 'running',
+            startTime: { $gt: new Date(since.getTime() - MAX_RUN_MS), $lte: new Date(now.getTime() - MAX_RUN_MS) }
+        }),
+        rules: [
+            {
+                category: 'maintenance',
+                evaluate: (machine) => {
+                    if (machine.status !== 'maintenance') return null;
+                    return {
+                        type: 'warning',
+                        title: 'Machine Under Maintenance',
+                        message: `${machine.name} is under maintenance and unavailable for scheduling`,
+                        actionable: false
+                    };
+                }
+            },
+            {
+                category: 'machine',
+                evaluate: (machine, now) => {
+                    if (machine.status !== 'running') return null;
+                    if (machine.startTime && now - machine.startTime >= MAX_RUN_MS) {
+                        return {
+                            type: 'critical',
+                            title: 'Batch Running Too Long',
+                            message: `${machine.name} has been running lot ${machine.lotNo} since ${machine.startTime.toISOString()}, over the ${MAX_RUN_HOURS}h limit`,
+                            actionable: true
+                        };
+                    }
+                    if (machine.efficiency > 0 && machine.efficiency < MIN_EFFICIENCY) {
+                        return {
+                            type: 'warning',
+                            title: 'Machine Efficiency Drop',
+                            message: `${machine.name} efficiency dropped to ${machine.efficiency}% - below threshold`,
+                            actionable: true
+                        };
+                    }
+                    return null;
+                }
+            }
+        ]
+    },
+    {
+        name: 'inspections',
+        Model: Inspection,
+        fields: 'lotNo color client status deltaE',
+        rules: [
+            {
+                category: 'quality',
+                evaluate: (inspection) => {
+                    if (inspection.status !== 'rejected' || !(inspection.deltaE > DELTA_E_LIMIT)) return null;
+                    return {
+                        type: 'critical',
+                        title: 'High ΔE Rejection',
+                        message: `Lot ${inspection.lotNo} (${inspection.color}, ${inspection.client}) rejected at ΔE ${inspection.deltaE.toFixed(2)}, limit ${DELTA_E_LIMIT}`,
+                        actionable: true
+                    };
+                }
+            }
+        ]
+    }
+];
+
+const key = (category, relatedId) => `${category}:${relatedId}`;
+
+const changed = (current, desired) => Object.keys(desired).some((field) => current[field] !== desired[field]);
+
+// Existing alerts for the given source documents, grouped by category + relatedId
+async function existingAlerts(source, relatedIds) {
+    const alerts = await Alert.find({
+        category: { $in: source.rules.map((rule) => rule.category) },
+        relatedId: { $in: relatedIds }
+    }).select('category relatedId type title message actionable').lean();
+
+    const byKey = new Map();
+    for (const alert of alerts) {
+        const k = key(alert.category, alert.relatedId);
+        if (!byKey.has(k)) byKey.set(k, []);
+        byKey.get(k).push(alert);
+    }
+    return byKey;
+}
+
+// Overlapping runs (cluster workers, or a timer and a request) can both find
+// no alert for a document and both upsert one. The unique category +
+// relatedId index rejects the second insert; retrying that upsert once
+// matches the alert the other run created and updates it instead.
+async function writeAlerts(ops, stats) {
+    let pending = ops;
+    for (let attempt = 0; pending.length > 0; attempt++) {
+        try {
+            await Alert.bulkWrite(pending, { ordered: false });
+            return;
+        } catch (error) {
+            const writeErrors = [].concat(error.writeErrors || []);
+            if (attempt > 0 || writeErrors.length === 0 || writeErrors.some((e) => e.code !== DUPLICATE_KEY)) throw error;
+            pending = writeErrors.map((e) => pending[e.index]);
+            stats.created -= pending.length;
+        }
+    }
+}
+
+// Apply the alert writes and remove alerts whose condition cleared, leaving
+// tombstones for delta sync
+async function resolve(ops, resolvedIds, stats) {
+    if (ops.length > 0) await writeAlerts(ops, stats);
+    if (resolvedIds.length > 0) {
+        await Tombstone.insertMany(resolvedIds.map((id) => ({ collectionName: 'alerts', docId: String(id) })));
+        stats.resolved += resolvedIds.length;
+    }
+}
+
+async function processChunk(source, docs, now, stats) {
+    const byKey = await existingAlerts(source, docs.map((doc) => String(doc._id)));
+    const ops = [];
+    const resolvedIds = [];
+
+    for (const doc of docs) {
+        const relatedId = String(doc._id);
+        for (const rule of source.rules) {
+            const desired = rule.evaluate(doc, now);
+            const current = byKey.get(key(rule.category, relatedId));
+            const filter = { category: rule.category, relatedId };
+
+            if (desired && !current) {
+                ops.push({ updateOne: { filter, update: { $set: desired, $setOnInsert: { read: false } }, upsert: true } });
+                stats.created++;
+            } else if (desired && changed(current[0], desired)) {
+                // A change of severity is news again, even if the old alert was read
+                const update = current[0].type === desired.type ? desired : { ...desired, read: false };
+                ops.push({ updateMany: { filter, update: { $set: update } } });
+                stats.updated++;
+            } else if (!desired && current) {
+                ops.push({ deleteMany: { filter } });
+                resolvedIds.push(...current.map((alert) => alert._id));
+            }
+        }
+    }
+
+    await resolve(ops, resolvedIds, stats);
+}
+
+// Alerts of source documents deleted since the checkpoint
+async function resolveDeleted(source, since, stats) {
+    const deleted = await Tombstone.find({ collectionName: source.name, deletedAt: { $gte: since } }).select('docId').lean();
+    if (deleted.length === 0) return;
+
+    const alerts = await Alert.find({
+        category: { $in: source.rules.map((rule) => rule.category) },
+        relatedId: { $in: deleted.map((tombstone) => tombstone.docId) }
+    }).select('_id').lean();
+
+    const ids = alerts.map((alert) => alert._id);
+    await resolve(ids.length > 0 ? [{ deleteMany: { filter: { _id: { $in: ids } } } }] : [], ids, stats);
+}
+
+async function runSource(source, { full, now }) {
+    const start = Date.now();
+    const stats = { scanned: 0, created: 0, updated: 0, resolved: 0 };
+
+    const state = full ? null : await AlertRuleState.findById(source.name).lean();
+    const since = state ? new Date(state.checkpoint.getTime() - SKEW_MS) : null;
+
+    const filter = since
+        ? { $or: [{ updatedAt: { $gte: since } }, ...(source.due ? [source.due(since, now)] : [])] }
+        : {};
+    const cursor = source.Model.find(filter).select(source.fields).lean().cursor({ batchSize: CHUNK_SIZE });
+
+    let chunk = [];
+    for await (const doc of cursor) {
+        chunk.push(doc);
+        if (chunk.length >= CHUNK_SIZE) {
+            await processChunk(source, chunk, now, stats);
+            stats.scanned += chunk.length;
+            chunk = [];
+        }
+    }
+    if (chunk.length > 0) {
+        await processChunk(source, chunk, now, stats);
+        stats.scanned += chunk.length;
+    }
+
+    if (since) await resolveDeleted(source, since, stats);
+
+    stats.durationMs = Date.now() - start;
+    await AlertRuleState.updateOne(
+        { _id: source.name },
+        { $max: { checkpoint: now }, $set: { lastRun: stats } },
+        { upsert: true }
+    );
+    return stats;
+}
+
+// Evaluate every rule against documents changed since the last run, or
+// against everything with full: true. Resolves to per-source and total counts.
+async function generateAlerts({ full = false } = {}) {
+    const start = Date.now();
+    const now = new Date();
+
+    const results = await Promise.all(SOURCES.map((source) => runSource(source, { full, now })));
+
+    const summary = { full, scanned: 0, created: 0, updated: 0, resolved: 0, sources: {} };
+    SOURCES.forEach((source, i) => {
+        summary.sources[source.name] = results[i];
+        for (const field of ['scanned', 'created', 'updated', 'resolved']) summary[field] += results[i][field];
+    });
+    summary.durationMs = Date.now() - start;
+    return summary;
+}
+
+module.exports = { generateAlerts };
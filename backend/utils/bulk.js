@@ -0,0 +1,187 @@
+const { timeDriverCall } = require('../middleware/metrics');
+
+const MAX_ITEMS = 5000;
+
+const DUPLICATE_KEY = 11000;
+
+function badRequest(message) {
+    const error = new Error(message);
+    error.status = 400;
+    return error;
+}
+
+function isPlainObject(value) {
+    return value !== null && typeof value === 'object' && Object.getPrototypeOf(value) === Object.prototype;
+}
+
+// Write errors reported by the driver, mapped back to request positions
+function writeErrors(error, positions) {
+    if (!error.writeErrors) throw error;
+    return [].concat(error.writeErrors).map((writeError) => ({
+        index: positions[writeError.index],
+        message: writeError.errmsg || writeError.message
+    }));
+}
+
+// Pipeline update that sets the fields supplied in the request (and the
+// derived ones), fills schema defaults only on insert, and maintains timestamps
+function upsertPipeline(raw, doc, stages, derived) {
+    const values = doc.toObject({ depopulate: true });
+    const set = { updatedAt: '$$NOW', createdAt: { $ifNull: ['$createdAt', '$$NOW'] } };
+
+    for (const [field, value] of Object.entries(values)) {
+        if (field === '_id' || field === 'createdAt' || field === 'updatedAt') continue;
+        set[field] = field in raw || derived.includes(field)
+            ? { $literal: value }
+            : { $ifNull: [`$${field}`, { $literal: value }] };
+    }
+    return [{ $set: set }, ...stages];
+}
+
+// Unordered upserts, adding the driver's counts to result. Items repeating a
+// natural key go out in later waves, after the earlier occurrence is written,
+// so a key listed twice in one request is inserted once and then updated, as
+// if the rows were applied in order. An upsert that fails on a unique index
+// (another request inserted the same key first) is retried once, which
+// matches and updates that document instead. items is [{ op, key, index }].
+async function upsertAll(Model, items, result, errors) {
+    const waves = [];
+    const seen = new Map();
+    for (const item of items) {
+        const occurrence = seen.get(item.key) || 0;
+        seen.set(item.key, occurrence + 1);
+        if (!waves[occurrence]) waves[occurrence] = [];
+        waves[occurrence].push(item);
+    }
+
+    for (const wave of waves) {
+        let pending = wave;
+        for (let attempt = 0; pending.length > 0; attempt++) {
+            let written;
+            let failed = [];
+            try {
+                written = await timeDriverCall(Model, 'bulkWrite', () => Model.collection.bulkWrite(pending.map(({ op }) => op), { ordered: false }));
+            } catch (error) {
+                if (!error.writeErrors) throw error;
+                written = error.result;
+                failed = [].concat(error.writeErrors);
+            }
+            if (written) {
+                result.upserted += written.upsertedCount || 0;
+                result.matched += written.matchedCount || 0;
+                result.modified += written.modifiedCount || 0;
+            }
+
+            const retry = [];
+            for (const writeError of failed) {
+                const item = pending[writeError.index];
+                if (writeError.code === DUPLICATE_KEY && attempt === 0) {
+                    retry.push(item);
+                } else {
+                    errors.push({ index: item.index, message: writeError.errmsg || writeError.message });
+                }
+            }
+            pending = retry;
+        }
+    }
+}
+
+// Documents are already cast and validated, so both paths go straight to the driver
+async function writeRows(Model, rows, { upsertKeys, derived, stages }, result, errors) {
+    if (upsertKeys) {
+        const ops = rows.map(({ index, raw, doc }) => ({
+            index,
+            key: JSON.stringify(upsertKeys.map((key) => doc.get(key))),
+            op: {
+                updateOne: {
+                    filter: Object.fromEntries(upsertKeys.map((key) => [key, doc.get(key)])),
+                    update: upsertPipeline(raw, doc, stages, derived),
+                    upsert: true
+                }
+            }
+        }));
+        await upsertAll(Model, ops, result, errors);
+    } else {
+        const now = new Date();
+        const positions = rows.map(({ index }) => index);
+        const docs = rows.map(({ doc }) => ({ ...doc.toObject({ depopulate: true }), createdAt: now, updatedAt: now }));
+
+        try {
+            const written = await timeDriverCall(Model, 'insertMany', () => Model.collection.insertMany(docs, { ordered: false }));
+            result.inserted = written.insertedCount;
+        } catch (error) {
+            errors.push(...writeErrors(error, positions));
+            result.inserted = error.result ? error.result.insertedCount : 0;
+        }
+    }
+}
+
+// Validate and write many documents in one unordered round trip.
+//
+// Options:
+//   upsertKeys - natural key fields; when set, each item is upserted by them
+//   prepare    - called on each document before insert (derived fields)
+//   derived    - fields set by prepare that upserts must always overwrite
+//   stages     - extra update-pipeline stages applied to upserts
+//   check      - async (docs) => Map of position in docs to a reason; those
+//                valid documents are reported as errors instead of written
+//   lock       - (docs, write) => promise running write() while holding
+//                whatever keeps check's answer true until the write lands
+//
+// Resolves to per-item counts and errors ({ index, message }); one bad item
+// never prevents the others from being written.
+async function bulkWrite(Model, items, { upsertKeys, prepare, derived = [], stages = [], check, lock } = {}) {
+    if (!Array.isArray(items) || items.length === 0) throw badRequest('Expected a non-empty array of items');
+    if (items.length > MAX_ITEMS) throw badRequest(`At most ${MAX_ITEMS} items per request`);
+
+    const errors = [];
+    const valid = [];
+    items.forEach((raw, index) => {
+        if (!isPlainObject(raw)) {
+            errors.push({ index, message: 'Expected an object' });
+            return;
+        }
+
+        const doc = new Model(raw);
+        if (prepare) prepare(doc);
+
+        const invalid = doc.validateSync();
+        const missingKey = upsertKeys && upsertKeys.find((key) => raw[key] === undefined || raw[key] === '');
+        if (invalid) {
+            errors.push({ index, message: invalid.message });
+        } else if (missingKey) {
+            errors.push({ index, message: `Missing natural key field: ${missingKey}` });
+        } else {
+            valid.push({ index, raw, doc });
+        }
+    });
+
+    const result = { received: items.length, inserted: 0, upserted: 0, matched: 0, modified: 0 };
+
+    const write = async () => {
+        let rows = valid;
+        if (check) {
+            const rejected = await check(valid.map(({ doc }) => doc));
+            for (const [position, message] of rejected) errors.push({ index: valid[position].index, message });
+            rows = valid.filter((row, position) => !rejected.has(position));
+        }
+        if (rows.length > 0) await writeRows(Model, rows, { upsertKeys, derived, stages }, result, errors);
+    };
+
+    if (valid.length > 0) {
+        await (lock ? lock(valid.map(({ doc }) => doc), write) : write());
+    }
+
+    errors.sort((a, b) => a.index - b.index);
+    result.failed = errors.length;
+    result.errors = errors;
+    return result;
+}
+
+// 201/200 when everything was written, 207 on partial success, 400 when nothing was
+function bulkStatus(result, created) {
+    if (result.failed === 0) return created ? 201 : 200;
+    return result.failed < result.received ? 207 : 400;
+}
+
+module.exports = { bulkWrite, bulkStatus, MAX_ITEMS };
@@ -0,0 +1,78 @@
+const FORMATS = {
+    ndjson: 'application/x-ndjson',
+    csv: 'text/csv'
+};
+
+function badRequest(message) {
+    const error = new Error(message);
+    error.status = 400;
+    return error;
+}
+
+// Top-level schema fields, in declaration order. Nested documents and arrays
+// (recipe, stages, weeklyUsage) become a single JSON-encoded CSV column.
+function columns(Model) {
+    const roots = Object.keys(Model.schema.paths)
+        .filter((path) => path !== '__v')
+        .map((path) => path.split('.')[0]);
+    return [...new Set(roots)];
+}
+
+function csvCell(value) {
+    if (value === undefined || value === null) return '';
+    if (value instanceof Date) return value.toISOString();
+
+    const text = typeof value === 'object' && !value._bsontype ? JSON.stringify(value) : String(value);
+    return /[",\r\n]/.test(text) ? `"${text.replace(/"/g, '""')}"` : text;
+}
+
+// Resolves once the socket has drained, or immediately if it has closed
+function drained(res) {
+    return new Promise((resolve) => {
+        const done = () => {
+            res.off('drain', done);
+            res.off('close', done);
+            resolve();
+        };
+        res.on('drain', done);
+        res.on('close', done);
+    });
+}
+
+// Stream every document matching query as NDJSON or CSV (?format=), reading
+// from a Mongo cursor and pausing whenever the client falls behind, so memory
+// use does not depend on the size of the export.
+async function streamExport(Model, query, sort, req, res) {
+    const format = req.query.format || 'ndjson';
+    if (typeof format !== 'string' || !Object.hasOwn(FORMATS, format)) throw badRequest(`Invalid format: ${format} (expected ndjson or csv)`);
+
+    const fields = columns(Model);
+    const cursor = Model.find(query).sort(sort).lean().cursor({ batchSize: 1000 });
+
+    res.status(200);
+    res.set('Content-Type', `${FORMATS[format]}; charset=utf-8`);
+    res.set('Content-Disposition', `attachment; filename="${Model.collection.collectionName}.${format}"`);
+    res.flushHeaders();
+
+    try {
+        if (format === 'csv') res.write(fields.join(',') + '\n');
+
+        for await (const doc of cursor) {
+            if (res.destroyed) break;
+
+            const line = format === 'csv'
+                ? fields.map((field) => csvCell(doc[field])).join(',') + '\n'
+                : JSON.stringify(doc) + '\n';
+
+            if (!res.write(line)) await drained(res);
+        }
+        res.end();
+    } catch (error) {
+        // Headers are already sent; abort so the client sees a truncated download
+        res.destroy(error);
+    } finally {
+        await cursor.close();
+    }
+}
+
+module.exports = { streamExport };
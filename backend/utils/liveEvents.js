@@ -0,0 +1,193 @@
+// Server-sent event fan-out fed by MongoDB change streams.
+//
+// Each feed opens one change stream for its collection while it has
+// subscribers, serializes every change once and writes it to every connected
+// client whose filter matches. Change streams need a replica set; on a
+// standalone server the stream fails and is retried with backoff.
+//
+// Filters are checked against the document before and after each change
+// (pre-images, MongoDB 6.0+, enabled on the collection when a feed starts).
+// A subscriber whose filter matched the old document but not the new one
+// gets a "leave" event for that id, so it can drop the document from its
+// view. Without a pre-image (older server, or a change made before they were
+// enabled) every non-matching update is sent as a leave event, the way
+// deletes go to every subscriber.
+
+const HEARTBEAT_MS = 25000;
+const RETRY_MS = 5000;
+
+// Subscribers that fall this far behind are disconnected rather than
+// buffered without bound; EventSource reconnects on its own
+const MAX_BUFFERED_BYTES = 1024 * 1024;
+
+// Every feed in the process, so a draining server can close them all
+const feeds = new Set();
+
+class LiveFeed {
+    // fields: document fields a subscriber may filter on via the query string
+    constructor(Model, name, fields) {
+        this.Model = Model;
+        this.name = name;
+        this.fields = fields;
+        this.subscribers = new Set();
+        this.stream = null;
+        this.resumeToken = null;
+        this.retryTimer = null;
+        this.sequence = 0;
+        this.preImagesEnabled = false;
+        this.delivered = 0;
+        this.dropped = 0;
+        feeds.add(this);
+    }
+
+    // Filter from query parameters; comma-separated values match any of them
+    parseFilter(query) {
+        const filter = {};
+        for (const field of this.fields) {
+            if (query[field]) filter[field] = String(query[field]).split(',');
+        }
+        return filter;
+    }
+
+    matches(filter, doc) {
+        if (!doc) return true;
+        return Object.entries(filter).every(([field, values]) => values.includes(String(doc[field])));
+    }
+
+    subscribe(req, res) {
+        const subscriber = { res, filter: this.parseFilter(req.query) };
+
+        res.status(200);
+        res.set({
+            'Content-Type': 'text/event-stream',
+            'Cache-Control': 'no-cache',
+            Connection: 'keep-alive',
+            'X-Accel-Buffering': 'no'
+        });
+        res.flushHeaders();
+        res.write(`retry: ${RETRY_MS}\n\n`);
+
+        subscriber.heartbeat = setInterval(() => res.write(': heartbeat\n\n'), HEARTBEAT_MS);
+        this.subscribers.add(subscriber);
+        this.start();
+
+        req.on('close', () => this.unsubscribe(subscriber));
+    }
+
+    unsubscribe(subscriber) {
+        clearInterval(subscriber.heartbeat);
+        if (!this.subscribers.delete(subscriber)) return;
+        if (this.subscribers.size === 0) this.stop();
+    }
+
+    // Ask the server to record pre-images for this collection; best effort,
+    // as older servers and restricted users refuse collMod
+    enablePreImages() {
+        if (this.preImagesEnabled) return;
+        this.preImagesEnabled = true;
+        this.Model.db.db
+            .command({ collMod: this.Model.collection.collectionName, changeStreamPreAndPostImages: { enabled: true } })
+            .catch((err) => console.warn(`⚠️  ${this.name} pre-images unavailable, sending leave events for every non-matching update:`, err.message));
+    }
+
+    start() {
+        if (this.stream || this.retryTimer) return;
+        this.enablePreImages();
+
+        const options = { fullDocument: 'updateLookup', fullDocumentBeforeChange: 'whenAvailable' };
+        if (this.resumeToken) options.resumeAfter = this.resumeToken;
+
+        this.stream = this.Model.watch([], options);
+        this.stream.on('change', (change) => this.publish(change));
+        this.stream.on('error', (err) => {
+            console.error(`❌ ${this.name} change stream error:`, err.message);
+            this.stream = null;
+            if (this.subscribers.size > 0) {
+                this.retryTimer = setTimeout(() => {
+                    this.retryTimer = null;
+                    this.start();
+                }, RETRY_MS);
+            }
+        });
+    }
+
+    stop() {
+        clearTimeout(this.retryTimer);
+        this.retryTimer = null;
+        if (this.stream) {
+            this.stream.close().catch(() => {});
+            this.stream = null;
+        }
+        this.resumeToken = null;
+    }
+
+    // Which event, if any, a subscriber should get for a change: the change
+    // itself while the document matches its filter, "leave" once it stops
+    // matching. Unknown before or after documents count as matching.
+    eventFor(filter, change) {
+        const before = change.fullDocumentBeforeChange;
+        const after = change.fullDocument;
+
+        if (change.operationType === 'insert') return this.matches(filter, after) ? 'change' : null;
+        if (change.operationType === 'delete') return this.matches(filter, before) ? 'change' : null;
+        if (this.matches(filter, after)) return 'change';
+        return this.matches(filter, before) ? 'leave' : null;
+    }
+
+    publish(change) {
+        this.resumeToken = change._id;
+
+        const sequence = ++this.sequence;
+        const id = change.documentKey && String(change.documentKey._id);
+
+        // Serialize each kind of event at most once for every subscriber
+        const frames = {};
+        const frameFor = (kind) => {
+            if (!frames[kind]) {
+                const event = kind === 'leave'
+                    ? { operation: 'leave', id, doc: null }
+                    : { operation: change.operationType, id, doc: change.fullDocument || null };
+                frames[kind] = `id: ${sequence}\nevent: ${this.name}\ndata: ${JSON.stringify(event)}\n\n`;
+            }
+            return frames[kind];
+        };
+
+        for (const subscriber of this.subscribers) {
+            const kind = this.eventFor(subscriber.filter, change);
+            if (!kind) continue;
+
+            if (subscriber.res.writableLength > MAX_BUFFERED_BYTES) {
+                this.dropped++;
+                this.unsubscribe(subscriber);
+                subscriber.res.end();
+                continue;
+            }
+            subscriber.res.write(frameFor(kind));
+            this.delivered++;
+        }
+    }
+
+    // End every subscription; EventSource clients reconnect elsewhere
+    close() {
+        for (const subscriber of this.subscribers) {
+            this.unsubscribe(subscriber);
+            subscriber.res.end();
+        }
+    }
+
+    stats() {
+        return {
+            subscribers: this.subscribers.size,
+            streaming: Boolean(this.stream),
+            delivered: this.delivered,
+            dropped: this.dropped
+        };
+    }
+}
+
+// Close every feed's subscriptions, for a graceful shutdown (server.js)
+function closeFeeds() {
+    for (const feed of feeds) feed.close();
+}
+
+module.exports = { LiveFeed, closeFeeds };
@@ -0,0 +1,103 @@
+const mongoose = require('mongoose');
+
+const { EJSON, ObjectId } = mongoose.mongo.BSON;
+
+const DEFAULT_LIMIT = 100;
+const MAX_LIMIT = 500;
+
+function badRequest(message) {
+    const error = new Error(message);
+    error.status = 400;
+    return error;
+}
+
+// Sort keys as [field, direction] pairs, always ending with _id as tie-breaker
+function sortKeys(sort) {
+    const keys = Object.entries(sort).map(([field, dir]) => [field, dir === -1 || dir === 'desc' ? -1 : 1]);
+    if (!keys.some(([field]) => field === '_id')) keys.push(['_id', 1]);
+    return keys;
+}
+
+function encodeCursor(doc, keys) {
+    const values = keys.map(([field]) => doc.get ? doc.get(field) : doc[field]);
+    return Buffer.from(EJSON.stringify(values)).toString('base64url');
+}
+
+function decodeCursor(cursor, keys) {
+    let values;
+    try {
+        values = EJSON.parse(Buffer.from(cursor, 'base64url').toString());
+    } catch (error) {
+        throw badRequest('Invalid cursor');
+    }
+    if (!Array.isArray(values) || values.length !== keys.length || !values.every(isCursorValue)) {
+        throw badRequest('Invalid cursor');
+    }
+    return values;
+}
+
+// Cursor values go straight into the filter, so only plain sort-key values are
+// accepted: an object there would be read as query operators ($where, $ne, ...)
+function isCursorValue(value) {
+    if (value === null) return true;
+    if (typeof value === 'string' || typeof value === 'boolean') return true;
+    if (typeof value === 'number') return Number.isFinite(value);
+    if (value instanceof Date) return !isNaN(value.getTime());
+    return value instanceof ObjectId;
+}
+
+// Documents strictly after the cursor position in sort order:
+//   (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ...
+function afterCursor(keys, values) {
+    return {
+        $or: keys.map(([field, dir], i) => {
+            const clause = {};
+            for (let j = 0; j < i; j++) clause[keys[j][0]] = values[j];
+            clause[field] = { [dir === 1 ? '$gt' : '$lt']: values[i] };
+            return clause;
+        })
+    };
+}
+
+// Projection from a comma-separated fields= parameter, restricted to schema
+// paths. Sort keys are always included so the next cursor can be built.
+function projection(Model, fields, keys) {
+    if (!fields) return null;
+
+    const known = (path) => path === '_id' || Model.schema.pathType(path) !== 'adhocOrUndefined';
+    const selected = String(fields).split(',').map((f) => f.trim()).filter(Boolean);
+    for (const field of selected) {
+        if (!known(field) && !known(field.split('.')[0])) throw badRequest(`Unknown field: ${field}`);
+    }
+
+    return [...new Set([...selected, ...keys.map(([field]) => field)])].join(' ');
+}
+
+// Keyset-paginated find. Reads limit, cursor and fields from the request
+// query, sets X-Next-Cursor on the response when more results remain and
+// resolves to the current page (plain objects with lean: true).
+async function paginate(Model, query, sort, params, res, { lean = false } = {}) {
+    const keys = sortKeys(sort);
+
+    let limit = params.limit !== undefined ? parseInt(params.limit, 10) : DEFAULT_LIMIT;
+    if (isNaN(limit) || limit < 1) throw badRequest('limit must be a positive integer');
+    limit = Math.min(limit, MAX_LIMIT);
+
+    const filter = params.cursor
+        ? { $and: [query, afterCursor(keys, decodeCursor(params.cursor, keys))] }
+        : query;
+
+    const find = Model.find(filter).sort(Object.fromEntries(keys)).limit(limit + 1);
+    const select = projection(Model, params.fields, keys);
+    if (select) find.select(select);
+    if (lean) find.lean();
+
+    const docs = await find;
+    if (docs.length > limit) {
+        docs.pop();
+        res.set('X-Next-Cursor', encodeCursor(docs[docs.length - 1], keys));
+    }
+    return docs;
+}
+
+module.exports = { paginate, DEFAULT_LIMIT, MAX_LIMIT };
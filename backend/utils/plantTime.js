@@ -0,0 +1,55 @@
+// Schedules are entered as the plant's wall-clock date ("2025-12-15") and time
+// ("08:00"). Everything that turns them into instants or back - the Schedule
+// slot (startAt / endAt), the optimizer's start and the slots it writes, and
+// migrate_schedule_slots.py - reads them in this one time zone. Defaults to
+// the server's own zone.
+const PLANT_TIMEZONE = process.env.PLANT_TIMEZONE || Intl.DateTimeFormat().resolvedOptions().timeZone;
+
+const MINUTE = 60 * 1000;
+
+const parts = new Intl.DateTimeFormat('en-US', {
+    timeZone: PLANT_TIMEZONE,
+    hourCycle: 'h23',
+    year: 'numeric',
+    month: '2-digit',
+    day: '2-digit',
+    hour: '2-digit',
+    minute: '2-digit',
+    second: '2-digit'
+});
+
+// Wall-clock fields of an instant in the plant zone
+function fieldsOf(ms) {
+    const fields = {};
+    for (const { type, value } of parts.formatToParts(new Date(ms))) fields[type] = value;
+    return fields;
+}
+
+// Offset of the plant zone from UTC at an instant, in milliseconds
+function offsetAt(ms) {
+    const f = fieldsOf(ms);
+    const wall = Date.UTC(Number(f.year), Number(f.month) - 1, Number(f.day), Number(f.hour), Number(f.minute), Number(f.second));
+    return wall - Math.floor(ms / 1000) * 1000;
+}
+
+// Instant of a plant wall-clock date ("YYYY-MM-DD") plus minutes after
+// midnight, or null when the date does not exist. Wall-clock times inside a
+// DST gap or overlap resolve to one of the neighbouring instants.
+function plantInstant(date, minutes = 0) {
+    const match = /^(\d{4})-(\d{2})-(\d{2})$/.exec(String(date || ''));
+    if (!match) return null;
+    const day = new Date(Date.UTC(Number(match[1]), Number(match[2]) - 1, Number(match[3])));
+    if (day.getUTCMonth() !== Number(match[2]) - 1 || day.getUTCDate() !== Number(match[3])) return null;
+    const wall = day.getTime() + minutes * MINUTE;
+
+    const guess = wall - offsetAt(wall);
+    return new Date(wall - offsetAt(guess));
+}
+
+// Plant wall-clock { date: "YYYY-MM-DD", time: "HH:MM" } of an instant
+function plantWallClock(ms) {
+    const f = fieldsOf(ms);
+    return { date: `${f.year}-${f.month}-${f.day}`, time: `${f.hour}:${f.minute}` };
+}
+
+module.exports = { PLANT_TIMEZONE, plantInstant, plantWallClock };
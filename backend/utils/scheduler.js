@@ -0,0 +1,400 @@
+// Automatic packing of unscheduled lots onto the machine fleet
+// (POST /api/schedules/optimize).
+//
+// List scheduling: lots are taken in priority order, longest first within a
+// priority (LPT), and each goes to the machine that frees up first, kept in a
+// min-heap by ready time. Machines in maintenance are left out, the job a
+// machine is running pushes its ready time back, and lots are fitted into the
+// gaps between existing bookings and maintenance windows, never overlapping
+// either.
+const Machine = require('../models/Machine');
+const Schedule = require('../models/Schedule');
+const BookingLock = require('../models/BookingLock');
+const { parseDurationMinutes, parseQuantityKg } = require('./units');
+const { plantInstant, plantWallClock } = require('./plantTime');
+
+const PRIORITY_ORDER = { high: 0, medium: 1, low: 2 };
+
+// Same rule of thumb as the schedule form: 2 hours per 100 kg, rounded up
+const HOURS_PER_100_KG = 2;
+
+const MINUTE = 60 * 1000;
+
+// Most lots a single request may pack
+const MAX_LOTS = 5000;
+
+function badRequest(message) {
+    const error = new Error(message);
+    error.status = 400;
+    return error;
+}
+
+// Binary min-heap of machines ordered by ready time, then machine id
+class MachineHeap {
+    constructor(machines) {
+        this.items = [];
+        for (const machine of machines) this.push(machine);
+    }
+
+    get size() {
+        return this.items.length;
+    }
+
+    less(a, b) {
+        return a.ready < b.ready || (a.ready === b.ready && a.machineId < b.machineId);
+    }
+
+    push(machine) {
+        const items = this.items;
+        items.push(machine);
+        let i = items.length - 1;
+        while (i > 0) {
+            const parent = (i - 1) >> 1;
+            if (!this.less(items[i], items[parent])) break;
+            [items[i], items[parent]] = [items[parent], items[i]];
+            i = parent;
+        }
+    }
+
+    pop() {
+        const items = this.items;
+        const top = items[0];
+        const last = items.pop();
+        if (items.length > 0) {
+            items[0] = last;
+            let i = 0;
+            for (;;) {
+                const left = 2 * i + 1;
+                const right = left + 1;
+                let smallest = i;
+                if (left < items.length && this.less(items[left], items[smallest])) smallest = left;
+                if (right < items.length && this.less(items[right], items[smallest])) smallest = right;
+                if (smallest === i) break;
+                [items[i], items[smallest]] = [items[smallest], items[i]];
+                i = smallest;
+            }
+        }
+        return top;
+    }
+}
+
+function lotMinutes(lot) {
+    const minutes = parseDurationMinutes(lot.duration);
+    if (minutes) return minutes;
+
+    const kg = parseQuantityKg(lot.quantity);
+    return kg ? Math.ceil((kg / 100) * HOURS_PER_100_KG) * 60 : null;
+}
+
+function formatMinutes(minutes) {
+    const hours = Math.floor(minutes / 60);
+    const rest = minutes % 60;
+    return rest ? `${hours}h ${rest}m` : `${hours}h`;
+}
+
+// Earliest start at or after ready for a job of the given length that does
+// not overlap any of the machine's maintenance windows (sorted by start)
+function earliestStart(ready, length, windows) {
+    let start = ready;
+    for (const window of windows) {
+        if (window.to <= start) continue;
+        if (window.from >= start + length) break;
+        start = window.to;
+    }
+    return start;
+}
+
+// Pack lots onto machines. Pure function, times in epoch milliseconds:
+//   lots        - [{ lotNo, priority, quantity, duration, ... }]
+//   machines    - [{ machineId, ready }] available machines
+//   maintenance - { machineId: [{ from, to }] } windows to keep clear
+// Returns { assignments, unassigned, makespan } with makespan the end of the
+// last assigned lot.
+function packLots(lots, machines, { maintenance = {} } = {}) {
+    const unassigned = [];
+    const jobs = [];
+    lots.forEach((lot, index) => {
+        let minutes;
+        try {
+            minutes = lotMinutes(lot || {});
+        } catch (error) {
+            unassigned.push({ index, lotNo: lot && lot.lotNo, reason: error.message });
+            return;
+        }
+        if (!minutes) {
+            unassigned.push({ index, lotNo: lot && lot.lotNo, reason: 'duration or quantity does not parse' });
+        } else {
+            jobs.push({ index, lot, length: minutes * MINUTE, rank: PRIORITY_ORDER[lot.priority] ?? PRIORITY_ORDER.medium });
+        }
+    });
+
+    jobs.sort((a, b) => a.rank - b.rank || b.length - a.length || a.index - b.index);
+
+    if (machines.length === 0) {
+        for (const job of jobs) unassigned.push({ index: job.index, lotNo: job.lot.lotNo, reason: 'no machine available' });
+        return { assignments: [], unassigned, makespan: null };
+    }
+
+    const windows = {};
+    for (const [machineId, list] of Object.entries(maintenance)) {
+        windows[machineId] = [...list].sort((a, b) => a.from - b.from);
+    }
+
+    const heap = new MachineHeap(machines.map((machine) => ({ ...machine })));
+    const assignments = [];
+    let makespan = null;
+
+    for (const job of jobs) {
+        // A machine whose next slot is pushed past a maintenance window goes
+        // back into the heap at the window's end, so another machine that is
+        // free sooner can take the lot instead
+        let machine = heap.pop();
+        let start = earliestStart(machine.ready, job.length, windows[machine.machineId] || []);
+        while (start > machine.ready && heap.size > 0) {
+            machine.ready = start;
+            heap.push(machine);
+            machine = heap.pop();
+            start = earliestStart(machine.ready, job.length, windows[machine.machineId] || []);
+        }
+
+        const end = start + job.length;
+        assignments.push({ index: job.index, lot: job.lot, machineId: machine.machineId, start, end });
+        machine.ready = end;
+        heap.push(machine);
+        if (makespan === null || end > makespan) makespan = end;
+    }
+
+    assignments.sort((a, b) => a.start - b.start || a.machineId.localeCompare(b.machineId));
+    return { assignments, unassigned, makespan };
+}
+
+// A date-time with a UTC offset ("2025-12-15T02:30:00Z") is taken as is; one
+// without ("2025-12-15T08:00", "2025-12-15") is plant wall-clock time, like
+// the date and time of a schedule
+const WALL_CLOCK = /^(\d{4}-\d{2}-\d{2})(?:[T ](\d{2}):(\d{2})(?::(\d{2}(?:\.\d+)?))?)?$/;
+
+function parseTime(value, name) {
+    const wall = WALL_CLOCK.exec(String(value));
+    const date = wall
+        ? plantInstant(wall[1], Number(wall[2] || 0) * 60 + Number(wall[3] || 0) + Number(wall[4] || 0) / 60)
+        : new Date(value);
+    if (!date || isNaN(date.getTime())) throw badRequest(`Invalid ${name}: ${value}`);
+    return date.getTime();
+}
+
+// Expected end of the job a running machine was started on, from its start
+// time and the same duration rule as for lots, or null when either is missing
+function expectedEnd(machine) {
+    if (!machine.startTime) return null;
+    let minutes;
+    try {
+        minutes = lotMinutes({ quantity: machine.quantity });
+    } catch (error) {
+        return null;
+    }
+    return minutes ? machine.startTime.getTime() + minutes * MINUTE : null;
+}
+
+// Machines that can take work, each ready at from or, when running, at the
+// expected end of its current job, along with the active bookings after from
+// as { machineId: [{ from, to }] } for the packing to work around. Machines in
+// maintenance, and running ones whose job has no expected end or has run past
+// it, are returned as unavailable with the reason.
+async function availableMachines(from) {
+    const [fleet, bookings] = await Promise.all([
+        Machine.find().select('machineId status quantity startTime').sort({ machineId: 1 }).lean(),
+        Schedule.find({ endAt: { $gt: new Date(from) }, status: { $ne: 'cancelled' } }).select('machine startAt endAt').lean()
+    ]);
+
+    const booked = {};
+    for (const booking of bookings) {
+        if (!booking.startAt) continue;
+        if (!booked[booking.machine]) booked[booking.machine] = [];
+        booked[booking.machine].push({ from: booking.startAt.getTime(), to: booking.endAt.getTime() });
+    }
+
+    const machines = [];
+    const unavailable = [];
+    for (const machine of fleet) {
+        let ready = from;
+
+        if (machine.status === 'maintenance') {
+            unavailable.push({ machine: machine.machineId, reason: 'in maintenance' });
+            continue;
+        }
+        if (machine.status === 'running') {
+            const end = expectedEnd(machine);
+            if (end === null) {
+                unavailable.push({ machine: machine.machineId, reason: 'running a job with no start time or quantity to estimate its end' });
+                continue;
+            }
+            if (end <= Date.now()) {
+                unavailable.push({ machine: machine.machineId, reason: `running past the expected end of its job (${new Date(end).toISOString()})` });
+                continue;
+            }
+            ready = Math.max(ready, end);
+        }
+        machines.push({ machineId: machine.machineId, ready });
+    }
+    return { machines, unavailable, booked };
+}
+
+// Planned slots that overlap an active booking on the same machine, checked
+// with one query on the { machine, startAt, endAt } index. Slots without a
+// time or cancelled are skipped; ignore(doc, booking) leaves out bookings the
+// write replaces. Each conflict carries the doc's index in docs.
+async function planConflicts(docs, { ignore = () => false } = {}) {
+    const active = docs.filter((doc) => doc.startAt && doc.status !== 'cancelled');
+    if (active.length === 0) return [];
+
+    const first = Math.min(...active.map((doc) => doc.startAt.getTime()));
+    const last = Math.max(...active.map((doc) => doc.endAt.getTime()));
+    const booked = await Schedule.find({
+        machine: { $in: [...new Set(active.map((doc) => doc.machine))] },
+        startAt: { $lt: new Date(last) },
+        endAt: { $gt: new Date(first) },
+        status: { $ne: 'cancelled' }
+    }).select('date time machine lotNo duration startAt endAt').lean();
+
+    const byMachine = new Map();
+    for (const slot of booked) {
+        if (!byMachine.has(slot.machine)) byMachine.set(slot.machine, []);
+        byMachine.get(slot.machine).push(slot);
+    }
+
+    const conflicts = [];
+    docs.forEach((doc, index) => {
+        if (!doc.startAt || doc.status === 'cancelled') return;
+        const other = (byMachine.get(doc.machine) || []).find((slot) => {
+            return slot.startAt < doc.endAt && slot.endAt > doc.startAt && !ignore(doc, slot);
+        });
+        if (other) {
+            const { date, time, lotNo, duration } = other;
+            conflicts.push({ index, lotNo: doc.lotNo, machine: doc.machine, date: doc.date, time: doc.time, bookedBy: { date, time, lotNo, duration } });
+        }
+    });
+    return conflicts;
+}
+
+// Items of POST /schedules/bulk that would double-book a machine, either an
+// active booking or an earlier item of the same request. An upsert replaces
+// the booking with its lotNo + date, so that one does not count. Resolves to
+// a Map from position in docs to the reason; call it under the machines'
+// booking leases so the answer still holds when the write lands.
+async function bulkConflicts(docs, { upsert = false } = {}) {
+    const sameKey = (a, b) => upsert && a.lotNo === b.lotNo && a.date === b.date;
+    const rejected = new Map();
+
+    for (const { index, machine, bookedBy } of await planConflicts(docs, { ignore: sameKey })) {
+        rejected.set(index, `Machine ${machine} is already booked from ${bookedBy.date} ${bookedBy.time} for ${bookedBy.duration} (lot ${bookedBy.lotNo})`);
+    }
+
+    const accepted = new Map();
+    docs.forEach((doc, index) => {
+        if (rejected.has(index) || !doc.startAt || doc.status === 'cancelled') return;
+        const earlier = (accepted.get(doc.machine) || []).find((other) => {
+            return other.startAt < doc.endAt && other.endAt > doc.startAt && !sameKey(doc, other);
+        });
+        if (earlier) {
+            rejected.set(index, `Machine ${doc.machine} is booked earlier in this request from ${earlier.date} ${earlier.time} (lot ${earlier.lotNo})`);
+            return;
+        }
+        if (!accepted.has(doc.machine)) accepted.set(doc.machine, []);
+        accepted.get(doc.machine).push(doc);
+    });
+    return rejected;
+}
+
+// Write the planned schedule documents. insertMany skips the per-document
+// double-booking check in pre('save'), so the whole plan is checked here,
+// under the booking leases of its machines (models/BookingLock.js): a slot
+// booked since the plan was computed fails the commit with 409 before
+// anything is written.
+async function commitPlan(docs) {
+    await BookingLock.withMachines(docs.map((doc) => doc.machine), async () => {
+        const conflicts = await planConflicts(docs);
+        if (conflicts.length > 0) {
+            const error = new Error(`${conflicts.length} planned slots overlap bookings made since the plan was computed; optimize again`);
+            error.status = 409;
+            error.conflicts = conflicts.slice(0, 5);
+            throw error;
+        }
+
+        await Schedule.insertMany(docs);
+    });
+}
+
+// Plan lots from the request body:
+//   { lots: [...], from?: datetime, maintenance?: [{ machine, from, to }], commit?: boolean }
+// Date-times without a UTC offset are plant wall-clock time (see parseTime).
+// With commit: true the plan is saved as schedules.
+async function optimizeSchedule({ lots, from, maintenance = [], commit = false } = {}) {
+    if (!Array.isArray(lots) || lots.length === 0) throw badRequest('Expected a non-empty array of lots');
+    if (lots.length > MAX_LOTS) throw badRequest(`At most ${MAX_LOTS} lots per request`);
+    if (!Array.isArray(maintenance)) throw badRequest('maintenance must be an array of { machine, from, to }');
+
+    // Slots start on whole minutes
+    const start = Math.ceil((from ? parseTime(from, 'from') : Date.now()) / MINUTE) * MINUTE;
+
+    const windows = {};
+    for (const window of maintenance) {
+        if (!window || !window.machine) throw badRequest('Each maintenance window needs a machine');
+        if (!windows[window.machine]) windows[window.machine] = [];
+        windows[window.machine].push({ from: parseTime(window.from, 'maintenance from'), to: parseTime(window.to, 'maintenance to') });
+    }
+
+    const solveStart = process.hrtime.bigint();
+    const { machines, unavailable, booked } = await availableMachines(start);
+    // Existing bookings are kept clear like maintenance windows
+    for (const [machineId, slots] of Object.entries(booked)) {
+        windows[machineId] = [...(windows[machineId] || []), ...slots];
+    }
+    const { assignments, unassigned } = packLots(lots, machines, { maintenance: windows });
+    const solveMs = Number(process.hrtime.bigint() - solveStart) / 1e6;
+
+    // Lots whose schedule the model would reject (a missing party, an unknown
+    // priority, ...) are reported as unassigned rather than failing the commit
+    const schedules = [];
+    const docs = [];
+    let makespan = null;
+    for (const { index, lot, machineId, start: slotStart, end } of assignments) {
+        const schedule = {
+            ...lot,
+            ...plantWallClock(slotStart),
+            machine: machineId,
+            duration: formatMinutes((end - slotStart) / MINUTE),
+            priority: lot.priority || 'medium',
+            status: 'scheduled'
+        };
+        const doc = new Schedule(schedule);
+        doc.setSlot();
+        const invalid = doc.validateSync();
+        if (invalid) {
+            unassigned.push({ index, lotNo: lot.lotNo, reason: invalid.message });
+            continue;
+        }
+        schedules.push(schedule);
+        docs.push(doc);
+        if (makespan === null || end > makespan) makespan = end;
+    }
+    unassigned.sort((a, b) => a.index - b.index);
+
+    if (commit && docs.length > 0) {
+        await commitPlan(docs);
+    }
+
+    return {
+        from: new Date(start).toISOString(),
+        machines: machines.length,
+        unavailable,
+        assigned: schedules.length,
+        makespanMinutes: makespan === null ? 0 : Math.round((makespan - start) / MINUTE),
+        makespanEnd: makespan === null ? null : new Date(makespan).toISOString(),
+        solveMs: Math.round(solveMs * 100) / 100,
+        committed: Boolean(commit) && schedules.length > 0,
+        schedules,
+        unassigned
+    };
+}
+
+module.exports = { packLots, optimizeSchedule, bulkConflicts };
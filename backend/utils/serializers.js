@@ -0,0 +1,78 @@
+// Precompiled JSON serializers for lean query results.
+//
+// res.json() on hydrated documents runs toJSON() over every document and then
+// a generic JSON.stringify that has to inspect each value. For plain objects
+// from .lean() the shape is already known from the schema, so each model gets
+// one generated function that writes its top-level fields in schema order with
+// a type-specific writer. Nested objects and arrays fall back to
+// JSON.stringify, which produces the same output as res.json() would.
+//
+// Like .lean() itself, fields missing from the stored document (or excluded by
+// a projection) are left out rather than filled with schema defaults.
+
+// Expression writing value v as JSON, by schema type
+const WRITERS = {
+    String: 'JSON.stringify(v)',
+    Number: "(typeof v === 'number' ? (isFinite(v) ? '' + v : 'null') : JSON.stringify(v))",
+    Boolean: "(v === true ? 'true' : v === false ? 'false' : JSON.stringify(v))",
+    Date: "(v instanceof Date && !isNaN(v) ? '\"' + v.toISOString() + '\"' : JSON.stringify(v))",
+    ObjectId: "(v && v._bsontype === 'ObjectId' ? '\"' + v.toHexString() + '\"' : JSON.stringify(v))"
+};
+
+// Top-level fields of a schema as [name, instance] pairs, _id first.
+// Nested paths (weeklyUsage.mon) collapse into their root with no instance.
+function fields(schema) {
+    const roots = new Map([['_id', schema.path('_id') ? schema.path('_id').instance : undefined]]);
+    for (const [path, type] of Object.entries(schema.paths)) {
+        const [root] = path.split('.');
+        if (roots.has(root) && root !== path) roots.set(root, undefined);
+        else if (!roots.has(root)) roots.set(root, root === path ? type.instance : undefined);
+    }
+    return [...roots];
+}
+
+function compile(schema) {
+    const lines = ["let out = '{';", "let sep = '';", 'let v;'];
+    for (const [name, instance] of fields(schema)) {
+        const key = JSON.stringify(JSON.stringify(name) + ':');
+        lines.push(
+            `v = doc[${JSON.stringify(name)}];`,
+            `if (v !== undefined) { out += sep + ${key} + ${WRITERS[instance] || 'JSON.stringify(v)'}; sep = ','; }`
+        );
+    }
+    lines.push("return out + '}';");
+
+    // eslint-disable-next-line no-new-func
+    return new Function('doc', lines.join('\n'));
+}
+
+const compiled = new Map();
+
+// Serializer for a model, compiled on first use
+function serializer(Model) {
+    let entry = compiled.get(Model.modelName);
+    if (!entry) {
+        const one = compile(Model.schema);
+        entry = {
+            one,
+            many: (docs) => {
+                let out = '[';
+                for (let i = 0; i < docs.length; i++) {
+                    if (i > 0) out += ',';
+                    out += one(docs[i]);
+                }
+                return out + ']';
+            }
+        };
+        compiled.set(Model.modelName, entry);
+    }
+    return entry;
+}
+
+// Send a lean document, or an array of them, as JSON
+function sendJson(res, Model, data) {
+    const { one, many } = serializer(Model);
+    res.type('json').send(Array.isArray(data) ? many(data) : one(data));
+}
+
+module.exports = { serializer, sendJson };
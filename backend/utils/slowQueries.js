@@ -0,0 +1,199 @@
+// Slow-query recorder, fed by the query timing hook in middleware/metrics.js.
+//
+// Queries taking SLOW_QUERY_MS (default 100) or longer are appended to
+// SLOW_QUERY_LOG (default backend/logs/slow-queries.ndjson), one JSON line
+// each: the model, operation, filter shape (equality and range fields), sort,
+// limit and the route that issued the query. The first slow occurrence of each
+// shape, and SLOW_QUERY_EXPLAIN_RATE (default 0.05) of later ones, is rerun
+// through the driver's explain('executionStats') with the filter cast to the
+// schema, as Mongoose sent it, and flagged when the winning plan scans the
+// collection (COLLSCAN) or sorts in memory (SORT).
+//
+// slow_queries.py at the repo root ranks the log into a missing-index report.
+const fs = require('fs');
+const path = require('path');
+
+const THRESHOLD_MS = parseFloat(process.env.SLOW_QUERY_MS ?? 100);
+const EXPLAIN_RATE = parseFloat(process.env.SLOW_QUERY_EXPLAIN_RATE ?? 0.05);
+const LOG_PATH = process.env.SLOW_QUERY_LOG || path.join(__dirname, '..', 'logs', 'slow-queries.ndjson');
+
+// Explains rerun the query, so only a couple may be in flight at once
+const MAX_CONCURRENT_EXPLAINS = 2;
+
+// Shapes already explained, bounded so a flood of distinct shapes cannot grow it
+const MAX_SEEN_SHAPES = 10000;
+
+// Longest filter kept in a log line
+const MAX_FILTER_CHARS = 500;
+
+// Query operations that can be explained as a find with the same filter
+const FIND_LIKE = new Set([
+    'find', 'findOne', 'countDocuments', 'distinct',
+    'findOneAndUpdate', 'findOneAndDelete', 'findOneAndReplace',
+    'updateOne', 'updateMany', 'replaceOne', 'deleteOne', 'deleteMany'
+]);
+
+const seenShapes = new Set();
+let explaining = 0;
+let logReady = null;
+
+// Equality and range fields of a filter. Conditions under $or / $and are not
+// broken down; the shape only notes that they are there.
+function shapeOf(filter, sort) {
+    const equality = [];
+    const range = [];
+    let logical = false;
+    for (const [field, condition] of Object.entries(filter || {})) {
+        if (field.startsWith('$')) {
+            logical = true;
+        } else if (condition && typeof condition === 'object' && !Array.isArray(condition) &&
+            Object.keys(condition).some((key) => key.startsWith('$'))) {
+            (Object.keys(condition).every((key) => key === '$eq') ? equality : range).push(field);
+        } else {
+            equality.push(field);
+        }
+    }
+    return {
+        equality,
+        range,
+        sort: Object.entries(sort || {}).map(([field, dir]) => [field, dir === -1 || dir === 'desc' ? -1 : 1]),
+        logical
+    };
+}
+
+// What an instrumented call ran: Query, Aggregate, a direct driver call with
+// its filter (timeDriverCall), or a document / model write
+function describe(target, op) {
+    if (target && typeof target.getFilter === 'function') {
+        const options = target.getOptions();
+        // Cast as Mongoose does before sending it ("42" -> 42, id strings ->
+        // ObjectId); explaining the raw filter could pick another plan or
+        // match nothing. A filter that does not cast is logged, not explained.
+        let filter = target.getFilter();
+        let explain = FIND_LIKE.has(op) ? 'find' : null;
+        try {
+            filter = target.cast(target.model, filter);
+        } catch (error) {
+            explain = null;
+        }
+        return { filter, sort: options.sort, limit: options.limit, explain };
+    }
+    // Mongoose sends pipelines uncast, so they are explained as they are
+    if (target && typeof target.pipeline === 'function') {
+        const pipeline = target.pipeline();
+        const first = pipeline[0] && pipeline[0].$match;
+        const sort = pipeline.find((stage) => stage.$sort);
+        const writes = pipeline.some((stage) => stage.$out || stage.$merge);
+        return { filter: first || {}, sort: sort && sort.$sort, pipeline, explain: writes ? null : 'aggregate' };
+    }
+    if (target && target.filter) {
+        return { filter: target.filter, explain: FIND_LIKE.has(op) ? 'find' : null };
+    }
+    return { filter: null, explain: null };
+}
+
+// Stages, indexes and counters of the winning plan. Rejected plans are skipped
+// so a COLLSCAN the planner considered and dropped is not reported.
+function planSummary(explain) {
+    const stages = new Set();
+    const indexes = new Set();
+    let stats = null;
+
+    (function walk(node) {
+        if (Array.isArray(node)) return node.forEach(walk);
+        if (!node || typeof node !== 'object') return;
+        if (typeof node.stage === 'string') stages.add(node.stage);
+        if (typeof node.indexName === 'string') indexes.add(node.indexName);
+        if (!stats && node.executionStats && typeof node.executionStats.totalDocsExamined === 'number') {
+            stats = node.executionStats;
+        }
+        for (const [key, value] of Object.entries(node)) {
+            if (key !== 'rejectedPlans' && key !== 'allPlansExecution') walk(value);
+        }
+    })(explain);
+
+    // A $sort the planner could not push into the query runs in the pipeline
+    const pipelineSort = Array.isArray(explain.stages) && explain.stages.some((stage) => stage.$sort);
+
+    return {
+        stages: [...stages],
+        indexes: [...indexes],
+        collscan: stages.has('COLLSCAN'),
+        inMemorySort: stages.has('SORT') || pipelineSort,
+        docsExamined: stats ? stats.totalDocsExamined : null,
+        keysExamined: stats ? stats.totalKeysExamined : null,
+        nReturned: stats ? stats.nReturned : null
+    };
+}
+
+async function explainQuery(Model, details) {
+    const collection = Model.db.db.collection(Model.collection.collectionName);
+    const explain = details.explain === 'aggregate'
+        ? await collection.aggregate(details.pipeline).explain('executionStats')
+        : await collection.find(details.filter, { sort: details.sort, limit: details.limit }).explain('executionStats');
+    return planSummary(explain);
+}
+
+function shouldExplain(key) {
+    if (explaining >= MAX_CONCURRENT_EXPLAINS) return false;
+    if (!seenShapes.has(key)) {
+        if (seenShapes.size >= MAX_SEEN_SHAPES) seenShapes.clear();
+        seenShapes.add(key);
+        return true;
+    }
+    return Math.random() < EXPLAIN_RATE;
+}
+
+function writeEntry(entry) {
+    if (!logReady) logReady = fs.promises.mkdir(path.dirname(LOG_PATH), { recursive: true });
+    logReady
+        .then(() => fs.promises.appendFile(LOG_PATH, JSON.stringify(entry) + '\n'))
+        .catch((err) => console.error('❌ Slow-query log:', err.message));
+}
+
+function truncate(value) {
+    const text = JSON.stringify(value);
+    return text && text.length > MAX_FILTER_CHARS ? `${text.slice(0, MAX_FILTER_CHARS)}…` : text;
+}
+
+// Record a query if it was slow; never throws and never delays the caller
+function recordSlowQuery({ target, Model, model, op, ms, module, route }) {
+    if (!(ms >= THRESHOLD_MS)) return;
+
+    let details;
+    try {
+        details = describe(target, op);
+    } catch (error) {
+        details = { filter: null, explain: null };
+    }
+
+    const shape = details.filter ? shapeOf(details.filter, details.sort) : null;
+    const entry = {
+        at: new Date().toISOString(),
+        ms: Math.round(ms * 10) / 10,
+        model,
+        op,
+        module,
+        route,
+        shape,
+        filter: details.filter ? truncate(details.filter) : null,
+        limit: details.limit ?? null,
+        plan: null
+    };
+
+    const key = shape && `${model}:${op}:${JSON.stringify(shape)}`;
+    if (!Model || !details.explain || !Model.db || !Model.db.db || !shouldExplain(key)) {
+        writeEntry(entry);
+        return;
+    }
+
+    explaining++;
+    explainQuery(Model, details)
+        .then((plan) => { entry.plan = plan; }, (error) => { entry.plan = { error: error.message }; })
+        .finally(() => {
+            explaining--;
+            writeEntry(entry);
+        });
+}
+
+module.exports = { recordSlowQuery, planSummary, shapeOf };
@@ -0,0 +1,65 @@
+// Parsers for the free-text quantity and duration strings entered on the
+// floor ("331 kg", "1.2 t", "6h 45m", "120 min", "6 hours").
+
+const WEIGHT_UNITS_KG = { kg: 1, kgs: 1, g: 0.001, t: 1000, ton: 1000, tons: 1000 };
+
+const DURATION_UNITS_MIN = {
+    h: 60, hr: 60, hrs: 60, hour: 60, hours: 60,
+    m: 1, min: 1, mins: 1, minute: 1, minutes: 1
+};
+
+function unknownUnit(kind, unit, text) {
+    const error = new Error(`Unknown ${kind} unit "${unit}" in "${text}"`);
+    error.status = 400;
+    return error;
+}
+
+// Kilograms, or null when the text holds no number. A bare number is kg; a
+// unit not in WEIGHT_UNITS_KG throws rather than storing the raw amount.
+// Rounded half up to grams (migrate_batch_numbers.py rounds the same way).
+function parseQuantityKg(text) {
+    const match = /(\d+(?:\.\d+)?)\s*([a-z]*)/i.exec(String(text || '').replace(/,/g, ''));
+    if (!match) return null;
+
+    const unit = match[2].toLowerCase();
+    const factor = unit === '' ? 1 : WEIGHT_UNITS_KG[unit];
+    if (factor === undefined) throw unknownUnit('weight', match[2], text);
+    return Math.round(parseFloat(match[1]) * factor * 1000) / 1000;
+}
+
+// Minutes, or null when the text holds no number. A bare number is hours; a
+// unit not in DURATION_UNITS_MIN throws. Rounded half up.
+function parseDurationMinutes(text) {
+    const parts = [...String(text || '').matchAll(/(\d+(?:\.\d+)?)\s*([a-z]*)/gi)];
+    if (parts.length === 0) return null;
+
+    return Math.round(parts.reduce((sum, [, value, unit]) => {
+        const factor = unit === '' ? 60 : DURATION_UNITS_MIN[unit.toLowerCase()];
+        if (factor === undefined) throw unknownUnit('duration', unit, text);
+        return sum + parseFloat(value) * factor;
+    }, 0));
+}
+
+// Schema validator rejecting text whose unit the parser does not know
+function knownUnits(parse) {
+    return {
+        validator: (text) => {
+            try {
+                parse(text);
+                return true;
+            } catch (error) {
+                return false;
+            }
+        },
+        message: (props) => {
+            try {
+                parse(props.value);
+            } catch (error) {
+                return error.message;
+            }
+            return `Invalid ${props.path}`;
+        }
+    };
+}
+
+module.exports = { parseQuantityKg, parseDurationMinutes, knownUnits };
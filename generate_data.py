@@ -0,0 +1,379 @@
+"""
+Script to generate a synthetic production dataset at scale
+
+  python generate_data.py --count 5000000              generate and bulk-load into MongoDB
+  python generate_data.py --count 5000000 --out data   write NDJSON files instead
+  python generate_data.py --load data                  bulk-load NDJSON files written with --out
+
+The count is split across batches, schedules, inspections, inventory and
+alerts in production proportions (see COLLECTIONS). Work is cut into shards
+of SHARD_SIZE documents that run in parallel worker processes, each streaming
+its documents as NDJSON (MongoDB extended JSON) or straight into unordered
+insert_many calls of BATCH_SIZE. A shard is seeded from --seed, so the same
+arguments always produce the same dataset.
+
+Inserts bypass the Mongoose hooks, so documents carry the fields the models
+derive (quantityKg, durationMinutes, startAt / endAt, stockLevel, status).
+Schedule date / time are plant wall-clock time and startAt / endAt the UTC
+instants the backend derives from them (PLANT_TIMEZONE, or the local time
+zone when it is unset; see migrate_schedule_slots.py).
+Indexes are left to the backend, which builds them on start: loading into
+collections dropped with --drop is much faster than into indexed ones.
+MONGODB_URI is read from the environment or backend/.env
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+
+from bson import json_util
+from pymongo import MongoClient
+from pymongo.errors import BulkWriteError
+
+from migrate_batch_numbers import BATCH_SIZE, read_mongodb_uri
+from migrate_schedule_slots import read_plant_timezone, to_utc
+
+SHARD_SIZE = 50000
+
+PARTIES = [('Modenik', 40), ('LUX', 25), ('JG', 20), ('Nishat', 10), ('Sapphire', 5)]
+COLORS = ['Navy', 'Navy Blue', 'Olive', 'Poseidon', 'Petrol Blue', 'C. Brown', 'Dk. Brown',
+          'Air Force', 'Sky Blue', 'Black', 'Maroon', 'Bottle Green', 'Grey Melange', 'White']
+OPERATORS = ['Amir Khan', 'Hassan Ali', 'Bilal Ahmed', 'Usman Tariq', 'Imran Shah', 'Kashif Iqbal']
+DYES = ['BLACK B (SF) Divine', 'DEEP BLACK', 'RED W3R (Divine)', 'YELLOW ME49L (Divine)',
+        'BLUE RR (Divine)', 'NAVY WB (Divine)', 'ORANGE 3R (Divine)', 'TURQ G (Divine)']
+CHEMICALS = ['Wetting Oil - BMW/CFLD', 'Soaping Oil - OL 40', 'Softner Cakes (1:15)',
+             'Soda Ash', 'Glauber Salt', 'Acetic Acid', 'Sequestering Agent']
+STAGES = [('TD Load', 0.08, '25°C'), ('Dyeing', 0.45, '90°C'), ('Soap Run', 0.17, '80°C'),
+          ('Soap Steam', 0.22, '98°C'), ('Unload', 0.08, '30°C')]
+DAYS = ['sun', 'mon', 'tue', 'wed', 'thu', 'fri']
+
+# Same thresholds as the Inventory model (updateStockStatus)
+CRITICAL_LEVEL = 20
+LOW_LEVEL = 50
+
+# Schedules are laid out back to back per machine in two 12-hour shifts, so
+# the generated data never double-books a machine
+SHIFT_HOURS = [6, 18]
+MAX_LOT_MINUTES = 11 * 60
+
+
+def weighted(rng, choices):
+    return rng.choices([value for value, _ in choices], [weight for _, weight in choices])[0]
+
+
+def clamp(value, low, high):
+    return max(low, min(high, value))
+
+
+def format_minutes(minutes):
+    hours, rest = divmod(int(minutes), 60)
+    return f"{hours}h {rest}m" if rest else f"{hours}h"
+
+
+def stamps(moment):
+    return {'createdAt': moment, 'updatedAt': moment, '__v': 0}
+
+
+def lot_size(rng):
+    """Lot weight in kg and dyeing time in minutes, longer for heavier lots"""
+    kg = round(clamp(rng.gauss(420, 110), 80, 600))
+    minutes = round(clamp(240 + kg * 0.45 + rng.gauss(0, 30), 180, MAX_LOT_MINUTES))
+    return kg, minutes
+
+
+def make_batch(rng, i, ctx):
+    kg, minutes = lot_size(rng)
+    day = ctx['anchor'] - timedelta(days=rng.randrange(365))
+    status = weighted(rng, [('completed', 80), ('in-progress', 12), ('rejected', 8)])
+    delta_e = round(rng.lognormvariate(-0.4, 0.35) + (1.0 if status == 'rejected' else 0), 2)
+
+    doc = {
+        'batchId': f"BTH-{i + 1:07d}",
+        'date': day.strftime('%Y-%m-%d'),
+        'machine': f"SF-{rng.randrange(ctx['machines']) + 1:02d}",
+        'party': weighted(rng, PARTIES),
+        'color': rng.choice(COLORS),
+        'lotNo': str(10000 + i),
+        'quantity': f"{kg} kg",
+        'duration': format_minutes(minutes),
+        'quantityKg': kg,
+        'durationMinutes': minutes,
+        'status': status,
+        'efficiency': round(clamp(rng.gauss(90, 4), 60, 100)) if status != 'in-progress' else 0,
+        'operator': rng.choice(OPERATORS),
+        'recipe': {
+            'dyes': [{'name': name, 'qty': f"{rng.uniform(0.2, 4):.1f}%"} for name in rng.sample(DYES, rng.randint(1, 3))],
+            'chemicals': [{'name': name, 'qty': f"{rng.uniform(0.5, 3):.1f}g/l"} for name in rng.sample(CHEMICALS, rng.randint(2, 3))],
+        },
+        'stages': [{'name': name, 'duration': f"{round(minutes * share)} min", 'temp': temp} for name, share, temp in STAGES],
+        **stamps(day + timedelta(seconds=rng.randrange(86400))),
+    }
+    # deltaE is only measured once the lot is out of the machine
+    if status != 'in-progress':
+        doc['deltaE'] = delta_e
+    return doc
+
+
+def make_schedule(rng, i, ctx):
+    kg, minutes = lot_size(rng)
+    slot, machine = divmod(i, ctx['machines'])
+    day = ctx['plant_today'] - timedelta(days=90) + timedelta(days=slot // len(SHIFT_HOURS))
+    wall = day + timedelta(hours=SHIFT_HOURS[slot % len(SHIFT_HOURS)])
+    start = to_utc(wall, ctx['zone'])
+    end = start + timedelta(minutes=minutes)
+
+    if end <= ctx['now']:
+        status = 'cancelled' if rng.random() < 0.05 else 'completed'
+    elif start <= ctx['now']:
+        status = 'in-progress'
+    else:
+        status = 'cancelled' if rng.random() < 0.03 else 'scheduled'
+
+    return {
+        'date': wall.strftime('%Y-%m-%d'),
+        'time': wall.strftime('%H:%M'),
+        'machine': f"SF-{machine + 1:02d}",
+        'party': weighted(rng, PARTIES),
+        'color': rng.choice(COLORS),
+        'lotNo': str(10000 + i),
+        'quantity': f"{kg} kg",
+        'duration': format_minutes(minutes),
+        'priority': weighted(rng, [('high', 20), ('medium', 60), ('low', 20)]),
+        'status': status,
+        'startAt': start,
+        'endAt': end,
+        **stamps(min(ctx['now'], start - timedelta(days=rng.randint(1, 14)))),
+    }
+
+
+def make_inspection(rng, i, ctx):
+    day = ctx['anchor'] - timedelta(days=rng.randrange(365))
+    doc = {
+        'date': day.strftime('%Y-%m-%d'),
+        'color': rng.choice(COLORS),
+        'client': weighted(rng, PARTIES),
+        'lotNo': str(10000 + i),
+        'status': 'pending',
+        'notes': '',
+        **stamps(day + timedelta(seconds=rng.randrange(86400))),
+    }
+    if rng.random() >= 0.1:
+        # Most lots pass well under ΔE 1.0, with a long tail of rejections
+        doc['deltaE'] = round(rng.lognormvariate(-0.4, 0.45), 2)
+        doc['status'] = 'rejected' if doc['deltaE'] > 1.2 else 'approved'
+        if doc['status'] == 'rejected':
+            doc['notes'] = 'Shade out of tolerance'
+    return doc
+
+
+def make_inventory(rng, i, ctx):
+    category = 'Dye' if rng.random() < 0.6 else 'Chemical'
+    base = rng.choice(DYES if category == 'Dye' else CHEMICALS)
+    max_capacity = rng.choice([50, 100, 200, 400, 500, 1000])
+    # Skewed towards well stocked, with a tail of low and critical items
+    stock = round(max_capacity * rng.betavariate(4, 2))
+    stock_level = int(stock / max_capacity * 100 + 0.5)
+    daily = max_capacity * rng.uniform(1, 8)
+
+    return {
+        'name': f"{base} #{i + 1}",
+        'category': category,
+        'stock': stock,
+        'minThreshold': round(max_capacity * rng.uniform(0.2, 0.5)),
+        'maxCapacity': max_capacity,
+        'weeklyUsage': {day: round(daily * rng.uniform(0.7, 1.3)) for day in DAYS},
+        'status': 'critical' if stock_level <= CRITICAL_LEVEL else 'low' if stock_level <= LOW_LEVEL else 'ok',
+        'stockLevel': stock_level,
+        **stamps(ctx['now'] - timedelta(seconds=rng.randrange(30 * 86400))),
+    }
+
+
+ALERT_KINDS = [
+    (('critical', 'inventory', 'Critical Stock Level', '{dye} is at {level}% stock level', True), 10),
+    (('warning', 'inventory', 'Low Stock Level', '{dye} is running low - only {level}% remaining', True), 20),
+    (('warning', 'machine', 'Machine Efficiency Drop', 'Softflow {machine} efficiency dropped to {eff}% - below threshold', True), 25),
+    (('critical', 'quality', 'High ΔE Rejection', 'Lot {lot} ({color}) rejected at ΔE {delta}', True), 10),
+    (('warning', 'maintenance', 'Machine Under Maintenance', 'Softflow {machine} is under maintenance and unavailable for scheduling', False), 10),
+    (('info', 'production', 'Production Target Achieved', 'Daily production exceeded target by {pct}%', False), 25),
+]
+
+
+def make_alert(rng, i, ctx):
+    alert_type, category, title, message, actionable = weighted(rng, ALERT_KINDS)
+    age = timedelta(seconds=int(rng.expovariate(1 / (7 * 86400))))
+    return {
+        'type': alert_type,
+        'category': category,
+        'title': title,
+        'message': message.format(
+            dye=rng.choice(DYES), level=rng.randint(3, 50), machine=rng.randrange(ctx['machines']) + 1,
+            eff=rng.randint(60, 84), lot=10000 + i, color=rng.choice(COLORS),
+            delta=round(rng.uniform(1.2, 3.5), 2), pct=rng.randint(1, 20),
+        ),
+        # Older alerts have mostly been read
+        'read': rng.random() < min(0.95, age.days / 7),
+        'actionable': actionable,
+        **stamps(ctx['now'] - age),
+    }
+
+
+# Collection, generator and share of the total count
+COLLECTIONS = [
+    ('batches', make_batch, 0.30),
+    ('schedules', make_schedule, 0.25),
+    ('inspections', make_inspection, 0.25),
+    ('alerts', make_alert, 0.15),
+    ('inventories', make_inventory, 0.05),
+]
+GENERATORS = {name: make for name, make, _ in COLLECTIONS}
+
+
+def generate(name, start, stop, seed, ctx):
+    rng = random.Random(f"{seed}:{name}:{start}")
+    make = GENERATORS[name]
+    for i in range(start, stop):
+        yield make(rng, i, ctx)
+
+
+def insert_chunks(collection, docs):
+    """Unordered insert_many in chunks of BATCH_SIZE; duplicates are counted, not fatal"""
+    inserted = skipped = 0
+    chunk = []
+
+    def flush():
+        nonlocal inserted, skipped
+        try:
+            inserted += len(collection.insert_many(chunk, ordered=False).inserted_ids)
+        except BulkWriteError as error:
+            inserted += error.details['nInserted']
+            skipped += len(error.details['writeErrors'])
+
+    for doc in docs:
+        chunk.append(doc)
+        if len(chunk) >= BATCH_SIZE:
+            flush()
+            chunk = []
+    if chunk:
+        flush()
+    return inserted, skipped
+
+
+_database = None
+
+
+def database():
+    """One client per worker process (clients must not cross a fork)"""
+    global _database
+    if _database is None:
+        _database = MongoClient(read_mongodb_uri()).get_default_database(default='test')
+    return _database
+
+
+def run_shard(name, start, stop, seed, ctx, out):
+    """Generate one shard into an NDJSON file or the database; returns (name, written, skipped)"""
+    docs = generate(name, start, stop, seed, ctx)
+    if out:
+        path = os.path.join(out, f"{name}.{start // SHARD_SIZE:05d}.ndjson")
+        with open(path, 'w', encoding='utf-8') as f:
+            for doc in docs:
+                f.write(json_util.dumps(doc))
+                f.write('\n')
+        return name, stop - start, 0
+
+    return (name, *insert_chunks(database()[name], docs))
+
+
+def load_file(path):
+    """Bulk-load one NDJSON file written with --out; returns (name, inserted, skipped)"""
+    name = os.path.basename(path).split('.')[0]
+    with open(path, 'r', encoding='utf-8') as f:
+        docs = (json_util.loads(line) for line in f if line.strip())
+        return (name, *insert_chunks(database()[name], docs))
+
+
+def context(machines):
+    """Shared generation settings: the current time, today (UTC and at the plant) and the fleet size"""
+    now = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+    zone = read_plant_timezone()
+    plant_now = datetime.now(zone) if zone else datetime.now()
+    return {
+        'now': now,
+        'anchor': now.replace(hour=0, minute=0, second=0),
+        'zone': zone,
+        'plant_today': plant_now.replace(tzinfo=None, hour=0, minute=0, second=0, microsecond=0),
+        'machines': machines,
+    }
+
+
+def shards(count):
+    for name, _, share in COLLECTIONS:
+        total = round(count * share)
+        for start in range(0, total, SHARD_SIZE):
+            yield name, start, min(start + SHARD_SIZE, total)
+
+
+def run_parallel(jobs, workers, label, drop=()):
+    if drop:
+        db = database()
+        for name in drop:
+            db.drop_collection(name)
+        print(f"✅ Dropped {', '.join(drop)}")
+        # The parent's client must not be inherited by the workers
+        db.client.close()
+        globals()['_database'] = None
+
+    started = time.time()
+    totals = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(fn, *args) for fn, args in jobs]
+        for done, future in enumerate(as_completed(futures), 1):
+            name, written, skipped = future.result()
+            written_total, skipped_total = totals.get(name, (0, 0))
+            totals[name] = (written_total + written, skipped_total + skipped)
+            print(f"   {done}/{len(futures)} shards {label}...")
+
+    elapsed = time.time() - started
+    for name, (written, skipped) in sorted(totals.items()):
+        note = f" ({skipped} duplicates skipped)" if skipped else ''
+        print(f"✅ {name}: {written} documents{note}")
+    total = sum(written for written, _ in totals.values())
+    print(f"\n{total} documents {label} in {elapsed:.1f}s ({total / max(elapsed, 0.001):.0f}/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip(), formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, help='total documents to generate across collections')
+    parser.add_argument('--out', help='write NDJSON files to this directory instead of loading')
+    parser.add_argument('--load', metavar='DIR', help='bulk-load NDJSON files from a previous --out')
+    parser.add_argument('--machines', type=int, default=50, help='size of the Softflow fleet (default 50)')
+    parser.add_argument('--seed', type=int, default=1, help='random seed (default 1)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='parallel worker processes')
+    parser.add_argument('--drop', action='store_true', help='drop the target collections first')
+    args = parser.parse_args()
+
+    if args.load:
+        files = sorted(os.path.join(args.load, f) for f in os.listdir(args.load) if f.endswith('.ndjson'))
+        if not files:
+            sys.exit(f"❌ No .ndjson files in {args.load}")
+        names = sorted({os.path.basename(path).split('.')[0] for path in files})
+        run_parallel([(load_file, (path,)) for path in files], args.workers, 'loaded', names if args.drop else ())
+        return
+
+    if not args.count or args.count < 1:
+        parser.error('--count is required to generate data')
+
+    ctx = context(args.machines)
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+        if args.drop:
+            parser.error('--drop only applies when loading into the database')
+    jobs = [(run_shard, (name, start, stop, args.seed, ctx, args.out)) for name, start, stop in shards(args.count)]
+    names = [name for name, _, _ in COLLECTIONS]
+    run_parallel(jobs, args.workers, 'written' if args.out else 'loaded', names if args.drop else ())
+
+
+if __name__ == '__main__':
+    main()
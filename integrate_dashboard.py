@@ -1,6 +1,6 @@
 """
 Script to integrate Dashboard with backend API
-Dashboard aggregates data from multiple endpoints
+Dashboard loads everything from the single /api/dashboard/summary endpoint
 """
 import re
 
@@ -16,7 +16,7 @@ content = content.replace(
 
 content = content.replace(
     "import './Dashboard.css';",
-    "import { batchAPI, machineAPI, inventoryAPI, inspectionAPI } from '../services/api';\nimport './Dashboard.css';"
+    "import { dashboardAPI } from '../services/api';\nimport './Dashboard.css';"
 )
 
 # Add Dashboard component with state
@@ -40,18 +40,14 @@ state_code = """const Dashboard = () => {
   const fetchDashboardData = async () => {
     try {
       setLoading(true);
-      const [batchStats, machineStats, inventoryAlerts, inspectionStats] = await Promise.all([
-        batchAPI.getStats(),
-        machineAPI.getStats(),
-        inventoryAPI.getAlerts(),
-        inspectionAPI.getStats()
-      ]);
+      const response = await dashboardAPI.getSummary();
+      const { batchStats, machineStats, inventoryAlerts, inspectionStats } = response.data;
       
       setDashboardData({
-        batchStats: batchStats.data,
-        machineStats: machineStats.data,
-        inventoryAlerts: inventoryAlerts.data,
-        inspectionStats: inspectionStats.data
+        batchStats,
+        machineStats,
+        inventoryAlerts,
+        inspectionStats
       });
       setError(null);
     } catch (err) {
@@ -0,0 +1,375 @@
+"""
+Script to load-test the API and catch latency regressions
+
+  python load_test.py                      start backend/bench/server.js on an in-memory MongoDB,
+                                           seed it and replay the default traffic mix
+  python load_test.py --url http://localhost:5000
+                                           replay against a running backend (no seeding)
+  python load_test.py --mix dashboard=4,list=3,stats=2,write=1 --concurrency 32 --duration 30
+  python load_test.py --save-baseline      store the results as the new baseline
+
+Reports p50/p95/p99 latency and throughput per route. When a baseline exists
+(BASELINE_PATH, or --baseline), each route is compared with it and the script
+exits 1 if any route's p95 or p99 grew, or its throughput fell, by more than
+--tolerance. Baselines are only comparable on the same machine and settings.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import time
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BACKEND = os.path.join(ROOT, 'backend')
+BASELINE_PATH = os.path.join(BACKEND, 'bench', 'load_baseline.json')
+
+DEFAULT_MIX = {'dashboard': 4, 'list': 3, 'stats': 2, 'write': 1}
+
+# Latency growth below this many ms is noise, whatever the percentage
+MIN_REGRESSION_MS = 1.0
+
+SERVER_START_TIMEOUT = 180
+
+
+class Connection:
+    """Minimal HTTP/1.1 keep-alive client over asyncio streams (JSON in, bytes out)"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+        data = json.dumps(body).encode() if body is not None else b''
+        head = f"{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\nAccept: application/json\r\n"
+        if body is not None:
+            head += "Content-Type: application/json\r\n"
+        if method != 'GET':
+            head += f"Content-Length: {len(data)}\r\n"
+        self.writer.write(head.encode() + b'\r\n' + data)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            self.close()
+            raise ConnectionError('connection closed by server')
+        status = int(status_line.split()[1])
+
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            key, _, value = line.decode('latin-1').partition(':')
+            headers[key.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding') == 'chunked':
+            chunks = []
+            while True:
+                size = int((await self.reader.readline()).split(b';')[0], 16)
+                if size == 0:
+                    await self.reader.readline()
+                    break
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readline()
+            payload = b''.join(chunks)
+        else:
+            payload = await self.reader.readexactly(int(headers.get('content-length', 0)))
+
+        if headers.get('connection', '').lower() == 'close':
+            self.close()
+        return status, payload
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+# Traffic mix: group -> [(route label, method, path(state, rng), body(state, rng) or None, accepted statuses)]
+# state holds ids collected after seeding and a counter for unique writes
+OK = {200, 201}
+
+DAYS = ['sun', 'mon', 'tue', 'wed', 'thu', 'fri']
+
+
+def next_serial(state):
+    state['serial'] += 1
+    return state['serial']
+
+
+def new_inspection(state, rng):
+    delta_e = round(rng.uniform(0.2, 2.5), 2)
+    return {
+        'date': state['today'], 'color': 'Olive', 'client': 'Modenik', 'lotNo': f"LT-{next_serial(state)}",
+        'deltaE': delta_e, 'status': 'rejected' if delta_e > 1.2 else 'approved',
+    }
+
+
+def new_schedule(state, rng):
+    # A machine of its own per request, so no write is refused as a double booking
+    return {
+        'date': state['today'], 'time': '08:00', 'machine': f"LT-{next_serial(state)}", 'party': 'LUX',
+        'color': 'Navy', 'lotNo': f"LT-{state['serial']}", 'quantity': '420 kg', 'duration': '6h 30m',
+        'priority': rng.choice(['high', 'medium', 'low']),
+    }
+
+
+ROUTES = {
+    'dashboard': [
+        ('GET /api/dashboard/summary', 'GET', lambda s, r: '/api/dashboard/summary', None, OK),
+        ('GET /api/alerts/unread-count', 'GET', lambda s, r: '/api/alerts/unread-count', None, OK),
+        ('GET /api/machines', 'GET', lambda s, r: '/api/machines', None, OK),
+        ('GET /api/alerts', 'GET', lambda s, r: '/api/alerts?limit=20', None, OK),
+    ],
+    'list': [
+        ('GET /api/batches', 'GET', lambda s, r: '/api/batches?limit=50', None, OK),
+        ('GET /api/schedules', 'GET', lambda s, r: '/api/schedules?limit=50', None, OK),
+        ('GET /api/schedules/week/:date', 'GET', lambda s, r: f"/api/schedules/week/{s['today']}", None, OK),
+        ('GET /api/inspections', 'GET', lambda s, r: '/api/inspections?status=approved&limit=50', None, OK),
+        ('GET /api/inventory', 'GET', lambda s, r: '/api/inventory?limit=50', None, OK),
+    ],
+    'stats': [
+        ('GET /api/batches/stats', 'GET', lambda s, r: '/api/batches/stats', None, OK),
+        ('GET /api/inspections/stats', 'GET', lambda s, r: '/api/inspections/stats', None, OK),
+        ('GET /api/machines/stats', 'GET', lambda s, r: '/api/machines/stats', None, OK),
+        ('GET /api/inventory/alerts', 'GET', lambda s, r: '/api/inventory/alerts', None, OK),
+    ],
+    'write': [
+        ('POST /api/inspections', 'POST', lambda s, r: '/api/inspections', new_inspection, OK),
+        ('POST /api/schedules', 'POST', lambda s, r: '/api/schedules', new_schedule, OK),
+        # 409 is the expected answer once an item runs out of stock
+        ('POST /api/inventory/:id/usage', 'POST', lambda s, r: f"/api/inventory/{r.choice(s['inventory'])}/usage",
+         lambda s, r: {'day': r.choice(DAYS), 'amount': 1}, OK | {409}),
+        ('PATCH /api/alerts/:id/read', 'PATCH', lambda s, r: f"/api/alerts/{r.choice(s['alerts'])}/read", None, OK),
+    ],
+}
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        group, _, weight = part.partition('=')
+        if group not in ROUTES:
+            sys.exit(f"❌ Unknown traffic group {group!r} (expected one of {', '.join(ROUTES)})")
+        mix[group] = float(weight or 1)
+    return mix
+
+
+async def run_worker(conn, mix, state, rng, deadline, warmup_until, samples, errors):
+    groups = [group for group in mix if mix[group] > 0]
+    weights = [mix[group] for group in groups]
+    while time.perf_counter() < deadline:
+        label, method, path, body, accepted = rng.choice(ROUTES[rng.choices(groups, weights)[0]])
+        start = time.perf_counter()
+        try:
+            status, _ = await conn.request(method, path(state, rng), body(state, rng) if body else None)
+        except (ConnectionError, asyncio.IncompleteReadError, OSError):
+            conn.close()
+            status = None
+        elapsed = (time.perf_counter() - start) * 1000
+
+        if start < warmup_until:
+            continue
+        samples.setdefault(label, []).append(elapsed)
+        if status not in accepted:
+            errors[label] = errors.get(label, 0) + 1
+
+
+def percentile(sorted_samples, fraction):
+    """Nearest-rank percentile"""
+    return sorted_samples[max(0, math.ceil(fraction * len(sorted_samples)) - 1)]
+
+
+def summarize(samples, errors, seconds):
+    results = {}
+    for label, values in samples.items():
+        values.sort()
+        results[label] = {
+            'requests': len(values),
+            'errors': errors.get(label, 0),
+            'rps': round(len(values) / seconds, 1),
+            'p50': round(percentile(values, 0.50), 2),
+            'p95': round(percentile(values, 0.95), 2),
+            'p99': round(percentile(values, 0.99), 2),
+        }
+    return results
+
+
+def print_results(results):
+    print(f"\n{'route':<36} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for label in sorted(results):
+        r = results[label]
+        print(f"{label:<36} {r['requests']:>9} {r['errors']:>7} {r['rps']:>8.1f} {r['p50']:>8.2f} {r['p95']:>8.2f} {r['p99']:>8.2f}")
+    total = sum(r['rps'] for r in results.values())
+    print(f"\n{'total':<36} {sum(r['requests'] for r in results.values()):>9} "
+          f"{sum(r['errors'] for r in results.values()):>7} {total:>8.1f}")
+
+
+def compare(results, baseline, tolerance):
+    """Regressions against the baseline as (route, description) pairs"""
+    regressions = []
+    for label, base in sorted(baseline['routes'].items()):
+        current = results.get(label)
+        if current is None:
+            continue
+        for key in ('p95', 'p99'):
+            grew = current[key] - base[key]
+            if grew > MIN_REGRESSION_MS and current[key] > base[key] * (1 + tolerance):
+                regressions.append((label, f"{key} {base[key]:.2f} -> {current[key]:.2f} ms"))
+        if current['rps'] < base['rps'] * (1 - tolerance):
+            regressions.append((label, f"throughput {base['rps']:.1f} -> {current['rps']:.1f} req/s"))
+        if current['errors'] > base['errors']:
+            regressions.append((label, f"errors {base['errors']} -> {current['errors']}"))
+    return regressions
+
+
+async def start_server(port):
+    """Start backend/bench/server.js; resolves to (process, mongodb uri) once it is ready"""
+    env = {**os.environ, 'BENCH_PORT': str(port)}
+    proc = await asyncio.create_subprocess_exec(
+        'node', os.path.join('bench', 'server.js'), cwd=BACKEND, env=env,
+        stdout=asyncio.subprocess.PIPE,
+    )
+
+    async def ready():
+        while True:
+            line = await proc.stdout.readline()
+            if not line:
+                sys.exit(f"❌ backend/bench/server.js exited with code {await proc.wait()}")
+            if line.startswith(b'{"ready"'):
+                return json.loads(line)['mongodbUri']
+
+    uri = await asyncio.wait_for(ready(), SERVER_START_TIMEOUT)
+
+    # Keep draining stdout so request logging never blocks the server
+    async def drain():
+        while await proc.stdout.readline():
+            pass
+    asyncio.get_running_loop().create_task(drain())
+    return proc, uri
+
+
+def seed(mongodb_uri, count, machines):
+    """Load count generated documents with generate_data.py"""
+    os.environ['MONGODB_URI'] = mongodb_uri
+    import generate_data
+
+    ctx = generate_data.context(machines)
+    written = 0
+    for name, start, stop in generate_data.shards(count):
+        written += generate_data.run_shard(name, start, stop, 1, ctx, None)[1]
+    print(f"✅ Seeded {written} documents")
+
+
+async def prepare(host, port, machines, today):
+    """Machines for the dashboard routes and the ids write traffic touches"""
+    conn = Connection(host, port)
+    try:
+        statuses = ['running'] * 6 + ['idle'] * 3 + ['maintenance']
+        for i in range(machines):
+            await conn.request('POST', '/api/machines', {
+                'machineId': f"SF-{i + 1:02d}", 'name': f"Softflow {i + 1}", 'status': statuses[i % len(statuses)],
+                'efficiency': 80 + i % 20,
+            })
+
+        ids = {}
+        for key, path in (('inventory', '/api/inventory?limit=200'), ('alerts', '/api/alerts?limit=200')):
+            status, payload = await conn.request('GET', path)
+            ids[key] = [doc['_id'] for doc in json.loads(payload)] if status == 200 else []
+            if not ids[key]:
+                sys.exit(f"❌ No {key} to write to - seed the database first")
+    finally:
+        conn.close()
+    return {'serial': int(time.time()), 'today': today, **ids}
+
+
+async def run(args):
+    proc = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        host, port = '127.0.0.1', args.port
+        proc, mongodb_uri = await start_server(port)
+        seed(mongodb_uri, args.seed_count, args.machines)
+
+    try:
+        state = await prepare(host, port, args.machines if not args.url else 0, time.strftime('%Y-%m-%d', time.gmtime()))
+
+        samples, errors = {}, {}
+        start = time.perf_counter()
+        warmup_until = start + args.warmup
+        deadline = warmup_until + args.duration
+        conns = [Connection(host, port) for _ in range(args.concurrency)]
+        print(f"   {args.concurrency} connections for {args.warmup}s warm-up + {args.duration}s, mix {args.mix}...")
+        try:
+            await asyncio.gather(*(
+                run_worker(conn, args.mix_weights, state, random.Random(i), deadline, warmup_until, samples, errors)
+                for i, conn in enumerate(conns)
+            ))
+        finally:
+            for conn in conns:
+                conn.close()
+        return summarize(samples, errors, args.duration)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            await proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip(), formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='backend to test instead of starting one (not seeded)')
+    parser.add_argument('--port', type=int, default=5055, help='port for the started backend (default 5055)')
+    parser.add_argument('--mix', default=','.join(f"{group}={weight}" for group, weight in DEFAULT_MIX.items()),
+                        help='traffic groups and weights (default %(default)s)')
+    parser.add_argument('--concurrency', type=int, default=16, help='concurrent connections (default 16)')
+    parser.add_argument('--duration', type=float, default=20, help='measured seconds (default 20)')
+    parser.add_argument('--warmup', type=float, default=3, help='unmeasured warm-up seconds (default 3)')
+    parser.add_argument('--seed-count', type=int, default=50000, help='documents to seed (default 50000)')
+    parser.add_argument('--machines', type=int, default=50, help='machines to create (default 50)')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='baseline file (default backend/bench/load_baseline.json)')
+    parser.add_argument('--save-baseline', action='store_true', help='store the results as the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed regression ratio (default 0.25)')
+    args = parser.parse_args()
+    args.mix_weights = parse_mix(args.mix)
+
+    results = asyncio.run(run(args))
+    print_results(results)
+
+    settings = {key: getattr(args, key) for key in ('mix', 'concurrency', 'duration', 'seed_count', 'machines')}
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'settings': settings, 'routes': results}, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\n✅ Baseline saved to {os.path.relpath(args.baseline, ROOT)}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {os.path.relpath(args.baseline, ROOT)} - run with --save-baseline to create one")
+        return
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('settings') != settings:
+        print(f"\n⚠️  Baseline was recorded with different settings: {baseline.get('settings')}")
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regressions beyond {args.tolerance:.0%}:")
+        for label, description in regressions:
+            print(f"   {label}: {description}")
+        sys.exit(1)
+    print(f"\n✅ No regressions beyond {args.tolerance:.0%} against the baseline")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Script to backfill the numeric quantityKg / durationMinutes fields on batches
+Parses the text quantity ("331 kg") and duration ("6h 45m") the same way as
+backend/utils/units.js, in bulk batches. Safe to re-run. Batches whose text
+names a unit the parser does not know are listed and left unset.
+
+Usage: python migrate_batch_numbers.py [--dry-run]
+MONGODB_URI is read from the environment or backend/.env
+"""
+import math
+import os
+import re
+import sys
+
+from pymongo import MongoClient, UpdateOne
+
+BATCH_SIZE = 1000
+
+WEIGHT_UNITS_KG = {'kg': 1, 'kgs': 1, 'g': 0.001, 't': 1000, 'ton': 1000, 'tons': 1000}
+DURATION_UNITS_MIN = {
+    'h': 60, 'hr': 60, 'hrs': 60, 'hour': 60, 'hours': 60,
+    'm': 1, 'min': 1, 'mins': 1, 'minute': 1, 'minutes': 1,
+}
+NUMBER_WITH_UNIT = re.compile(r'(\d+(?:\.\d+)?)\s*([a-z]*)', re.IGNORECASE)
+
+
+def round_half_up(value):
+    """JavaScript Math.round: halves round up (Python's round() goes to even)."""
+    return math.floor(value + 0.5)
+
+
+def unit_factor(units, unit, bare, kind, text):
+    if unit == '':
+        return bare
+    if unit.lower() not in units:
+        raise ValueError('Unknown %s unit "%s" in "%s"' % (kind, unit, text))
+    return units[unit.lower()]
+
+
+def parse_quantity_kg(text):
+    match = NUMBER_WITH_UNIT.search(str(text or '').replace(',', ''))
+    if not match:
+        return None
+    factor = unit_factor(WEIGHT_UNITS_KG, match.group(2), 1, 'weight', text)
+    return round_half_up(float(match.group(1)) * factor * 1000) / 1000
+
+
+def parse_duration_minutes(text):
+    parts = NUMBER_WITH_UNIT.findall(str(text or ''))
+    if not parts:
+        return None
+    total = 0
+    for value, unit in parts:
+        total += float(value) * unit_factor(DURATION_UNITS_MIN, unit, 60, 'duration', text)
+    return round_half_up(total)
+
+
+def read_mongodb_uri():
+    if os.environ.get('MONGODB_URI'):
+        return os.environ['MONGODB_URI']
+
+    env_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend', '.env')
+    if os.path.exists(env_path):
+        with open(env_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                key, _, value = line.strip().partition('=')
+                if key == 'MONGODB_URI':
+                    return value.strip().strip('"\'')
+    sys.exit("❌ MONGODB_URI is not set (environment or backend/.env)")
+
+
+def main():
+    dry_run = '--dry-run' in sys.argv[1:]
+
+    client = MongoClient(read_mongodb_uri())
+    batches = client.get_default_database(default='test')['batches']
+
+    pending = {'$or': [{'quantityKg': {'$exists': False}}, {'durationMinutes': {'$exists': False}}]}
+    cursor = batches.find(pending, {'quantity': 1, 'duration': 1}, batch_size=BATCH_SIZE)
+
+    ops = []
+    rejected = []
+    scanned = updated = 0
+    for doc in cursor:
+        scanned += 1
+        try:
+            fields = {
+                'quantityKg': parse_quantity_kg(doc.get('quantity')),
+                'durationMinutes': parse_duration_minutes(doc.get('duration')),
+            }
+        except ValueError as e:
+            rejected.append((doc['_id'], str(e)))
+            continue
+        ops.append(UpdateOne({'_id': doc['_id']}, {'$set': fields}))
+
+        if len(ops) >= BATCH_SIZE:
+            if not dry_run:
+                updated += batches.bulk_write(ops, ordered=False).modified_count
+            ops = []
+            print(f"   {scanned} batches processed...")
+
+    if ops and not dry_run:
+        updated += batches.bulk_write(ops, ordered=False).modified_count
+
+    if dry_run:
+        print(f"✅ Dry run: {scanned - len(rejected)} batches would be backfilled")
+    else:
+        print(f"✅ Backfilled {updated} of {scanned} batches")
+    if rejected:
+        print(f"❌ {len(rejected)} batches skipped, fix their text and re-run:")
+        for _id, reason in rejected:
+            print(f"   {_id}: {reason}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Script to backfill startAt / endAt on schedules for machine double-booking checks
+Derives the slot from date, time and duration the same way as the Schedule
+model (setSlot), in bulk batches: date and time are plant wall-clock time in
+PLANT_TIMEZONE, or the local time zone when it is unset. Safe to re-run.
+
+Usage: python migrate_schedule_slots.py [--dry-run] [--all]
+  --all  re-derive every slot, not only missing ones (after PLANT_TIMEZONE
+         changes, or for slots backfilled when they were read as UTC)
+MONGODB_URI and PLANT_TIMEZONE are read from the environment or backend/.env
+"""
+import os
+import re
+import sys
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from pymongo import MongoClient, UpdateOne
+
+from migrate_batch_numbers import BATCH_SIZE, parse_duration_minutes, read_mongodb_uri
+
+CLOCK = re.compile(r'^(\d{1,2}):(\d{2})')
+
+
+def read_plant_timezone():
+    if os.environ.get('PLANT_TIMEZONE'):
+        return ZoneInfo(os.environ['PLANT_TIMEZONE'])
+
+    env_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend', '.env')
+    if os.path.exists(env_path):
+        with open(env_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                key, _, value = line.strip().partition('=')
+                if key == 'PLANT_TIMEZONE':
+                    return ZoneInfo(value.strip().strip('"\''))
+    return None
+
+
+def to_utc(wall, zone):
+    """Naive UTC datetime (as pymongo stores it) of a plant wall-clock time"""
+    aware = wall.replace(tzinfo=zone) if zone else wall.astimezone()
+    return aware.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def slot_of(doc, zone=None):
+    clock = CLOCK.match(str(doc.get('time') or ''))
+    minutes = parse_duration_minutes(doc.get('duration'))
+    try:
+        day = datetime.strptime(str(doc.get('date')), '%Y-%m-%d')
+    except ValueError:
+        return None
+    if not clock or not minutes:
+        return None
+
+    start = to_utc(day + timedelta(hours=int(clock.group(1)), minutes=int(clock.group(2))), zone)
+    return start, start + timedelta(minutes=minutes)
+
+
+def main():
+    dry_run = '--dry-run' in sys.argv[1:]
+    rederive = '--all' in sys.argv[1:]
+    zone = read_plant_timezone()
+
+    client = MongoClient(read_mongodb_uri())
+    schedules = client.get_default_database(default='test')['schedules']
+
+    pending = {} if rederive else {'startAt': {'$exists': False}}
+    cursor = schedules.find(pending, {'date': 1, 'time': 1, 'duration': 1}, batch_size=BATCH_SIZE)
+
+    ops = []
+    scanned = updated = unparsed = 0
+    for doc in cursor:
+        scanned += 1
+        slot = slot_of(doc, zone)
+        if not slot:
+            unparsed += 1
+            continue
+        ops.append(UpdateOne({'_id': doc['_id']}, {'$set': {'startAt': slot[0], 'endAt': slot[1]}}))
+
+        if len(ops) >= BATCH_SIZE:
+            if not dry_run:
+                updated += schedules.bulk_write(ops, ordered=False).modified_count
+            ops = []
+            print(f"   {scanned} schedules processed...")
+
+    if ops and not dry_run:
+        updated += schedules.bulk_write(ops, ordered=False).modified_count
+
+    if dry_run:
+        print(f"✅ Dry run: {scanned - unparsed} of {scanned} schedules would be backfilled")
+    else:
+        print(f"✅ Backfilled {updated} of {scanned} schedules")
+    if unparsed:
+        print(f"⚠️  {unparsed} schedules have a date, time or duration that does not parse")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+import { useState, useEffect, useCallback, useRef } from 'react';
+
+// Rows of a paginated list, one page at a time, instead of the whole
+// collection. fetchPage is an API client's getPage; params are server-side
+// filters, and changing them reloads from the first page. loadMore appends
+// the next page while hasMore; reload starts over (e.g. after a write).
+const usePagedList = (fetchPage, params = {}, pageSize = 100) => {
+  const [items, setItems] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [error, setError] = useState(null);
+
+  // Responses to an older reload (filters changed meanwhile) are dropped
+  const request = useRef(0);
+  const paramsKey = JSON.stringify(params);
+
+  const reload = useCallback(async () => {
+    const id = ++request.current;
+    try {
+      setLoading(true);
+      const page = await fetchPage({ ...JSON.parse(paramsKey), limit: pageSize });
+      if (id !== request.current) return;
+      setItems(page.data);
+      setNextCursor(page.nextCursor);
+      setError(null);
+    } catch (err) {
+      if (id === request.current) setError(err);
+    } finally {
+      if (id === request.current) setLoading(false);
+    }
+  }, [fetchPage, paramsKey, pageSize]);
+
+  useEffect(() => {
+    reload();
+  }, [reload]);
+
+  const loadMore = async () => {
+    if (!nextCursor || loadingMore) return;
+    const id = request.current;
+    try {
+      setLoadingMore(true);
+      const page = await fetchPage({ ...JSON.parse(paramsKey), limit: pageSize, cursor: nextCursor });
+      if (id !== request.current) return;
+      setItems(prev => [...prev, ...page.data]);
+      setNextCursor(page.nextCursor);
+    } catch (err) {
+      if (id === request.current) setError(err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  return { items, loading, loadingMore, error, hasMore: Boolean(nextCursor), loadMore, reload };
+};
+
+export default usePagedList;
@@ -1,50 +1,37 @@
 import React, { useState, useEffect } from 'react';
 import { Bell, AlertTriangle, CheckCircle, AlertCircle, Settings as SettingsIcon, X } from 'lucide-react';
 import { alertAPI } from '../services/api';
+import usePagedList from '../hooks/usePagedList';
 import './Alerts.css';
 
 const Alerts = () => {
   const [filter, setFilter] = useState('all');
   const [showSettings, setShowSettings] = useState(false);
-  const [alerts, setAlerts] = useState([]);
-  const [loading, setLoading] = useState(true);
-  const [error, setError] = useState(null);
+  const [counts, setCounts] = useState({ total: 0, byType: {} });
 
-  // Fetch alerts on component mount
+  // The filter is applied by the server, so only the alerts shown are loaded
+  const filterParams = filter === 'all' ? {} : filter === 'unread' ? { read: false } : { type: filter };
+  const { items: filteredAlerts, loading, loadingMore, error, hasMore, loadMore } = usePagedList(alertAPI.getPage, filterParams);
+
+  // Unread totals for the summary cards, counted server-side
   useEffect(() => {
-    fetchAlerts();
+    alertAPI.getUnreadCounts()
+      .then(response => setCounts(response.data))
+      .catch(err => console.error('Error fetching alert counts:', err));
   }, []);
 
-  const fetchAlerts = async () => {
-    try {
-      setLoading(true);
-      const response = await alertAPI.getAll();
-      setAlerts(response.data);
-      setError(null);
-    } catch (err) {
-      console.error('Error fetching alerts:', err);
-      setError('Failed to load alerts');
-    } finally {
-      setLoading(false);
-    }
-  };
-
-  const filteredAlerts = alerts.filter(alert => {
-    if (filter === 'all') return true;
-    if (filter === 'unread') return !alert.read;
-    return alert.type === filter;
-  });
+  if (error) console.error('Error fetching alerts:', error);
 
-  const unreadCount = alerts.filter(a => !a.read).length;
-  const criticalAlerts = alerts.filter(a => a.type === 'critical').length;
-  const warningAlerts = alerts.filter(a => a.type === 'warning').length;
+  const unreadCount = counts.total;
+  const criticalAlerts = counts.byType.critical || 0;
+  const warningAlerts = counts.byType.warning || 0;
 
   if (loading) {
     return <div className="alerts"><div className="page-header"><h1>Loading alerts...</h1></div></div>;
   }
 
   if (error) {
-    return <div className="alerts"><div className="page-header"><h1>Error: {error}</h1></div></div>;
+    return <div className="alerts"><div className="page-header"><h1>Error: Failed to load alerts</h1></div></div>;
   }
 
   const getAlertIcon = (type) => {
@@ -130,7 +117,7 @@ const Alerts = () => {
             <AlertTriangle size={24} />
           </div>
           <div className="summary-info">
-            <p className="summary-label">Critical</p>
+            <p className="summary-label">Unread Critical</p>
             <h3 className="summary-value">{criticalAlerts}</h3>
           </div>
         </div>
@@ -140,7 +127,7 @@ const Alerts = () => {
             <AlertCircle size={24} />
           </div>
           <div className="summary-info">
-            <p className="summary-label">Warnings</p>
+            <p className="summary-label">Unread Warnings</p>
             <h3 className="summary-value">{warningAlerts}</h3>
           </div>
         </div>
@@ -221,6 +208,11 @@ const Alerts = () => {
             </div>
           );
         })}
+        {hasMore && (
+          <button className="load-more-button" onClick={loadMore} disabled={loadingMore}>
+            {loadingMore ? 'Loading...' : 'Load more'}
+          </button>
+        )}
       </div>
 
       {/* Settings Modal */}
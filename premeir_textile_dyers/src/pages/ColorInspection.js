@@ -2,13 +2,12 @@ import React, { useState, useEffect } from 'react';
 import { PieChart, Pie, Cell, ResponsiveContainer, Legend, Tooltip } from 'recharts';
 import { Plus, Search, Eye, CheckCircle, Clock, XCircle, Edit2 } from 'lucide-react';
 import { inspectionAPI } from '../services/api';
+import usePagedList from '../hooks/usePagedList';
 import './ColorInspection.css';
 
 const ColorInspection = () => {
   const [activeFilter, setActiveFilter] = useState('all');
-  const [inspections, setInspections] = useState([]);
-  const [loading, setLoading] = useState(true);
-  const [error, setError] = useState(null);
+  const [stats, setStats] = useState(null);
   const [showModal, setShowModal] = useState(false);
   const [searchQuery, setSearchQuery] = useState('');
   const [isEditing, setIsEditing] = useState(false);
@@ -23,25 +22,31 @@ const ColorInspection = () => {
     notes: ''
   });
 
-  // Fetch inspections on component mount
-  useEffect(() => {
-    fetchInspections();
-  }, []);
+  // The status filter is applied by the server; the summary comes from
+  // /inspections/stats rather than from the rows loaded so far
+  const statusParams = activeFilter === 'all' ? {} : { status: activeFilter };
+  const { items: inspections, loading, loadingMore, error, hasMore, loadMore, reload } = usePagedList(inspectionAPI.getPage, statusParams);
 
-  const fetchInspections = async () => {
+  const fetchStats = async () => {
     try {
-      setLoading(true);
-      const response = await inspectionAPI.getAll();
-      setInspections(response.data);
-      setError(null);
+      const response = await inspectionAPI.getStats();
+      setStats(response.data);
     } catch (err) {
-      console.error('Error fetching inspections:', err);
-      setError('Failed to load inspections');
-    } finally {
-      setLoading(false);
+      console.error('Error fetching inspection stats:', err);
     }
   };
 
+  useEffect(() => {
+    fetchStats();
+  }, []);
+
+  if (error) console.error('Error fetching inspections:', error);
+
+  const fetchInspections = () => {
+    reload();
+    fetchStats();
+  };
+
   const handleInputChange = (e) => {
     const { name, value } = e.target;
     setFormData(prev => ({
@@ -115,17 +120,12 @@ const ColorInspection = () => {
     setShowModal(true);
   };
 
+  // Search narrows the rows loaded so far
   const filteredInspections = inspections.filter(item => {
-    // Filter by status
-    const statusMatch = activeFilter === 'all' || item.status === activeFilter;
-
-    // Filter by search query
-    const searchMatch = !searchQuery ||
+    return !searchQuery ||
       item.color.toLowerCase().includes(searchQuery.toLowerCase()) ||
       item.client.toLowerCase().includes(searchQuery.toLowerCase()) ||
       item.lotNo.toLowerCase().includes(searchQuery.toLowerCase());
-
-    return statusMatch && searchMatch;
   });
 
   const getStatusIcon = (status) => {
@@ -162,16 +162,15 @@ const ColorInspection = () => {
   }
 
   if (error) {
-    return <div className="color-inspection"><div className="page-header"><h1>Error: {error}</h1></div></div>;
+    return <div className="color-inspection"><div className="page-header"><h1>Error: Failed to load inspections</h1></div></div>;
   }
 
-  const totalInspections = inspections.length;
-  const approvedCount = inspections.filter(i => i.status === 'approved').length;
-  const pendingCount = inspections.filter(i => i.status === 'pending').length;
-  const rejectedCount = inspections.filter(i => i.status === 'rejected').length;
-  const approvalRate = totalInspections > 0 ? Math.round((approvedCount / totalInspections) * 100) : 0;
-  const withDeltaE = inspections.filter(i => i.deltaE);
-  const avgDeltaE = withDeltaE.length > 0 ? (withDeltaE.reduce((sum, i) => sum + i.deltaE, 0) / withDeltaE.length).toFixed(2) : '0.00';
+  const totalInspections = stats ? stats.total : 0;
+  const approvedCount = stats ? stats.approved : 0;
+  const pendingCount = stats ? stats.pending : 0;
+  const rejectedCount = stats ? stats.rejected : 0;
+  const approvalRate = stats ? stats.approvalRate : 0;
+  const avgDeltaE = stats && stats.avgDeltaE ? stats.avgDeltaE : '0.00';
   const pendingReview = pendingCount;
 
   // Dynamic pie chart data
@@ -369,6 +368,11 @@ const ColorInspection = () => {
                 ))}
               </tbody>
             </table>
+            {hasMore && (
+              <button className="load-more-button" onClick={loadMore} disabled={loadingMore}>
+                {loadingMore ? 'Loading...' : 'Load more'}
+              </button>
+            )}
           </div>
         </div>
       </div>
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { AreaChart, Area, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer, Line } from 'recharts';
 import { Settings, TrendingUp, FlaskConical, Palette, AlertTriangle } from 'lucide-react';
-import { batchAPI, machineAPI, inventoryAPI, inspectionAPI } from '../services/api';
+import { dashboardAPI } from '../services/api';
 import './Dashboard.css';
 
 const Dashboard = () => {
@@ -22,18 +22,14 @@ const Dashboard = () => {
   const fetchDashboardData = async () => {
     try {
       setLoading(true);
-      const [batchStats, machineStats, inventoryAlerts, inspectionStats] = await Promise.all([
-        batchAPI.getStats(),
-        machineAPI.getStats(),
-        inventoryAPI.getAlerts(),
-        inspectionAPI.getStats()
-      ]);
+      const response = await dashboardAPI.getSummary();
+      const { batchStats, machineStats, inventoryAlerts, inspectionStats } = response.data;
 
       setDashboardData({
-        batchStats: batchStats.data,
-        machineStats: machineStats.data,
-        inventoryAlerts: inventoryAlerts.data,
-        inspectionStats: inspectionStats.data
+        batchStats,
+        machineStats,
+        inventoryAlerts,
+        inspectionStats
       });
       setError(null);
     } catch (err) {
@@ -2,13 +2,15 @@ import React, { useState, useEffect } from 'react';
 import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer } from 'recharts';
 import { Plus, Search } from 'lucide-react';
 import { inventoryAPI } from '../services/api';
+import usePagedList from '../hooks/usePagedList';
 import './DyesChemicals.css';
 
+// Inventory category shown by each tab
+const TAB_CATEGORIES = { dyes: 'Dye', chemicals: 'Chemical' };
+
 const DyesChemicals = () => {
   const [activeTab, setActiveTab] = useState('all');
-  const [inventory, setInventory] = useState([]);
-  const [loading, setLoading] = useState(true);
-  const [error, setError] = useState(null);
+  const [stats, setStats] = useState(null);
   const [showModal, setShowModal] = useState(false);
   const [searchQuery, setSearchQuery] = useState('');
   const [formData, setFormData] = useState({
@@ -27,25 +29,31 @@ const DyesChemicals = () => {
     }
   });
 
-  // Fetch inventory on component mount
-  useEffect(() => {
-    fetchInventory();
-  }, []);
+  // The category tab is applied by the server; the summary and the usage
+  // chart come from /inventory/stats rather than from the rows loaded so far
+  const categoryParams = TAB_CATEGORIES[activeTab] ? { category: TAB_CATEGORIES[activeTab] } : {};
+  const { items: inventory, loading, loadingMore, error, hasMore, loadMore, reload } = usePagedList(inventoryAPI.getPage, categoryParams);
 
-  const fetchInventory = async () => {
+  const fetchStats = async () => {
     try {
-      setLoading(true);
-      const response = await inventoryAPI.getAll();
-      setInventory(response.data);
-      setError(null);
+      const response = await inventoryAPI.getStats();
+      setStats(response.data);
     } catch (err) {
-      console.error('Error fetching inventory:', err);
-      setError('Failed to load inventory');
-    } finally {
-      setLoading(false);
+      console.error('Error fetching inventory stats:', err);
     }
   };
 
+  useEffect(() => {
+    fetchStats();
+  }, []);
+
+  if (error) console.error('Error fetching inventory:', error);
+
+  const fetchInventory = () => {
+    reload();
+    fetchStats();
+  };
+
   const handleInputChange = (e) => {
     const { name, value } = e.target;
     setFormData(prev => ({
@@ -114,18 +122,10 @@ const DyesChemicals = () => {
     }
   };
 
-  // Filter items by tab and search
+  // Search narrows the rows loaded so far
   const filteredItems = inventory.filter(item => {
-    // Filter by tab
-    const tabMatch = activeTab === 'all' ||
-      (activeTab === 'dyes' && item.category === 'Dye') ||
-      (activeTab === 'chemicals' && item.category === 'Chemical');
-
-    // Filter by search
-    const searchMatch = !searchQuery ||
+    return !searchQuery ||
       item.name.toLowerCase().includes(searchQuery.toLowerCase());
-
-    return tabMatch && searchMatch;
   });
 
   const getStatusClass = (status) => {
@@ -144,42 +144,24 @@ const DyesChemicals = () => {
     return '';
   };
 
-  // Calculate dynamic stats
-  const totalItems = inventory.length;
-  const dyesCount = inventory.filter(i => i.category === 'Dye').length;
-  const chemicalsCount = inventory.filter(i => i.category === 'Chemical').length;
-  const lowStockCount = inventory.filter(i => i.status !== 'ok').length;
-
-  // Calculate weekly usage data from inventory
-  const weeklyUsageData = [
-    { day: 'Sun', dyes: 0, chemicals: 0 },
-    { day: 'Mon', dyes: 0, chemicals: 0 },
-    { day: 'Tue', dyes: 0, chemicals: 0 },
-    { day: 'Wed', dyes: 0, chemicals: 0 },
-    { day: 'Thu', dyes: 0, chemicals: 0 },
-    { day: 'Fri', dyes: 0, chemicals: 0 }
-  ];
-
-  inventory.forEach(item => {
-    if (item.weeklyUsage) {
-      const days = ['sun', 'mon', 'tue', 'wed', 'thu', 'fri'];
-      days.forEach((day, index) => {
-        const usage = item.weeklyUsage[day] || 0;
-        if (item.category === 'Dye') {
-          weeklyUsageData[index].dyes += usage;
-        } else {
-          weeklyUsageData[index].chemicals += usage;
-        }
-      });
-    }
-  });
+  // Summary and weekly usage, counted server-side
+  const totalItems = stats ? stats.total : 0;
+  const dyesCount = stats ? stats.dyes : 0;
+  const chemicalsCount = stats ? stats.chemicals : 0;
+  const lowStockCount = stats ? stats.lowStock : 0;
+
+  const weeklyUsageData = (stats ? stats.weeklyUsage : []).map(usage => ({
+    day: usage.day.charAt(0).toUpperCase() + usage.day.slice(1),
+    dyes: usage.dyes,
+    chemicals: usage.chemicals
+  }));
 
   if (loading) {
     return <div className="dyes-chemicals"><div className="page-header"><h1>Loading inventory...</h1></div></div>;
   }
 
   if (error) {
-    return <div className="dyes-chemicals"><div className="page-header"><h1>Error: {error}</h1></div></div>;
+    return <div className="dyes-chemicals"><div className="page-header"><h1>Error: Failed to load inventory</h1></div></div>;
   }
 
   return (
@@ -342,6 +324,11 @@ const DyesChemicals = () => {
               ))}
             </tbody>
           </table>
+          {hasMore && (
+            <button className="load-more-button" onClick={loadMore} disabled={loadingMore}>
+              {loadingMore ? 'Loading...' : 'Load more'}
+            </button>
+          )}
         </div>
       </div>
 
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Activity, Clock, Plus, X, Edit2 } from 'lucide-react';
 import { machineAPI } from '../services/api';
+import usePagedList from '../hooks/usePagedList';
 import './MachineData.css';
 
 const MachineData = () => {
@@ -9,8 +10,8 @@ const MachineData = () => {
   const [editingMachine, setEditingMachine] = useState(null);
   const [statusFilter, setStatusFilter] = useState('all');
   const [newlyAddedMachine, setNewlyAddedMachine] = useState(null);
-  const [loading, setLoading] = useState(true);
-  const [error, setError] = useState(null);
+  const [stats, setStats] = useState(null);
+  const [availableMachines, setAvailableMachines] = useState([]);
   const [formData, setFormData] = useState({
     machine: '',
     party: '',
@@ -21,40 +22,50 @@ const MachineData = () => {
     expectedDuration: ''
   });
 
-  const [machines, setMachines] = useState([]);
+  // The status filter is applied by the server; the summary comes from
+  // /machines/stats rather than from the machines loaded so far
+  const statusParams = statusFilter === 'all' ? {} : { status: statusFilter };
+  const { items: filteredMachines, loading, loadingMore, error, hasMore, loadMore, reload } = usePagedList(machineAPI.getPage, statusParams);
+
+  const fetchStats = async () => {
+    try {
+      const response = await machineAPI.getStats();
+      setStats(response.data);
+    } catch (err) {
+      console.error('Error fetching machine stats:', err);
+    }
+  };
 
-  // Fetch machines on component mount
   useEffect(() => {
-    fetchMachines();
+    fetchStats();
   }, []);
 
+  if (error) console.error('Error fetching machines:', error);
+
   const fetchMachines = async () => {
+    await reload();
+    await fetchStats();
+  };
+
+  // Idle and maintenance machines a job can be assigned to, loaded when the
+  // Add Job form opens
+  const openAddJob = async () => {
+    setShowAddJobModal(true);
     try {
-      setLoading(true);
-      const response = await machineAPI.getAll();
-      setMachines(response.data);
-      setError(null);
+      const [idle, maintenance] = await Promise.all([
+        machineAPI.getPage({ status: 'idle', limit: 500 }),
+        machineAPI.getPage({ status: 'maintenance', limit: 500 })
+      ]);
+      setAvailableMachines([...idle.data, ...maintenance.data].sort((a, b) => a.machineId.localeCompare(b.machineId)));
     } catch (err) {
-      console.error('Error fetching machines:', err);
-      setError('Failed to load machines');
-    } finally {
-      setLoading(false);
+      console.error('Error fetching available machines:', err);
     }
   };
 
-  // Filter machines based on status
-  const filteredMachines = statusFilter === 'all'
-    ? machines
-    : machines.filter(m => m.status === statusFilter);
-
-  const runningMachines = machines.filter(m => m.status === 'running').length;
-  const totalMachines = machines.length;
-  const avgEfficiency = Math.round(
-    machines.filter(m => m.status === 'running')
-      .reduce((sum, m) => sum + m.efficiency, 0) / runningMachines
-  );
-  const totalProduction = machines.filter(m => m.status === 'running')
-    .reduce((sum, m) => sum + parseInt(m.quantity), 0);
+  const runningMachines = stats ? stats.running : 0;
+  const totalMachines = stats ? stats.total : 0;
+  const avgEfficiency = stats ? stats.avgEfficiency : 0;
+  const totalProduction = stats ? stats.totalProduction : 0;
 
   const getStatusColor = (status) => {
     switch (status) {
@@ -87,7 +98,7 @@ const MachineData = () => {
 
     try {
       // Find the machine by machineId
-      const machine = machines.find(m => m.machineId === formData.machine);
+      const machine = availableMachines.find(m => m.machineId === formData.machine);
       if (!machine) {
         alert('Machine not found');
         return;
@@ -165,14 +176,12 @@ const MachineData = () => {
     }
   };
 
-  const availableMachines = machines.filter(m => m.status === 'idle' || m.status === 'maintenance');
-
   if (loading) {
     return <div className="machine-data"><div className="page-header"><h1>Loading...</h1></div></div>;
   }
 
   if (error) {
-    return <div className="machine-data"><div className="page-header"><h1>Error: {error}</h1></div></div>;
+    return <div className="machine-data"><div className="page-header"><h1>Error: Failed to load machines</h1></div></div>;
   }
 
 
@@ -183,7 +192,7 @@ const MachineData = () => {
           <h1>Machine Running Data</h1>
           <p className="page-subtitle">Real-time production monitoring and machine status</p>
         </div>
-        <button className="add-job-button" onClick={() => setShowAddJobModal(true)}>
+        <button className="add-job-button" onClick={openAddJob}>
           <Plus size={20} />
           Add Job
         </button>
@@ -327,6 +336,11 @@ const MachineData = () => {
           </div>
         ))}
       </div>
+      {hasMore && (
+        <button className="load-more-button" onClick={loadMore} disabled={loadingMore}>
+          {loadingMore ? 'Loading...' : 'Load more'}
+        </button>
+      )}
 
       {/* Add Job Modal */}
       {showAddJobModal && (
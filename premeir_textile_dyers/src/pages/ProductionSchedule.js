@@ -31,8 +31,9 @@ const ProductionSchedule = () => {
   const fetchSchedules = async () => {
     try {
       setLoading(true);
-      const response = await scheduleAPI.getAll();
-      setSchedules(response.data);
+      // One request for the whole week, already grouped by day and machine
+      const response = await scheduleAPI.getWeek('2025-12-15');
+      setSchedules(response.data.days.flatMap(day => day.machines.flatMap(machine => machine.slots)));
       setError(null);
     } catch (err) {
       console.error('Error fetching schedules:', err);
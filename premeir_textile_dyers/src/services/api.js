@@ -8,11 +8,20 @@ const api = axios.create({
     }
 });
 
+// One page of a keyset-paginated list. nextCursor comes from the
+// X-Next-Cursor header and is null on the last page; pass it back as
+// params.cursor to get the next one (see hooks/usePagedList.js).
+const getPage = async (url, params) => {
+    const response = await api.get(url, { params });
+    return { ...response, nextCursor: response.headers['x-next-cursor'] || null };
+};
+
 // Batch API
 export const batchAPI = {
     getAll: (params) => api.get('/batches', { params }),
     getById: (id) => api.get(`/batches/${id}`),
     getStats: () => api.get('/batches/stats'),
+    export: (params) => api.get('/batches/export', { params, responseType: 'blob' }),
     create: (data) => api.post('/batches', data),
     update: (id, data) => api.put(`/batches/${id}`, data),
     delete: (id) => api.delete(`/batches/${id}`)
@@ -21,9 +30,12 @@ export const batchAPI = {
 // Schedule API
 export const scheduleAPI = {
     getAll: (params) => api.get('/schedules', { params }),
+    getPage: (params) => getPage('/schedules', params),
     getById: (id) => api.get(`/schedules/${id}`),
     getWeek: (date) => api.get(`/schedules/week/${date}`),
     create: (data) => api.post('/schedules', data),
+    createBulk: (items, params) => api.post('/schedules/bulk', items, { params }),
+    optimize: (data) => api.post('/schedules/optimize', data),
     update: (id, data) => api.put(`/schedules/${id}`, data),
     delete: (id) => api.delete(`/schedules/${id}`)
 };
@@ -31,32 +43,42 @@ export const scheduleAPI = {
 // Inventory API
 export const inventoryAPI = {
     getAll: (params) => api.get('/inventory', { params }),
+    getPage: (params) => getPage('/inventory', params),
     getById: (id) => api.get(`/inventory/${id}`),
+    getStats: () => api.get('/inventory/stats'),
     getAlerts: () => api.get('/inventory/alerts'),
     create: (data) => api.post('/inventory', data),
+    createBulk: (items, params) => api.post('/inventory/bulk', items, { params }),
     update: (id, data) => api.put(`/inventory/${id}`, data),
     recordUsage: (id, data) => api.post(`/inventory/${id}/usage`, data),
+    recordBatchUsage: (items, day) => api.post('/inventory/usage', { day, items }),
     delete: (id) => api.delete(`/inventory/${id}`)
 };
 
 // Machine API
 export const machineAPI = {
-    getAll: () => api.get('/machines'),
+    getAll: (params) => api.get('/machines', { params }),
+    getPage: (params) => getPage('/machines', params),
     getById: (id) => api.get(`/machines/${id}`),
     getStats: () => api.get('/machines/stats'),
     create: (data) => api.post('/machines', data),
     update: (id, data) => api.put(`/machines/${id}`, data),
     assignJob: (id, data) => api.post(`/machines/${id}/job`, data),
     completeJob: (id) => api.put(`/machines/${id}/complete`),
+    assignJobs: (jobs) => api.post('/machines/jobs', jobs),
+    completeJobs: (ids) => api.post('/machines/jobs/complete', { ids }),
     delete: (id) => api.delete(`/machines/${id}`)
 };
 
 // Inspection API
 export const inspectionAPI = {
     getAll: (params) => api.get('/inspections', { params }),
+    getPage: (params) => getPage('/inspections', params),
     getById: (id) => api.get(`/inspections/${id}`),
-    getStats: () => api.get('/inspections/stats'),
+    getStats: (params) => api.get('/inspections/stats', { params }),
+    export: (params) => api.get('/inspections/export', { params, responseType: 'blob' }),
     create: (data) => api.post('/inspections', data),
+    createBulk: (items, params) => api.post('/inspections/bulk', items, { params }),
     update: (id, data) => api.put(`/inspections/${id}`, data),
     delete: (id) => api.delete(`/inspections/${id}`)
 };
@@ -64,11 +86,38 @@ export const inspectionAPI = {
 // Alert API
 export const alertAPI = {
     getAll: (params) => api.get('/alerts', { params }),
+    getPage: (params) => getPage('/alerts', params),
     getById: (id) => api.get(`/alerts/${id}`),
     create: (data) => api.post('/alerts', data),
     markAsRead: (id) => api.put(`/alerts/${id}/read`),
+    markManyAsRead: (selection) => api.patch('/alerts/read', selection),
+    getUnreadCounts: () => api.get('/alerts/unread-count'),
     generateAlerts: () => api.post('/alerts/generate'),
     delete: (id) => api.delete(`/alerts/${id}`)
 };
 
+// Dashboard API
+export const dashboardAPI = {
+    getSummary: () => api.get('/dashboard/summary')
+};
+
+// Live update streams (server-sent events); close the EventSource on unmount.
+// An event with operation "leave" means the document no longer matches the
+// stream's filter and should be dropped from the view.
+export const liveAPI = {
+    alerts: (params) => new EventSource(`${api.defaults.baseURL}/live/alerts?${new URLSearchParams(params || {})}`),
+    machines: (params) => new EventSource(`${api.defaults.baseURL}/live/machines?${new URLSearchParams(params || {})}`)
+};
+
+// Delta sync API
+export const changesAPI = {
+    since: (token, collections) => api.get('/changes', { params: { since: token, collections } })
+};
+
+// Machine telemetry: batched sample ingest and downsampled series for charts
+export const telemetryAPI = {
+    ingest: (samples) => api.post('/telemetry', samples),
+    getSeries: (params) => api.get('/telemetry', { params })
+};
+
 export default api;
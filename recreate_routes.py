@@ -1,11 +1,30 @@
 """
 Script to recreate all missing backend route files
+
+  python recreate_routes.py            write the route templates into backend/routes
+  python recreate_routes.py --indexes  derive compound indexes from the query shapes
+                                       of the routes app.js mounts
+  python recreate_routes.py --check    report mounted-route queries not covered by an index
 """
+import argparse
+import itertools
+import os
+import re
+import sys
 
 # Schedules Route
 schedules_route = """const express = require('express');
 const router = express.Router();
 const Schedule = require('../models/Schedule');
+const BookingLock = require('../models/BookingLock');
+const Tombstone = require('../models/Tombstone');
+const { paginate } = require('../utils/pagination');
+const { sendJson } = require('../utils/serializers');
+const { invalidateOnWrite } = require('../middleware/cache');
+const { bulkWrite, bulkStatus } = require('../utils/bulk');
+const { optimizeSchedule, bulkConflicts } = require('../utils/scheduler');
+
+router.use(invalidateOnWrite('schedules'));
 
 // GET all schedules
 router.get('/', async (req, res) => {
@@ -16,19 +35,29 @@ router.get('/', async (req, res) => {
     if (status) query.status = status;
     if (date) query.date = date;
     
-    const schedules = await Schedule.find(query).sort({ date: -1, time: 1 });
-    res.json(schedules);
+    const schedules = await paginate(Schedule, query, { date: -1, time: 1 }, req.query, res, { lean: true });
+    sendJson(res, Schedule, schedules);
   } catch (error) {
-    res.status(500).json({ message: error.message });
+    res.status(error.status || 500).json({ message: error.message });
+  }
+});
+
+// GET week view: 7 days from :date grouped by day and machine
+router.get('/week/:date', async (req, res) => {
+  try {
+    const week = await Schedule.getWeek(req.params.date);
+    res.json(week);
+  } catch (error) {
+    res.status(error.status || 500).json({ message: error.message });
   }
 });
 
 // GET schedule by ID
 router.get('/:id', async (req, res) => {
   try {
-    const schedule = await Schedule.findById(req.params.id);
+    const schedule = await Schedule.findById(req.params.id).lean();
     if (!schedule) return res.status(404).json({ message: 'Schedule not found' });
-    res.json(schedule);
+    sendJson(res, Schedule, schedule);
   } catch (error) {
     res.status(500).json({ message: error.message });
   }
@@ -41,22 +70,50 @@ router.post('/', async (req, res) => {
     const newSchedule = await schedule.save();
     res.status(201).json(newSchedule);
   } catch (error) {
-    res.status(400).json({ message: error.message });
+    res.status(error.status || 400).json({ message: error.message, conflicts: error.conflicts });
+  }
+});
+
+// CREATE many schedules in one request (?upsert=true matches on lotNo + date).
+// Items that would double-book a machine are reported as per-item errors;
+// the check and the write run under the machines' booking leases.
+router.post('/bulk', async (req, res) => {
+  try {
+    const items = Array.isArray(req.body) ? req.body : req.body && req.body.items;
+    const upsert = req.query.upsert === 'true';
+    const result = await bulkWrite(Schedule, items, {
+      upsertKeys: upsert ? ['lotNo', 'date'] : undefined,
+      prepare: (schedule) => schedule.setSlot(),
+      derived: ['startAt', 'endAt'],
+      check: (schedules) => bulkConflicts(schedules, { upsert }),
+      lock: (schedules, write) => BookingLock.withMachines(schedules.map((schedule) => schedule.machine), write)
+    });
+    res.status(bulkStatus(result, !upsert)).json(result);
+  } catch (error) {
+    res.status(error.status || 500).json({ message: error.message });
+  }
+});
+
+// OPTIMIZE: pack unscheduled lots onto available machines to minimize makespan
+// { lots: [{ lotNo, party, color, quantity, duration, priority }], from?, maintenance?, commit? }
+router.post('/optimize', async (req, res) => {
+  try {
+    const plan = await optimizeSchedule(req.body || {});
+    res.status(plan.committed ? 201 : 200).json(plan);
+  } catch (error) {
+    res.status(error.status || 500).json({ message: error.message });
   }
 });
 
-// UPDATE schedule
+// UPDATE schedule (saved through the model so the slot is rechecked for double-booking)
 router.put('/:id', async (req, res) => {
   try {
-    const schedule = await Schedule.findByIdAndUpdate(
-      req.params.id,
-      req.body,
-      { new: true, runValidators: true }
-    );
+    const schedule = await Schedule.findById(req.params.id);
     if (!schedule) return res.status(404).json({ message: 'Schedule not found' });
-    res.json(schedule);
+    schedule.set(req.body);
+    res.json(await schedule.save());
   } catch (error) {
-    res.status(400).json({ message: error.message });
+    res.status(error.status || 400).json({ message: error.message, conflicts: error.conflicts });
   }
 });
 
@@ -65,6 +122,7 @@ router.delete('/:id', async (req, res) => {
   try {
     const schedule = await Schedule.findByIdAndDelete(req.params.id);
     if (!schedule) return res.status(404).json({ message: 'Schedule not found' });
+    await Tombstone.record('schedules', schedule._id);
     res.json({ message: 'Schedule deleted' });
   } catch (error) {
     res.status(500).json({ message: error.message });
@@ -78,6 +136,13 @@ module.exports = router;
 inventory_route = """const express = require('express');
 const router = express.Router();
 const Inventory = require('../models/Inventory');
+const Tombstone = require('../models/Tombstone');
+const { paginate } = require('../utils/pagination');
+const { sendJson } = require('../utils/serializers');
+const { cached, invalidateOnWrite } = require('../middleware/cache');
+const { bulkWrite, bulkStatus } = require('../utils/bulk');
+
+router.use(invalidateOnWrite('inventory'));
 
 // GET all inventory items
 router.get('/', async (req, res) => {
@@ -88,15 +153,15 @@ router.get('/', async (req, res) => {
     if (category) query.category = category;
     if (status) query.status = status;
     
-    const inventory = await Inventory.find(query).sort({ name: 1 });
-    res.json(inventory);
+    const inventory = await paginate(Inventory, query, { name: 1 }, req.query, res, { lean: true });
+    sendJson(res, Inventory, inventory);
   } catch (error) {
-    res.status(500).json({ message: error.message });
+    res.status(error.status || 500).json({ message: error.message });
   }
 });
 
 // GET low stock alerts
-router.get('/alerts', async (req, res) => {
+router.get('/alerts', cached('inventory'), async (req, res) => {
   try {
     const alerts = await Inventory.find({
       status: { $in: ['low', 'critical'] }
@@ -107,12 +172,22 @@ router.get('/alerts', async (req, res) => {
   }
 });
 
+// GET item counts and weekly usage per category
+router.get('/stats', cached('inventory'), async (req, res) => {
+  try {
+    const stats = await Inventory.getStats();
+    res.json(stats);
+  } catch (error) {
+    res.status(500).json({ message: error.message });
+  }
+});
+
 // GET inventory item by ID
 router.get('/:id', async (req, res) => {
   try {
-    const item = await Inventory.findById(req.params.id);
+    const item = await Inventory.findById(req.params.id).lean();
     if (!item) return res.status(404).json({ message: 'Item not found' });
-    res.json(item);
+    sendJson(res, Inventory, item);
   } catch (error) {
     res.status(500).json({ message: error.message });
   }
@@ -129,14 +204,26 @@ router.post('/', async (req, res) => {
   }
 });
 
+// CREATE many inventory items in one request (?upsert=true matches on name)
+router.post('/bulk', async (req, res) => {
+  try {
+    const items = Array.isArray(req.body) ? req.body : req.body && req.body.items;
+    const upsert = req.query.upsert === 'true';
+    const result = await bulkWrite(Inventory, items, {
+      upsertKeys: upsert ? ['name'] : undefined,
+      prepare: (item) => item.updateStockStatus(),
+      stages: Inventory.stockStatusStages()
+    });
+    res.status(bulkStatus(result, !upsert)).json(result);
+  } catch (error) {
+    res.status(error.status || 500).json({ message: error.message });
+  }
+});
+
 // UPDATE inventory item
 router.put('/:id', async (req, res) => {
   try {
-    const item = await Inventory.findByIdAndUpdate(
-      req.params.id,
-      req.body,
-      { new: true, runValidators: true }
-    );
+    const item = await Inventory.updateWithStatus(req.params.id, req.body);
     if (!item) return res.status(404).json({ message: 'Item not found' });
     res.json(item);
   } catch (error) {
@@ -144,11 +231,36 @@ router.put('/:id', async (req, res) => {
   }
 });
 
+// RECORD usage of many items at once, e.g. every dye in a batch:
+// { day, items: [{ id or name, amount, day? }] }
+router.post('/usage', async (req, res) => {
+  try {
+    const items = Array.isArray(req.body) ? req.body : req.body && req.body.items;
+    const result = await Inventory.recordUsageMany(items, req.body && req.body.day);
+    res.json(result);
+  } catch (error) {
+    res.status(error.status || 500).json({ message: error.message });
+  }
+});
+
+// RECORD usage of one item: { day, amount }
+router.post('/:id/usage', async (req, res) => {
+  try {
+    const { item, reason } = await Inventory.recordUsage({ ...req.body, id: req.params.id });
+    if (reason === 'not found') return res.status(404).json({ message: 'Item not found' });
+    if (!item) return res.status(409).json({ message: 'Insufficient stock' });
+    res.json(item);
+  } catch (error) {
+    res.status(error.status || 500).json({ message: error.message });
+  }
+});
+
 // DELETE inventory item
 router.delete('/:id', async (req, res) => {
   try {
     const item = await Inventory.findByIdAndDelete(req.params.id);
     if (!item) return res.status(404).json({ message: 'Item not found' });
+    await Tombstone.record('inventory', item._id);
     res.json({ message: 'Item deleted' });
   } catch (error) {
     res.status(500).json({ message: error.message });
@@ -162,6 +274,32 @@ module.exports = router;
 machines_route = """const express = require('express');
 const router = express.Router();
 const Machine = require('../models/Machine');
+const { paginate } = require('../utils/pagination');
+const { sendJson } = require('../utils/serializers');
+const { cached, invalidateOnWrite } = require('../middleware/cache');
+const { MAX_ITEMS } = require('../utils/bulk');
+
+router.use(invalidateOnWrite('machines'));
+
+// Job fields for an assignment request
+function jobFields(body) {
+  return {
+    party: body.party,
+    color: body.color,
+    lotNo: body.lotNo,
+    quantity: body.quantity,
+    stage: body.stage || 'Dyeing',
+    efficiency: body.efficiency || 0,
+    runtime: body.runtime || '0h 0m'
+  };
+}
+
+// Respond 404 or 409 for a single-machine transition that did not apply
+async function transitionFailure(res, id, expected) {
+  const exists = await Machine.exists({ _id: id });
+  if (!exists) return res.status(404).json({ message: 'Machine not found' });
+  res.status(409).json({ message: `Machine is not ${expected}` });
+}
 
 // GET all machines
 router.get('/', async (req, res) => {
@@ -171,33 +309,18 @@ router.get('/', async (req, res) => {
     
     if (status) query.status = status;
     
-    const machines = await Machine.find(query).sort({ machineId: 1 });
-    res.json(machines);
+    const machines = await paginate(Machine, query, { machineId: 1 }, req.query, res, { lean: true });
+    sendJson(res, Machine, machines);
   } catch (error) {
-    res.status(500).json({ message: error.message });
+    res.status(error.status || 500).json({ message: error.message });
   }
 });
 
 // GET machine statistics
-router.get('/stats', async (req, res) => {
+router.get('/stats', cached('machines'), async (req, res) => {
   try {
-    const total = await Machine.countDocuments();
-    const running = await Machine.countDocuments({ status: 'running' });
-    const idle = await Machine.countDocuments({ status: 'idle' });
-    const maintenance = await Machine.countDocuments({ status: 'maintenance' });
-    
-    const machines = await Machine.find({ efficiency: { $exists: true, $gt: 0 } });
-    const avgEfficiency = machines.length > 0
-      ? Math.round(machines.reduce((sum, m) => sum + m.efficiency, 0) / machines.length)
-      : 0;
-    
-    res.json({
-      total,
-      running,
-      idle,
-      maintenance,
-      avgEfficiency
-    });
+    const stats = await Machine.getStats();
+    res.json(stats);
   } catch (error) {
     res.status(500).json({ message: error.message });
   }
@@ -206,54 +329,58 @@ router.get('/stats', async (req, res) => {
 // GET machine by ID
 router.get('/:id', async (req, res) => {
   try {
-    const machine = await Machine.findById(req.params.id);
+    const machine = await Machine.findById(req.params.id).lean();
     if (!machine) return res.status(404).json({ message: 'Machine not found' });
-    res.json(machine);
+    sendJson(res, Machine, machine);
   } catch (error) {
     res.status(500).json({ message: error.message });
   }
 });
 
-// ASSIGN job to machine
+// ASSIGN jobs to many idle machines: [{ id, party, color, lotNo, quantity, stage }]
+router.post('/jobs', async (req, res) => {
+  try {
+    const items = Array.isArray(req.body) ? req.body : req.body && req.body.jobs;
+    if (!Array.isArray(items) || items.length === 0) return res.status(400).json({ message: 'Expected a non-empty array of jobs' });
+    if (items.length > MAX_ITEMS) return res.status(400).json({ message: `At most ${MAX_ITEMS} jobs per request` });
+
+    const result = await Machine.assignJobs(items.map((item) => ({ id: item.id, job: jobFields(item) })));
+    res.json(result);
+  } catch (error) {
+    res.status(400).json({ message: error.message });
+  }
+});
+
+// COMPLETE jobs on many running machines: { ids: [...] }
+router.post('/jobs/complete', async (req, res) => {
+  try {
+    const ids = req.body && req.body.ids;
+    if (!Array.isArray(ids) || ids.length === 0) return res.status(400).json({ message: 'Expected a non-empty array of ids' });
+    if (ids.length > MAX_ITEMS) return res.status(400).json({ message: `At most ${MAX_ITEMS} ids per request` });
+
+    const result = await Machine.completeJobs(ids);
+    res.json(result);
+  } catch (error) {
+    res.status(400).json({ message: error.message });
+  }
+});
+
+// ASSIGN job to machine (only while it is idle)
 router.post('/:id/job', async (req, res) => {
   try {
-    const machine = await Machine.findById(req.params.id);
-    if (!machine) return res.status(404).json({ message: 'Machine not found' });
-    
-    machine.status = 'running';
-    machine.party = req.body.party;
-    machine.color = req.body.color;
-    machine.lotNo = req.body.lotNo;
-    machine.quantity = req.body.quantity;
-    machine.stage = req.body.stage || 'Dyeing';
-    machine.efficiency = req.body.efficiency || 0;
-    machine.runtime = req.body.runtime || '0h 0m';
-    machine.startTime = new Date();
-    
-    await machine.save();
+    const machine = await Machine.assignJob(req.params.id, jobFields(req.body));
+    if (!machine) return transitionFailure(res, req.params.id, 'idle');
     res.json(machine);
   } catch (error) {
     res.status(400).json({ message: error.message });
   }
 });
 
-// COMPLETE job on machine
+// COMPLETE job on machine (only while it is running)
 router.post('/:id/complete', async (req, res) => {
   try {
-    const machine = await Machine.findById(req.params.id);
-    if (!machine) return res.status(404).json({ message: 'Machine not found' });
-    
-    machine.status = 'idle';
-    machine.party = '';
-    machine.color = '';
-    machine.lotNo = '';
-    machine.quantity = '';
-    machine.stage = '';
-    machine.efficiency = 0;
-    machine.runtime = '';
-    machine.startTime = null;
-    
-    await machine.save();
+    const machine = await Machine.completeJob(req.params.id);
+    if (!machine) return transitionFailure(res, req.params.id, 'running');
     res.json(machine);
   } catch (error) {
     res.status(400).json({ message: error.message });
@@ -282,6 +409,14 @@ module.exports = router;
 inspections_route = """const express = require('express');
 const router = express.Router();
 const Inspection = require('../models/Inspection');
+const Tombstone = require('../models/Tombstone');
+const { paginate } = require('../utils/pagination');
+const { sendJson } = require('../utils/serializers');
+const { streamExport } = require('../utils/exporter');
+const { cached, invalidateOnWrite } = require('../middleware/cache');
+const { bulkWrite, bulkStatus } = require('../utils/bulk');
+
+router.use(invalidateOnWrite('inspections'));
 
 // GET all inspections
 router.get('/', async (req, res) => {
@@ -292,47 +427,45 @@ router.get('/', async (req, res) => {
     if (status) query.status = status;
     if (date) query.date = date;
     
-    const inspections = await Inspection.find(query).sort({ date: -1 });
-    res.json(inspections);
+    const inspections = await paginate(Inspection, query, { date: -1 }, req.query, res, { lean: true });
+    sendJson(res, Inspection, inspections);
   } catch (error) {
-    res.status(500).json({ message: error.message });
+    res.status(error.status || 500).json({ message: error.message });
   }
 });
 
-// GET inspection statistics
-router.get('/stats', async (req, res) => {
+// GET inspection statistics (optional from, to, client, bucket=day|week)
+router.get('/stats', cached('inspections'), async (req, res) => {
   try {
-    const total = await Inspection.countDocuments();
-    const approved = await Inspection.countDocuments({ status: 'approved' });
-    const pending = await Inspection.countDocuments({ status: 'pending' });
-    const rejected = await Inspection.countDocuments({ status: 'rejected' });
-    
-    const approvalRate = total > 0 ? Math.round((approved / total) * 100) : 0;
+    const { from, to, client, bucket } = req.query;
+    const stats = await Inspection.getStats({ from, to, client, bucket });
+    res.json(stats);
+  } catch (error) {
+    res.status(error.status || 500).json({ message: error.message });
+  }
+});
+
+// GET streaming export of inspections (format=ndjson|csv)
+router.get('/export', async (req, res) => {
+  try {
+    const { status, date } = req.query;
+    let query = {};
     
-    const inspections = await Inspection.find({ deltaE: { $exists: true } });
-    const avgDeltaE = inspections.length > 0
-      ? (inspections.reduce((sum, i) => sum + i.deltaE, 0) / inspections.length).toFixed(2)
-      : 0;
+    if (status) query.status = status;
+    if (date) query.date = date;
     
-    res.json({
-      total,
-      approved,
-      pending,
-      rejected,
-      approvalRate,
-      avgDeltaE
-    });
+    await streamExport(Inspection, query, { date: -1 }, req, res);
   } catch (error) {
-    res.status(500).json({ message: error.message });
+    res.status(error.status || 500).json({ message: error.message });
   }
 });
 
 // GET inspection by ID
 router.get('/:id', async (req, res) => {
   try {
-    const inspection = await Inspection.findById(req.params.id);
+    const inspection = await Inspection.findById(req.params.id).lean();
     if (!inspection) return res.status(404).json({ message: 'Inspection not found' });
-    res.json(inspection);
+    sendJson(res, Inspection, inspection);
   } catch (error) {
     res.status(500).json({ message: error.message });
   }
@@ -349,6 +482,18 @@ router.post('/', async (req, res) => {
   }
 });
 
+// CREATE many inspections in one request (?upsert=true matches on lotNo + date)
+router.post('/bulk', async (req, res) => {
+  try {
+    const items = Array.isArray(req.body) ? req.body : req.body && req.body.items;
+    const upsert = req.query.upsert === 'true';
+    const result = await bulkWrite(Inspection, items, { upsertKeys: upsert ? ['lotNo', 'date'] : undefined });
+    res.status(bulkStatus(result, !upsert)).json(result);
+  } catch (error) {
+    res.status(error.status || 500).json({ message: error.message });
+  }
+});
+
 // UPDATE inspection
 router.put('/:id', async (req, res) => {
   try {
@@ -369,6 +514,7 @@ router.delete('/:id', async (req, res) => {
   try {
     const inspection = await Inspection.findByIdAndDelete(req.params.id);
     if (!inspection) return res.status(404).json({ message: 'Inspection not found' });
+    await Tombstone.record('inspections', inspection._id);
     res.json({ message: 'Inspection deleted' });
   } catch (error) {
     res.status(500).json({ message: error.message });
@@ -382,6 +528,13 @@ module.exports = router;
 alerts_route = """const express = require('express');
 const router = express.Router();
 const Alert = require('../models/Alert');
+const Tombstone = require('../models/Tombstone');
+const { paginate } = require('../utils/pagination');
+const { sendJson } = require('../utils/serializers');
+const { cached, invalidateOnWrite } = require('../middleware/cache');
+const { generateAlerts } = require('../utils/alertRules');
+
+router.use(invalidateOnWrite('alerts'));
 
 // GET all alerts
 router.get('/', async (req, res) => {
@@ -393,8 +546,18 @@ router.get('/', async (req, res) => {
     if (category) query.category = category;
     if (read !== undefined) query.read = read === 'true';
     
-    const alerts = await Alert.find(query).sort({ createdAt: -1 });
-    res.json(alerts);
+    const alerts = await paginate(Alert, query, { createdAt: -1 }, req.query, res, { lean: true });
+    sendJson(res, Alert, alerts);
+  } catch (error) {
+    res.status(error.status || 500).json({ message: error.message });
+  }
+});
+
+// GET unread alert counts per category
+router.get('/unread-count', cached('alerts'), async (req, res) => {
+  try {
+    const counts = await Alert.unreadCounts();
+    res.json(counts);
   } catch (error) {
     res.status(500).json({ message: error.message });
   }
@@ -403,16 +566,29 @@ router.get('/', async (req, res) => {
 // GET alert by ID
 router.get('/:id', async (req, res) => {
   try {
-    const alert = await Alert.findById(req.params.id);
+    const alert = await Alert.findById(req.params.id).lean();
     if (!alert) return res.status(404).json({ message: 'Alert not found' });
-    res.json(alert);
+    sendJson(res, Alert, alert);
   } catch (error) {
     res.status(500).json({ message: error.message });
   }
 });
 
+// MARK many alerts as read in one update: { ids: [...] } or { type, category, before }
+const markManyRead = async (req, res) => {
+  try {
+    const result = await Alert.markRead(req.body || {});
+    res.json(result);
+  } catch (error) {
+    res.status(error.status || 500).json({ message: error.message });
+  }
+};
+
+router.patch('/read', markManyRead);
+router.put('/read', markManyRead);
+
 // MARK alert as read
-router.patch('/:id/read', async (req, res) => {
+const markRead = async (req, res) => {
   try {
     const alert = await Alert.findByIdAndUpdate(
       req.params.id,
@@ -424,7 +600,10 @@ router.patch('/:id/read', async (req, res) => {
   } catch (error) {
     res.status(400).json({ message: error.message });
   }
-});
+};
+
+router.patch('/:id/read', markRead);
+router.put('/:id/read', markRead);
 
 // CREATE new alert
 router.post('/', async (req, res) => {
@@ -437,11 +616,22 @@ router.post('/', async (req, res) => {
   }
 });
 
+// GENERATE alerts from the rules in utils/alertRules.js (?full=true re-examines everything)
+router.post('/generate', async (req, res) => {
+  try {
+    const result = await generateAlerts({ full: req.query.full === 'true' });
+    res.json({ message: `Generated ${result.created} new alerts`, ...result });
+  } catch (error) {
+    res.status(500).json({ message: error.message });
+  }
+});
+
 // DELETE alert
 router.delete('/:id', async (req, res) => {
   try {
     const alert = await Alert.findByIdAndDelete(req.params.id);
     if (!alert) return res.status(404).json({ message: 'Alert not found' });
+    await Tombstone.record('alerts', alert._id);
     res.json({ message: 'Alert deleted' });
   } catch (error) {
     res.status(500).json({ message: error.message });
@@ -451,29 +641,399 @@ router.delete('/:id', async (req, res) => {
 module.exports = router;
 """
 
-# Write all route files
-import os
+ROUTE_TEMPLATES = {
+    'schedules.js': schedules_route,
+    'inventory.js': inventory_route,
+    'machines.js': machines_route,
+    'inspections.js': inspections_route,
+    'alerts.js': alerts_route,
+}
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+
+INDEX_BLOCK_START = '// BEGIN generated indexes (python recreate_routes.py --indexes)'
+INDEX_BLOCK_END = '// END generated indexes'
+
+
+# Query-shape analysis
+#
+# Every find/findOne/countDocuments/paginate/streamExport call in a route
+# handler is reduced to a shape: equality fields, sort keys and range fields.
+# Filters assembled from optional query-string parameters (query.x = ...)
+# give one shape per combination of parameters. Past MAX_OPTIONAL_FILTERS
+# parameters only none, each one alone and all of them are checked, and the
+# other combinations are reported as skipped.
+
+MAX_OPTIONAL_FILTERS = 2
+
+class QueryShape:
+    def __init__(self, model, equality, sort, range_fields, source):
+        self.model = model
+        self.equality = list(dict.fromkeys(equality))
+        self.sort = [(f, d) for f, d in sort if f not in self.equality]
+        sorted_fields = {f for f, _ in self.sort}
+        self.range = [f for f in dict.fromkeys(range_fields)
+                      if f not in self.equality and f not in sorted_fields]
+        self.source = source
+
+    def is_trivial(self):
+        return not (self.equality or self.sort or self.range)
+
+    def index_keys(self):
+        """Compound index for this shape: equality, then sort, then range (ESR)."""
+        keys = [(f, 1) for f in self.equality] + list(self.sort)
+        keys += [(f, 1) for f in self.range]
+        return keys
+
+    def describe(self):
+        parts = []
+        if self.equality:
+            parts.append('filter {%s}' % ', '.join(self.equality))
+        if self.range:
+            parts.append('range {%s}' % ', '.join(self.range))
+        if self.sort:
+            parts.append('sort %s' % format_keys(self.sort))
+        return '%s %s' % (self.model, ' '.join(parts))
+
+
+def format_keys(keys):
+    return '{ %s }' % ', '.join('%s: %d' % (f, d) for f, d in keys)
+
+
+def matching_brace(text, start):
+    """Index just past the bracket group opening at text[start]."""
+    pairs = {'{': '}', '(': ')', '[': ']'}
+    stack = []
+    quote = None
+    i = start
+    while i < len(text):
+        c = text[i]
+        if quote:
+            if c == '\\':
+                i += 1
+            elif c == quote:
+                quote = None
+        elif c in '\'"`':
+            quote = c
+        elif c in pairs:
+            stack.append(pairs[c])
+        elif stack and c == stack[-1]:
+            stack.pop()
+            if not stack:
+                return i + 1
+        i += 1
+    raise ValueError('Unbalanced brackets at offset %d' % start)
+
+
+def object_entries(literal):
+    """Top-level (key, value) pairs of a JS object literal."""
+    body = literal.strip()[1:-1]
+    entries = []
+    depth = 0
+    current = ''
+    quote = None
+    for c in body + ',':
+        if quote:
+            if c == quote:
+                quote = None
+        elif c in '\'"`':
+            quote = c
+        elif c in '{[(':
+            depth += 1
+        elif c in '}])':
+            depth -= 1
+        elif c == ',' and depth == 0:
+            if ':' in current:
+                key, value = current.split(':', 1)
+                entries.append((key.strip().strip('\'"'), value.strip()))
+            current = ''
+            continue
+        current += c
+    return entries
+
+
+def parse_sort(literal):
+    return [(f, -1 if v.strip() in ('-1', "'desc'") else 1) for f, v in object_entries(literal)]
+
+
+def parse_filter(literal):
+    equality, range_fields = [], []
+    for field, value in object_entries(literal):
+        if field.startswith('$'):
+            continue
+        if value.startswith('{') and '$' in value:
+            range_fields.append(field)
+        else:
+            equality.append(field)
+    return equality, range_fields
+
+
+def handler_blocks(source):
+    """(label, text) for each router.<method>(...) handler and schema static."""
+    blocks = []
+    for match in re.finditer(r"router\.(get|post|put|patch|delete)\(\s*'([^']*)'", source):
+        end = matching_brace(source, source.index('(', match.start()))
+        blocks.append(('%s %s' % (match.group(1).upper(), match.group(2)), source[match.start():end]))
+    for match in re.finditer(r"\w+Schema\.statics\.(\w+) = (?:async )?function[^{]*\{", source):
+        end = matching_brace(source, match.end() - 1)
+        blocks.append(('%s()' % match.group(1), source[match.start():end]))
+    return blocks
+
+
+def query_variable_fields(text, helpers):
+    """Equality and range fields assigned onto a `query` object."""
+    for name, body in helpers.items():
+        if re.search(r'\b%s\(' % name, text):
+            text += body
+    equality = re.findall(r'query\.(\w+)\s*=\s*(?!\{\s*\})', text)
+    range_fields = list(dict.fromkeys(re.findall(r'query\.(\w+)\.\$(?:gte|gt|lte|lt)\s*=', text)))
+    return [f for f in dict.fromkeys(equality) if f not in range_fields], range_fields
+
+
+def optional_filter_variants(optional_eq, optional_range, origin, skipped):
+    """(equality, range) pairs for the combinations of optional filters; the
+    combinations left out are appended to skipped as (origin, count)."""
+    fields = [(f, 'eq') for f in optional_eq] + [(f, 'range') for f in optional_range]
+    if len(fields) <= MAX_OPTIONAL_FILTERS:
+        subsets = [c for n in range(len(fields) + 1) for c in itertools.combinations(fields, n)]
+    else:
+        subsets = [()] + [(field,) for field in fields] + [tuple(fields)]
+        count = 2 ** len(fields) - len(subsets)
+        skipped.append((origin, count))
+        print("⚠️  %s: %d combinations of %s not checked (only none, each alone and all)" % (
+            origin, count, ', '.join(f for f, _ in fields)))
+    return [([f for f, kind in subset if kind == 'eq'], [f for f, kind in subset if kind == 'range'])
+            for subset in subsets]
+
+
+def derive_query_shapes(source, filename, skipped):
+    models = dict(re.findall(r"const (\w+) = require\('\.\./models/(\w+)'\)", source))
+    helpers = {}
+    for match in re.finditer(r'function (\w+)\([^)]*\)\s*\{', source):
+        helpers[match.group(1)] = source[match.end() - 1:matching_brace(source, match.end() - 1)]
+
+    shapes = []
+    for label, text in handler_blocks(source):
+        origin = '%s %s' % (filename, label)
+        optional_eq, optional_range = query_variable_fields(text, helpers)
+
+        calls = []
+        for match in re.finditer(r'\b(paginate|streamExport)\((\w+),\s*([^,]+),\s*(\{[^}]*\})', text):
+            sort = parse_sort(match.group(4))
+            if match.group(1) == 'paginate' and '_id' not in dict(sort):
+                sort.append(('_id', 1))  # keyset tie-breaker added by utils/pagination
+            calls.append((match.group(2), match.group(3).strip(), sort))
+        for match in re.finditer(r'\b(\w+)\.(find|findOne|countDocuments)\(', text):
+            open_paren = match.end() - 1
+            close_paren = matching_brace(text, open_paren)
+            argument = text[open_paren + 1:close_paren - 1].strip()
+            sort = []
+            sort_match = re.match(r'\s*\.sort\(\s*(\{[^}]*\})', text[close_paren:])
+            if sort_match:
+                sort = parse_sort(sort_match.group(1))
+            calls.append((match.group(1), argument, sort))
+
+        for model_var, argument, sort in calls:
+            if model_var not in models:
+                continue
+            model = models[model_var]
+            if argument.startswith('{'):
+                equality, range_fields = parse_filter(argument[:matching_brace(argument, 0)])
+                variants = [(equality, range_fields)]
+            elif argument == 'query' or re.match(r'\w+\(req\.query\)$', argument):
+                variants = optional_filter_variants(optional_eq, optional_range, origin, skipped)
+            else:
+                variants = [([], [])]
+
+            for equality, range_fields in variants:
+                shape = QueryShape(model, equality, sort, range_fields, origin)
+                if not shape.is_trivial():
+                    shapes.append(shape)
+    return shapes
+
+
+def mounted_route_files(routes_dir):
+    """Route files that app.js (next to routes_dir) mounts with app.use()."""
+    app_path = os.path.join(os.path.dirname(os.path.abspath(routes_dir)), 'app.js')
+    with open(app_path, 'r', encoding='utf-8') as f:
+        source = f.read()
+    required = dict(re.findall(r"const (\w+) = require\('\./routes/(\w+)'\)", source))
+    mounted = re.findall(r"app\.use\(\s*'[^']*',\s*(\w+)\s*\)", source)
+    return sorted({required[var] + '.js' for var in mounted if var in required})
+
+
+def collect_query_shapes(routes_dir, models_dir, skipped):
+    """Shapes from the route files the app actually mounts and the query
+    statics on the models. The templates above are not analysed: what runs is
+    what is on disk."""
+    sources = {}
+    for filename in mounted_route_files(routes_dir):
+        with open(os.path.join(routes_dir, filename), 'r', encoding='utf-8') as f:
+            sources['routes/' + filename] = f.read()
+    if os.path.isdir(models_dir):
+        for filename in sorted(os.listdir(models_dir)):
+            if filename.endswith('.js'):
+                with open(os.path.join(models_dir, filename), 'r', encoding='utf-8') as f:
+                    source = f.read()
+                # Statics query through `this`; bind it to the model so calls resolve
+                model = filename[:-3]
+                source = "const %s = require('../models/%s');\n" % (model, model) + \
+                    re.sub(r'\bthis\.(find|findOne|countDocuments)\(', model + r'.\1(', source)
+                sources['models/' + filename] = source
+
+    shapes = []
+    for label, source in sources.items():
+        shapes.extend(derive_query_shapes(source, label, skipped))
+    return shapes
+
+
+def covers(index, shape):
+    """True if a compound index serves the shape without a scan or in-memory sort."""
+    n = len(shape.equality)
+    if {f for f, _ in index[:n]} != set(shape.equality):
+        return False
+    rest = index[n:]
+
+    if shape.sort:
+        segment = rest[:len(shape.sort)]
+        if [f for f, _ in segment] != [f for f, _ in shape.sort]:
+            return False
+        directions = [d * sd for (_, d), (_, sd) in zip(segment, shape.sort)]
+        if len(set(directions)) != 1:
+            return False
+        rest = rest[len(shape.sort):]
+
+    return {f for f, _ in rest[:len(shape.range)]} == set(shape.range)
+
+
+def is_prefix(shorter, longer):
+    if len(shorter) > len(longer):
+        return False
+    directions = {d * ld for (f, d), (lf, ld) in zip(shorter, longer) if f == lf}
+    return all(f == lf for (f, _), (lf, _) in zip(shorter, longer)) and len(directions) == 1
+
+
+def derive_indexes(shapes, declared):
+    """Minimal compound index list per model covering every shape that the
+    hand-declared indexes do not already serve."""
+    indexes = {}
+    for shape in shapes:
+        keys = shape.index_keys()
+        existing = indexes.setdefault(shape.model, [])
+        if any(covers(index, shape) for index in declared.get(shape.model, []) + existing):
+            continue
+        existing[:] = [index for index in existing if not is_prefix(index, keys)]
+        existing.append(keys)
+    return indexes
+
+
+# Index declarations in backend/models
+
+def model_schema_var(source):
+    match = re.search(r'const (\w+) = new mongoose\.Schema', source)
+    return match.group(1) if match else None
+
+
+def declared_indexes(models_dir, include_generated=True):
+    """Index keys per model: unique fields plus every schema.index() call.
+
+    A unique index never has ties, so it also serves the _id tie-breaker
+    that keyset pagination appends to the sort.
+    """
+    declared = {}
+    for filename in sorted(os.listdir(models_dir)):
+        if not filename.endswith('.js'):
+            continue
+        with open(os.path.join(models_dir, filename), 'r', encoding='utf-8') as f:
+            source = f.read()
+        if not include_generated and INDEX_BLOCK_START in source:
+            source = (source[:source.index(INDEX_BLOCK_START)] +
+                      source[source.index(INDEX_BLOCK_END) + len(INDEX_BLOCK_END):])
+        model = filename[:-3]
+        indexes = declared.setdefault(model, [[('_id', 1)]])
+        for match in re.finditer(r'(\w+):\s*\{[^{}]*unique:\s*true', source):
+            indexes.append([(match.group(1), 1), ('_id', 1)])
+        for match in re.finditer(r'\w+Schema\.index\(\s*\{', source):
+            start = match.end() - 1
+            indexes.append(parse_sort(source[start:matching_brace(source, start)]))
+    return declared
+
+
+def write_model_indexes(models_dir, indexes):
+    """Replace the generated index block in each model file."""
+    for model, keys_list in sorted(indexes.items()):
+        path = os.path.join(models_dir, model + '.js')
+        if not keys_list and INDEX_BLOCK_START not in open(path, encoding='utf-8').read():
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            source = f.read()
+
+        schema_var = model_schema_var(source)
+        block = [INDEX_BLOCK_START]
+        block += ['%s.index(%s);' % (schema_var, format_keys(keys)) for keys in keys_list]
+        block.append(INDEX_BLOCK_END)
+        block = '\n'.join(block) + '\n\n'
+
+        if INDEX_BLOCK_START in source:
+            start = source.index(INDEX_BLOCK_START)
+            end = source.index(INDEX_BLOCK_END) + len(INDEX_BLOCK_END)
+            source = source[:start] + block.rstrip('\n') + source[end:]
+        else:
+            anchor = source.index('module.exports')
+            source = source[:anchor] + block + source[anchor:]
+
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(source)
+        print("✅ %s: %d generated indexes" % (model, len(keys_list)))
+
+
+def check_indexes(shapes, models_dir, skipped):
+    """Report every query shape not served by a declared index."""
+    declared = declared_indexes(models_dir)
+    uncovered = [s for s in shapes if not any(covers(i, s) for i in declared.get(s.model, []))]
+    for shape in uncovered:
+        print("❌ %s (%s) needs %s" % (shape.describe(), shape.source, format_keys(shape.index_keys())))
+    if uncovered:
+        print("\n%d of %d query shapes are not covered by an index" % (len(uncovered), len(shapes)))
+    else:
+        print("✅ All %d query shapes are covered by an index" % len(shapes))
+    if skipped:
+        print("⚠️  %d optional-filter combinations in %d handlers were not checked" % (
+            sum(count for _, count in skipped), len(skipped)))
+    return not uncovered
+
 
-routes_dir = r'C:\Users\ashok\OneDrive\Desktop\consultancy\backend\routes'
+def write_routes(routes_dir):
+    for filename, source in ROUTE_TEMPLATES.items():
+        with open(os.path.join(routes_dir, filename), 'w') as f:
+            f.write(source)
+        print("✅ Created %s" % filename)
 
-with open(os.path.join(routes_dir, 'schedules.js'), 'w') as f:
-    f.write(schedules_route)
-print("✅ Created schedules.js")
+    print("\n🎉 All route files created successfully!")
 
-with open(os.path.join(routes_dir, 'inventory.js'), 'w') as f:
-    f.write(inventory_route)
-print("✅ Created inventory.js")
 
-with open(os.path.join(routes_dir, 'machines.js'), 'w') as f:
-    f.write(machines_route)
-print("✅ Created machines.js")
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--routes-dir', default=os.path.join(BACKEND_DIR, 'routes'))
+    parser.add_argument('--models-dir', default=os.path.join(BACKEND_DIR, 'models'))
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--indexes', action='store_true',
+                      help='derive compound indexes from route query shapes and write them into the models')
+    mode.add_argument('--check', action='store_true',
+                      help='report route queries not covered by a declared index')
+    args = parser.parse_args()
 
-with open(os.path.join(routes_dir, 'inspections.js'), 'w') as f:
-    f.write(inspections_route)
-print("✅ Created inspections.js")
+    skipped = []
+    if args.indexes:
+        shapes = collect_query_shapes(args.routes_dir, args.models_dir, skipped)
+        declared = declared_indexes(args.models_dir, include_generated=False)
+        write_model_indexes(args.models_dir, derive_indexes(shapes, declared))
+    elif args.check:
+        shapes = collect_query_shapes(args.routes_dir, args.models_dir, skipped)
+        sys.exit(0 if check_indexes(shapes, args.models_dir, skipped) else 1)
+    else:
+        write_routes(args.routes_dir)
 
-with open(os.path.join(routes_dir, 'alerts.js'), 'w') as f:
-    f.write(alerts_route)
-print("✅ Created alerts.js")
 
-print("\n🎉 All route files created successfully!")
+if __name__ == '__main__':
+    main()
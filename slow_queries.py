@@ -0,0 +1,183 @@
+"""
+Script to rank the slow-query log written by backend/utils/slowQueries.js
+
+  python slow_queries.py                        report on backend/logs/slow-queries.ndjson
+  python slow_queries.py path/to/log.ndjson     report on another log (or several)
+  python slow_queries.py --top 20               longer worst-offender list
+
+Queries are grouped by model, operation and shape (equality fields, range
+fields, sort). The report has two parts:
+
+  missing indexes   shapes whose sampled plans scanned the collection or sorted
+                    in memory, or that no declared index covers, with the
+                    compound index (ESR order) that would serve them
+  worst offenders   shapes ranked by total time spent, whatever their plan
+
+Index coverage is checked the same way as recreate_routes.py --check.
+"""
+import argparse
+import json
+import math
+import os
+import sys
+from collections import Counter
+
+from recreate_routes import BACKEND_DIR, QueryShape, covers, declared_indexes, format_keys
+
+DEFAULT_LOG = os.path.join(BACKEND_DIR, 'logs', 'slow-queries.ndjson')
+
+
+class Group:
+    def __init__(self, model, op, shape):
+        self.model = model
+        self.op = op
+        self.shape = shape
+        self.durations = []
+        self.routes = Counter()
+        self.explained = 0
+        self.collscans = 0
+        self.memory_sorts = 0
+        self.examined = 0
+        self.returned = 0
+        self.indexes = Counter()
+
+    def add(self, entry):
+        self.durations.append(entry['ms'])
+        self.routes[entry.get('route') or 'unknown'] += 1
+        plan = entry.get('plan')
+        if not plan or 'error' in plan:
+            return
+        self.explained += 1
+        self.collscans += bool(plan.get('collscan'))
+        self.memory_sorts += bool(plan.get('inMemorySort'))
+        self.examined += plan.get('docsExamined') or 0
+        self.returned += plan.get('nReturned') or 0
+        self.indexes.update(plan.get('indexes') or [])
+
+    @property
+    def total_ms(self):
+        return sum(self.durations)
+
+    def percentile(self, fraction):
+        values = sorted(self.durations)
+        return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+    def flags(self):
+        flags = []
+        if self.collscans:
+            flags.append('COLLSCAN %d/%d' % (self.collscans, self.explained))
+        if self.memory_sorts:
+            flags.append('in-memory SORT %d/%d' % (self.memory_sorts, self.explained))
+        if self.explained and self.returned:
+            ratio = self.examined / self.returned
+            if ratio >= 10:
+                flags.append('%.0f docs examined per doc returned' % ratio)
+        if self.shape.get('logical'):
+            flags.append('$or/$and not analysed')
+        return flags
+
+    def query_shape(self):
+        return QueryShape(self.model, self.shape.get('equality', []),
+                          [tuple(pair) for pair in self.shape.get('sort', [])],
+                          self.shape.get('range', []), None)
+
+    def describe(self):
+        shape = self.query_shape()
+        text = shape.describe() if not shape.is_trivial() else '%s (no filter)' % self.model
+        return '%s %s' % (text, self.op)
+
+    def summary(self):
+        return '%d× total %.0f ms, p95 %.0f ms, max %.0f ms' % (
+            len(self.durations), self.total_ms, self.percentile(0.95), max(self.durations))
+
+
+def read_groups(paths):
+    groups = {}
+    skipped = 0
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    skipped += 1
+                    continue
+                shape = entry.get('shape') or {}
+                key = (entry.get('model'), entry.get('op'), json.dumps(shape, sort_keys=True))
+                if key not in groups:
+                    groups[key] = Group(entry.get('model') or 'unknown', entry.get('op') or 'unknown', shape)
+                groups[key].add(entry)
+    if skipped:
+        print("⚠️  Skipped %d unreadable lines" % skipped)
+    return list(groups.values())
+
+
+def missing_index(group, declared):
+    """(reason, suggested keys) when the group looks index-starved, else None."""
+    shape = group.query_shape()
+    if shape.is_trivial():
+        return None
+    keys = shape.index_keys()
+    covered = any(covers(index, shape) for index in declared.get(group.model, []))
+
+    if group.collscans or group.memory_sorts:
+        reason = 'declared index %s is not used - is it built?' % format_keys(keys) if covered else 'add %s' % format_keys(keys)
+        return reason, keys
+    if not covered:
+        return 'no declared index covers it - add %s' % format_keys(keys), keys
+    return None
+
+
+def print_routes(group, limit=3):
+    for route, count in group.routes.most_common(limit):
+        print("      %s (%d)" % (route, count))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip(), formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('logs', nargs='*', default=[DEFAULT_LOG], help='slow-query logs (default backend/logs/slow-queries.ndjson)')
+    parser.add_argument('--models-dir', default=os.path.join(BACKEND_DIR, 'models'))
+    parser.add_argument('--top', type=int, default=10, help='worst offenders to list (default 10)')
+    args = parser.parse_args()
+
+    missing = [path for path in args.logs if not os.path.exists(path)]
+    if missing:
+        sys.exit("❌ No slow-query log at %s (set SLOW_QUERY_MS and exercise the API first)" % ', '.join(missing))
+
+    groups = read_groups(args.logs)
+    if not groups:
+        print("✅ No slow queries recorded")
+        return
+    groups.sort(key=lambda group: group.total_ms, reverse=True)
+    declared = declared_indexes(args.models_dir)
+
+    print("Missing indexes (ranked by total time)\n")
+    starved = [(group, missing_index(group, declared)) for group in groups]
+    starved = [(group, found) for group, found in starved if found]
+    for rank, (group, (reason, _)) in enumerate(starved, 1):
+        print("%2d. ❌ %s" % (rank, group.describe()))
+        print("      %s; %s" % (group.summary(), reason))
+        flags = group.flags()
+        if flags:
+            print("      %s" % ', '.join(flags))
+        print_routes(group)
+    if not starved:
+        print("✅ Every slow query shape is served by an index")
+
+    print("\nWorst offenders (ranked by total time)\n")
+    for rank, group in enumerate(groups[:args.top], 1):
+        print("%2d. %s" % (rank, group.describe()))
+        print("      %s" % group.summary())
+        flags = group.flags()
+        if group.indexes:
+            flags.append('uses %s' % ', '.join(name for name, _ in group.indexes.most_common(2)))
+        if flags:
+            print("      %s" % ', '.join(flags))
+        print_routes(group)
+
+    total = sum(len(group.durations) for group in groups)
+    print("\n%d slow queries in %d shapes, %d of them missing an index" % (total, len(groups), len(starved)))
+
+
+if __name__ == '__main__':
+    main()